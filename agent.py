@@ -1,9 +1,11 @@
 from datetime import datetime
 import random
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 from models.base_connaissances import BaseConnaissances
 from models.recette import Recette
 from services.gemini_service import GeminiAIService
+from services.resilience import ServiceIAIndisponible
+from utils.config import Config
 
 class RecommandationEngine:
     """Moteur de recommandation de recettes"""
@@ -13,19 +15,17 @@ class RecommandationEngine:
     
     def recommander_par_ingredients(self, ingredients_dispo: List[str]) -> List[Recette]:
         """Recommande des recettes basées sur les ingrédients disponibles"""
-        scores = {}
-        for recette in self.base.recettes:
-            score = sum(
-                1 for ing in recette.ingredients 
-                if any(i.lower() in ing.nom.lower() for i in ingredients_dispo)
-            )
-            if score > 0:
-                scores[recette] = score / len(recette.ingredients)
-        return sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
+        # Part des ingrédients de chaque recette disponible, calculée sur la matrice recettes × ingrédients
+        return [recette for recette, _ in self.base.recommander_garde_mangers([ingredients_dispo], k=None)[0]]
+    
+    def recommander_par_lots(self, garde_mangers: List[List[str]],
+                             k: Optional[int] = 10) -> List[List[Tuple[Recette, float]]]:
+        """Les k meilleures recettes (avec leur score) de chaque garde-manger, en un seul calcul"""
+        return self.base.recommander_garde_mangers(garde_mangers, k)
     
     def recommander_par_temps(self, temps_max: int) -> List[Recette]:
         """Recommande des recettes selon le temps maximum"""
-        return [r for r in self.base.recettes if r.temps_preparation <= temps_max]
+        return self.base.query(temps_max=temps_max)
     
     def recommander_aleatoire(self) -> Recette:
         """Retourne une recette aléatoire"""
@@ -37,8 +37,9 @@ class RecommandationEngine:
 class AgentCulinaire:
     """Agent intelligent pour l'assistance culinaire"""
     
-    def __init__(self):
-        self.base_connaissances = BaseConnaissances()
+    def __init__(self, base_connaissances: BaseConnaissances = None):
+        # Par défaut, tous les agents du processus partagent le même catalogue
+        self.base_connaissances = base_connaissances or BaseConnaissances.partagee()
         self.moteur_recommandation = RecommandationEngine(self.base_connaissances)
         self.gemini_service = GeminiAIService()
     
@@ -114,9 +115,75 @@ class AgentCulinaire:
         else:
             return "🤖 Je n'ai pas compris votre demande. Tapez 'aide' pour voir les commandes disponibles."
     
-    async def traiter_requete_ia(self, requete: str) -> str:
-        """Utilise Gemini pour les requêtes complexes"""
+    def _contexte_recettes(self, requete: str) -> str:
+        """Recettes les plus pertinentes pour la requête, dans la limite du budget de tokens"""
+        recettes = self.base_connaissances.recettes_pertinentes(requete, Config.RAG_TOP_K)
+        if not recettes:
+            # Question générale : un aperçu du catalogue plutôt que rien
+            recettes = self.base_connaissances.recettes[:Config.RAG_TOP_K]
+        
+        # Estimation grossière : environ 4 caractères par token
+        budget = Config.RAG_BUDGET_TOKENS * 4
         recettes_context = ""
-        for recette in self.base_connaissances.recettes:
-            recettes_context += f"- {recette.nom} ({recette.type_plat}, {recette.difficulte}, {recette.temps_preparation}min)\n"
-        return await self.gemini_service.generer_reponse_culinaire(requete, recettes_context)
\ No newline at end of file
+        for recette in recettes:
+            ligne = (f"- {recette.nom} ({recette.type_plat}, {recette.difficulte}, {recette.temps_preparation}min) : "
+                     f"{', '.join(recette.noms_ingredients())}\n")
+            if len(recettes_context) + len(ligne) > budget:
+                break
+            recettes_context += ligne
+        return recettes_context
+    
+    def reponse_locale(self, requete: str) -> str:
+        """Réponse sans IA (Gemini indisponible) : mode classique, sinon recettes pertinentes"""
+        reponse = self.traiter_requete(requete)
+        if reponse.startswith("🤖 Je n'ai pas compris"):
+            recettes = self.base_connaissances.recettes_pertinentes(requete, 3)
+            if recettes:
+                reponse = "🔍 Recettes qui pourraient vous intéresser : " + ", ".join(r.nom for r in recettes)
+            else:
+                recette = self.moteur_recommandation.recommander_aleatoire()
+                if recette:
+                    reponse = f"🎲 Je vous recommande : **{recette.nom}** ({recette.type_plat}, {recette.temps_preparation} min)"
+        return f"⚠️ Assistant IA momentanément indisponible, réponse du mode classique :\n\n{reponse}"
+    
+    async def traiter_requete_ia(self, requete: str, repli_local: bool = True) -> str:
+        """Utilise Gemini pour les requêtes complexes
+        
+        Gemini indisponible : réponse du mode classique, ou ServiceIAIndisponible si repli_local est False.
+        Les autres erreurs de l'appel sont propagées.
+        """
+        try:
+            return await self.gemini_service.generer_reponse_culinaire(requete, self._contexte_recettes(requete))
+        except ServiceIAIndisponible:
+            if not repli_local:
+                raise
+            return self.reponse_locale(requete)
+    
+    async def traiter_requete_ia_flux(self, requete: str) -> AsyncIterator[str]:
+        """Comme traiter_requete_ia, mais produit la réponse morceau par morceau"""
+        try:
+            async for morceau in self.gemini_service.generer_reponse_culinaire_flux(requete, self._contexte_recettes(requete)):
+                yield morceau
+        except ServiceIAIndisponible:
+            yield self.reponse_locale(requete)
+    
+    def suggestion_locale(self, ingredients: List[str] = None) -> str:
+        """Suggestion sans IA (Gemini indisponible) : recette du catalogue"""
+        recettes = self.moteur_recommandation.recommander_par_ingredients(ingredients) if ingredients else []
+        recette = recettes[0] if recettes else self.moteur_recommandation.recommander_aleatoire()
+        if recette is None:
+            return "🤖 Impossible de générer une suggestion pour le moment."
+        return f"🍽️ **{recette.nom}** ({recette.temps_preparation} min, {recette.difficulte}) - Une valeur sûre de notre catalogue"
+    
+    async def suggerer_recette_ia(self, ingredients: List[str] = None, preferences: str = "",
+                                  repli_local: bool = True) -> str:
+        """Suggestion de recette par Gemini, ou par le moteur local si Gemini est indisponible
+        
+        Avec repli_local à False, ServiceIAIndisponible est propagée comme les autres erreurs.
+        """
+        try:
+            return await self.gemini_service.suggerer_recette_ia(ingredients=ingredients, preferences=preferences)
+        except ServiceIAIndisponible:
+            if not repli_local:
+                raise
+            return self.suggestion_locale(ingredients)
\ No newline at end of file
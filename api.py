@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import hmac
+import json
+import threading
+from contextlib import asynccontextmanager
+from typing import Annotated, Callable, List, Optional
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from agent import AgentCulinaire
+from models.recette import Recette
+from services.cache_pages import CachePages
+from services.ordonnanceur import API, ARRIERE_PLAN, INTERACTIF, SurchargeIA, priorite
+from services.resilience import ServiceIAIndisponible
+from utils.config import Config
+
+# Agent du processus, créé au démarrage du serveur (le catalogue est partagé avec l'interface s'il y tourne)
+agent_global: Optional[AgentCulinaire] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage et arrêt de chaque worker"""
+    global agent_global
+    print("🚀 Démarrage du serveur FastAPI pour l'Agent AI Culinaire")
+    # Catalogue chargé avant la première requête plutôt que pendant celle-ci
+    agent_global = AgentCulinaire()
+    yield
+    # Les mutations en attente de sauvegarde différée ne doivent pas être perdues à l'arrêt
+    agent_global.base_connaissances.flush()
+    # Canal gRPC lié à la boucle de ce worker, fermé avant elle
+    await agent_global.gemini_service.fermer()
+    print("🛑 Arrêt du serveur FastAPI")
+
+app = FastAPI(
+    title="Agent AI Culinaire API",
+    description="API pour l'agent culinaire avec IA Gemini",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Listes de recettes déjà sérialisées, pour la version courante du catalogue
+cache_pages = CachePages(Config.CACHE_PAGES_TAILLE, int(Config.CACHE_PAGES_MO * 1024 * 1024))
+CHAMPS_RECETTE = ("nom", "ingredients", "instructions", "temps_preparation", "difficulte", "type_plat")
+
+@app.middleware("http")
+async def synchroniser_catalogue(request: Request, call_next):
+    """Recharge le catalogue avant la requête si un autre worker a modifié la base SQLite partagée
+    
+    La version du catalogue change alors : cache des pages et ETag suivent la base.
+    """
+    if agent_global is not None:
+        await asyncio.to_thread(agent_global.base_connaissances.synchroniser)
+    return await call_next(request)
+
+@app.exception_handler(SurchargeIA)
+async def surcharge_ia_handler(request: Request, exc: SurchargeIA):
+    """File d'attente IA pleine : refus immédiat plutôt qu'une latence sans limite"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.reessayer_apres)}
+    )
+
+# En-tête porteur du secret partagé avec l'interface Streamlit (API_JETON_INTERFACE)
+JetonInterface = Annotated[Optional[str], Header(alias="X-Jeton-Interface")]
+
+def est_interface(jeton: Optional[str]) -> bool:
+    """Vrai si l'appel vient de l'interface Streamlit (jeton configuré et identique)"""
+    attendu = Config.API_JETON_INTERFACE
+    return bool(attendu) and jeton is not None and hmac.compare_digest(jeton.encode(), attendu.encode())
+
+def priorite_requete(request: dict, jeton: Optional[str] = None) -> str:
+    """Priorité demandée par un client de l'API : "api" (défaut) ou "arriere_plan"
+    
+    La priorité interactive est réservée à l'interface Streamlit, qui s'authentifie
+    par l'en-tête X-Jeton-Interface ; sans ce jeton, elle est refusée (403).
+    """
+    classe = request.get("priorite", API)
+    if classe == INTERACTIF:
+        if not est_interface(jeton):
+            raise HTTPException(status_code=403, detail="Priorité interactive réservée à l'interface")
+        return classe
+    if classe not in (API, ARRIERE_PLAN):
+        raise HTTPException(status_code=400, detail=f"Priorité inconnue : {classe} (api ou arriere_plan)")
+    return classe
+
+async def executer_branche(coroutine, delai: float, repli: Callable[[], str]):
+    """Exécute une branche de /chat avec son propre délai : (résultat, statut)
+    
+    Gemini indisponible : résultat de repli (mode classique) et statut "degrade".
+    Une requête délestée (SurchargeIA) fait échouer tout l'appel en 503.
+    """
+    try:
+        return await asyncio.wait_for(coroutine, delai), "ok"
+    except asyncio.TimeoutError:
+        return None, "timeout"
+    except SurchargeIA:
+        raise
+    except ServiceIAIndisponible as e:
+        print(f"Debug: Branche /chat en mode dégradé: {e}")
+        return repli(), "degrade"
+    except Exception as e:
+        print(f"Debug: Branche /chat en échec: {e}")
+        return None, f"erreur: {e}"
+
+@app.post("/chat")
+async def chat_endpoint(request: dict, jeton_interface: JetonInterface = None):
+    """Réponse de l'IA et suggestion de recette, calculées en parallèle
+    
+    Le champ optionnel "branches" choisit les calculs voulus ("reponse", "suggestion") ;
+    une branche en échec ou hors délai renvoie None et son statut, sans faire échouer les autres
+    (statuts : "ok", "degrade" si Gemini est indisponible, "timeout", "erreur: ...").
+    Le champ optionnel "priorite" ("api" ou "arriere_plan" ; "interactif" pour l'interface)
+    classe les appels à Gemini.
+    """
+    branches = request.get("branches", ["reponse", "suggestion"])
+    if not isinstance(branches, list) or not all(isinstance(b, str) for b in branches):
+        raise HTTPException(status_code=400, detail="branches doit être une liste de noms (reponse, suggestion)")
+    inconnues = set(branches) - {"reponse", "suggestion"}
+    if inconnues:
+        raise HTTPException(status_code=400, detail=f"Branches inconnues : {', '.join(sorted(inconnues))}")
+    classe = priorite_requete(request, jeton_interface)
+    
+    coroutines = {}
+    message = request.get("message", "")
+    ingredients = request.get("ingredients", [])
+    if "reponse" in branches:
+        coroutines["reponse"] = executer_branche(
+            agent_global.traiter_requete_ia(message, repli_local=False),
+            Config.CHAT_DELAI_REPONSE,
+            lambda: agent_global.reponse_locale(message)
+        )
+    if "suggestion" in branches:
+        coroutines["suggestion"] = executer_branche(
+            agent_global.suggerer_recette_ia(
+                ingredients=ingredients,
+                preferences=request.get("context", ""),
+                repli_local=False
+            ),
+            Config.CHAT_DELAI_SUGGESTION,
+            lambda: agent_global.suggestion_locale(ingredients)
+        )
+    # Les tâches héritent de la priorité active à leur création
+    with priorite(classe):
+        taches = {nom: asyncio.ensure_future(coroutine) for nom, coroutine in coroutines.items()}
+    try:
+        resultats = dict(zip(taches, await asyncio.gather(*taches.values())))
+    except BaseException:
+        # Appel délesté (SurchargeIA) ou abandonné : les autres branches n'ont plus de lecteur
+        for tache in taches.values():
+            tache.cancel()
+        await asyncio.gather(*taches.values(), return_exceptions=True)
+        raise
+    
+    reponse, statut_reponse = resultats.get("reponse", (None, "non demandée"))
+    suggestion, statut_suggestion = resultats.get("suggestion", (None, "non demandée"))
+    return {
+        "response": reponse,
+        "suggestion": suggestion,
+        "statuts": {"reponse": statut_reponse, "suggestion": statut_suggestion}
+    }
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: dict, jeton_interface: JetonInterface = None):
+    """Réponse de l'IA en Server-Sent Events, envoyée morceau par morceau"""
+    classe = priorite_requete(request, jeton_interface)
+    # Le délestage doit se décider avant l'envoi des en-têtes : après, plus de 503 possible
+    agent_global.gemini_service.ordonnanceur.verifier_admission(classe)
+    
+    async def evenements():
+        with priorite(classe):
+            async for morceau in agent_global.traiter_requete_ia_flux(request.get("message", "")):
+                yield f"data: {json.dumps({'texte': morceau}, ensure_ascii=False)}\n\n"
+        yield "event: fin\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        evenements(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metriques")
+async def get_metriques():
+    """Compteurs du service IA : cache, appels, déduplication, micro-lots et files d'attente par priorité"""
+    service = agent_global.gemini_service
+    return {
+        "cache": service.cache.statistiques(),
+        "gemini": service.statistiques(),
+        "disjoncteur": service.disjoncteur.etat,
+        "ordonnanceur": service.ordonnanceur.statistiques(),
+        "pages_recettes": cache_pages.statistiques()
+    }
+
+def serialiser_recettes(offset: int, limit: Optional[int], champs: Optional[List[str]], **filtres) -> tuple:
+    """Corps JSON d'une liste (ou d'une page) de recettes et version du catalogue correspondante"""
+    base = agent_global.base_connaissances
+    # Sous verrou : le corps correspond exactement à la version retournée
+    with base.verrou:
+        version = base.version
+        if limit is None:
+            recettes = base.query(**filtres) if filtres else base.recettes
+            contenu = [recette.to_dict() for recette in recettes]
+        else:
+            total, contenu = base.page_recettes(offset=offset, limit=limit, **filtres)
+    if champs is not None:
+        contenu = [{champ: recette[champ] for champ in champs} for recette in contenu]
+    if limit is not None:
+        contenu = {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "suivant": offset + limit if offset + limit < total else None,
+            "recettes": contenu
+        }
+    # Même encodage que les réponses JSON de FastAPI
+    return version, json.dumps(contenu, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+async def reponse_recettes(request: Request, offset: int, limit: Optional[int], fields: Optional[str], **filtres) -> Response:
+    """Liste de recettes paginée et projetée, servie depuis le cache avec un ETag fort
+    
+    Sans `limit`, toute la liste est renvoyée (tableau JSON) ; avec `limit`, une page
+    avec le total et l'offset de la page suivante. `fields` (ex. "nom,temps_preparation")
+    restreint les champs de chaque recette. Si `If-None-Match` correspond, réponse 304 vide.
+    """
+    if offset < 0 or (limit is not None and not 1 <= limit <= Config.RECETTES_PAGE_MAX):
+        raise HTTPException(status_code=400, detail=f"offset doit être positif et limit entre 1 et {Config.RECETTES_PAGE_MAX}")
+    champs = None
+    if fields:
+        champs = list(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+        inconnus = set(champs) - set(CHAMPS_RECETTE)
+        if inconnus:
+            raise HTTPException(status_code=400, detail=f"Champs inconnus : {', '.join(sorted(inconnus))}")
+    
+    cle = (tuple(sorted(filtres.items())), offset, limit, tuple(champs) if champs else None)
+    entree = cache_pages.get(agent_global.base_connaissances.version, cle)
+    if entree is None:
+        # Sérialisation (coûteuse sur un gros catalogue) hors de la boucle d'événements
+        version, corps = await asyncio.to_thread(serialiser_recettes, offset, limit, champs, **filtres)
+        entree = cache_pages.set(version, cle, corps)
+    corps, etag = entree
+    
+    en_tetes = {"ETag": etag, "Cache-Control": "no-cache"}
+    if CachePages.etag_correspond(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=en_tetes)
+    return Response(content=corps, media_type="application/json", headers=en_tetes)
+
+@app.get("/recettes")
+async def get_recettes(request: Request, offset: int = 0, limit: Optional[int] = None, fields: Optional[str] = None):
+    return await reponse_recettes(request, offset, limit, fields)
+
+@app.post("/recommandations/batch")
+async def recommandations_batch(request: dict):
+    """Meilleures recettes pour chaque garde-manger d'un lot (planification de repas)
+    
+    Corps : {"garde_mangers": [[ingrédient, ...], ...], "k": 10}. Le score d'une recette
+    est la part de ses ingrédients présents dans le garde-manger.
+    """
+    garde_mangers = request.get("garde_mangers")
+    k = request.get("k", 10)
+    if not isinstance(garde_mangers, list) or not all(
+        isinstance(g, list) and all(isinstance(i, str) for i in g) for g in garde_mangers
+    ):
+        raise HTTPException(status_code=400, detail="garde_mangers doit être une liste de listes d'ingrédients")
+    if len(garde_mangers) > Config.RECOMMANDATIONS_LOT_MAX:
+        raise HTTPException(status_code=400, detail=f"Au plus {Config.RECOMMANDATIONS_LOT_MAX} garde-mangers par appel")
+    if not isinstance(k, int) or not 1 <= k <= 100:
+        raise HTTPException(status_code=400, detail="k doit être un entier entre 1 et 100")
+    
+    # Calcul NumPy hors de la boucle d'événements
+    resultats = await asyncio.to_thread(agent_global.moteur_recommandation.recommander_par_lots, garde_mangers, k)
+    return {
+        "resultats": [
+            [{"nom": recette.nom, "score": round(score, 4)} for recette, score in recommandations]
+            for recommandations in resultats
+        ]
+    }
+
+@app.get("/recettes/type/{type_plat}")
+async def get_recettes_by_type(request: Request, type_plat: str, offset: int = 0, limit: Optional[int] = None,
+                               fields: Optional[str] = None):
+    return await reponse_recettes(request, offset, limit, fields, type_plat=type_plat)
+
+# Déclarée après les routes fixes /recettes/type/... : "/recettes/type/similaires" est une liste par type
+@app.get("/recettes/{nom}/similaires")
+async def get_recettes_similaires(nom: str, k: int = 5):
+    similaires = agent_global.base_connaissances.recettes_similaires(nom, k)
+    if similaires is None:
+        raise HTTPException(status_code=404, detail=f"Recette introuvable : {nom}")
+    return [{"recette": recette.to_dict(), "score": round(score, 4)} for recette, score in similaires]
+
+def valider_lot_ndjson(lot: List[tuple]) -> tuple:
+    """Valide un lot de lignes NDJSON : (recettes valides, erreurs par ligne)"""
+    recettes, erreurs = [], []
+    for numero, ligne in lot:
+        try:
+            recettes.append(Recette.from_dict(json.loads(ligne)))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            erreurs.append({"ligne": numero, "erreur": f"{type(e).__name__}: {e}"})
+    return recettes, erreurs
+
+@app.post("/recettes/bulk")
+async def import_recettes_bulk(request: Request, tout_ou_rien: bool = False):
+    """Import NDJSON en flux : une recette par ligne, un seul enregistrement à la fin"""
+    recettes, erreurs, lot = [], [], []
+    numero, reste = 0, b""
+    
+    async def traiter_lot():
+        # Validation hors de la boucle d'événements
+        valides, invalides = await asyncio.to_thread(valider_lot_ndjson, lot.copy())
+        recettes.extend(valides)
+        erreurs.extend(invalides)
+        lot.clear()
+    
+    async for morceau in request.stream():
+        lignes = (reste + morceau).split(b"\n")
+        reste = lignes.pop()
+        for ligne in lignes:
+            numero += 1
+            if ligne.strip():
+                lot.append((numero, ligne))
+        if len(lot) >= Config.BULK_TAILLE_LOT:
+            await traiter_lot()
+    if reste.strip():
+        numero += 1
+        lot.append((numero, reste))
+    if lot:
+        await traiter_lot()
+    
+    if erreurs and tout_ou_rien:
+        return JSONResponse(status_code=422, content={"importees": 0, "erreurs": erreurs})
+    await asyncio.to_thread(agent_global.base_connaissances.ajouter_recettes, recettes)
+    return {"importees": len(recettes), "erreurs": erreurs}
+
+@app.get("/recettes/export")
+async def export_recettes():
+    """Export NDJSON en flux (une recette par ligne)"""
+    recettes = agent_global.base_connaissances.recettes
+    
+    def generer():
+        for debut in range(0, len(recettes), Config.BULK_TAILLE_LOT):
+            yield "".join(
+                json.dumps(r.to_dict(), ensure_ascii=False) + "\n"
+                for r in recettes[debut:debut + Config.BULK_TAILLE_LOT]
+            )
+    
+    return StreamingResponse(generer(), media_type="application/x-ndjson")
+
+# Serveur lancé dans un autre processus (l'interface Streamlit), au plus une fois
+_serveur_integre: Optional[threading.Thread] = None
+_verrou_serveur_integre = threading.Lock()
+
+def demarrer_en_arriere_plan(host: str = None, port: int = None) -> threading.Thread:
+    """Lance l'API (un seul worker) sur un thread du processus courant, une seule fois par processus
+    
+    Pratique en développement ; en production, lancer `python api.py` à part.
+    """
+    global _serveur_integre
+    with _verrou_serveur_integre:
+        if _serveur_integre is None:
+            _serveur_integre = threading.Thread(
+                target=uvicorn.run,
+                args=(app,),
+                kwargs={"host": host or Config.API_HOST, "port": port or Config.API_PORT, "log_level": "info"},
+                daemon=True
+            )
+            _serveur_integre.start()
+    return _serveur_integre
+
+def main():
+    """Point d'entrée : python api.py [--host HOST] [--port PORT] [--workers N]"""
+    parser = argparse.ArgumentParser(description="API REST de l'Agent AI Culinaire")
+    parser.add_argument("--host", default=Config.API_HOST, help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=Config.API_PORT, help="Port d'écoute")
+    parser.add_argument("--workers", type=int, default=Config.API_WORKERS, help="Nombre de processus")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers doit être au moins 1")
+    if args.workers > 1 and Config.STOCKAGE_BACKEND.lower() != "sqlite":
+        # Chaque worker réécrirait recettes.json (et son journal) depuis sa propre copie du catalogue ;
+        # avec SQLite, chaque écriture est visible des autres workers (voir synchroniser_catalogue)
+        parser.error("plusieurs workers exigent STOCKAGE_BACKEND=sqlite : "
+                     "le backend json n'accepte qu'un seul processus écrivain")
+    if Config.CHARGEMENT_PARESSEUX and Config.STOCKAGE_BACKEND.lower() == "json":
+        # Snapshot compilé une seule fois avant le démarrage des workers, qui le projettent ensuite en lecture
+        from services.snapshot_binaire import ouvrir_snapshot
+        ouvrir_snapshot().fermer()
+    # Chemin d'import plutôt que l'objet : chaque worker importe l'application dans son propre processus.
+    # À l'arrêt, les requêtes en cours ont le temps d'un appel Gemini pour se terminer.
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="info",
+                timeout_graceful_shutdown=int(Config.GEMINI_TIMEOUT))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,16 @@
 import streamlit as st
-import asyncio
+import atexit
 import json
 import random
 from datetime import datetime
-from typing import List, Dict, Optional
-import pandas as pd
-import aiohttp
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import google.generativeai as genai
-import threading
-import uvicorn
-from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Tuple
 from agent import AgentCulinaire
 from models.recette import Recette
 from models.ingredient import Ingredient
+from services.ordonnanceur import INTERACTIF, SurchargeIA, priorite
+from services.resilience import ServiceIAIndisponible
+from utils.boucle_async import BoucleArrierePlan
+from utils.config import Config
 
 # Configuration de la page Streamlit
 st.set_page_config(
@@ -24,60 +20,116 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Configuration FastAPI
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    print("🚀 Démarrage du serveur FastAPI pour l'Agent AI Culinaire")
-    yield
-    print("🛑 Arrêt du serveur FastAPI")
+@st.cache_resource
+def agent_partage() -> AgentCulinaire:
+    """Agent commun à toutes les sessions : catalogue, index et clients IA créés une fois par processus"""
+    agent = AgentCulinaire()
+    # Client gRPC de la boucle durable, fermé comme la session HTTP de client_api_partage
+    atexit.register(lambda: BoucleArrierePlan.partagee().executer(agent.gemini_service.fermer()))
+    return agent
 
-app = FastAPI(
-    title="Agent AI Culinaire API",
-    description="API pour l'agent culinaire avec IA Gemini",
-    version="1.0.0",
-    lifespan=lifespan
-)
+@st.cache_resource
+def client_api_partage():
+    """Client de l'API séparée (api.py) si API_URL est définie, sinon None"""
+    if not Config.API_URL:
+        return None
+    from services.client_api import ClientAPI
+    client = ClientAPI(Config.API_URL, Config.API_JETON_INTERFACE)
+    # Session HTTP fermée sur la boucle durable, encore active pendant atexit (thread démon)
+    atexit.register(lambda: BoucleArrierePlan.partagee().executer(client.fermer()))
+    return client
 
-# Instance globale de l'agent
-agent_global = AgentCulinaire()
+# Initialisation de l'agent
+if 'agent' not in st.session_state:
+    st.session_state.agent = agent_partage()
+# Base SQLite partagée avec l'API : le catalogue est rechargé si elle l'a modifié
+st.session_state.agent.base_connaissances.synchroniser()
 
-@app.post("/chat")
-async def chat_endpoint(request: dict):
-    try:
-        response_ia = await agent_global.traiter_requete_ia(request.get("message", ""))
-        suggestion = await agent_global.gemini_service.suggerer_recette_ia(
-            ingredients=request.get("ingredients", []),
-            preferences=request.get("context", "")
-        )
-        return {"response": response_ia, "suggestion": suggestion}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# Avec API_URL, les appels à l'IA passent par l'API séparée (api.py) au lieu de l'agent embarqué
+if 'client_api' not in st.session_state:
+    st.session_state.client_api = client_api_partage()
 
-@app.get("/recettes")
-async def get_recettes():
-    return [recette.to_dict() for recette in agent_global.base_connaissances.recettes]
+# API servie depuis le processus Streamlit : option de développement (en production : python api.py)
+if Config.API_DANS_UI:
+    from api import demarrer_en_arriere_plan
+    demarrer_en_arriere_plan()
 
-@app.get("/recettes/type/{type_plat}")
-async def get_recettes_by_type(type_plat: str):
-    recettes = agent_global.base_connaissances.rechercher_par_type(type_plat)
-    return [recette.to_dict() for recette in recettes]
+if 'chat_history' not in st.session_state:
+    st.session_state.chat_history = []
 
-# Fonction pour démarrer FastAPI en arrière-plan
-def start_fastapi():
-    uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
+# Résultats mémoïsés par version du catalogue : une mutation incrémente la version et change
+# la clé, les entrées périmées ne sont plus lues et sortent du cache (max_entries)
+@st.cache_resource(max_entries=64, show_spinner=False)
+def rechercher_recettes(version: int, type_plat: Optional[str], difficulte: Optional[str],
+                        temps_max: int, ingredient: Optional[str]) -> List[Recette]:
+    return agent_partage().base_connaissances.query(
+        type_plat=type_plat, difficulte=difficulte, temps_max=temps_max, ingredient=ingredient
+    )
 
-# Démarrage automatique de FastAPI en arrière-plan
-if 'fastapi_started' not in st.session_state:
-    st.session_state.fastapi_started = True
-    fastapi_thread = threading.Thread(target=start_fastapi, daemon=True)
-    fastapi_thread.start()
+@st.cache_resource(max_entries=256, show_spinner=False)
+def recettes_similaires(version: int, nom: str) -> List[Tuple[Recette, float]]:
+    return agent_partage().base_connaissances.recettes_similaires(nom, 5) or []
 
-# Initialisation de l'agent
-if 'agent' not in st.session_state:
-    st.session_state.agent = AgentCulinaire()
+@st.cache_resource(max_entries=4, show_spinner=False)
+def noms_recettes(version: int) -> List[str]:
+    return [r.nom for r in agent_partage().base_connaissances.recettes]
 
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+@st.cache_resource(max_entries=4, show_spinner=False)
+def tableaux_statistiques(version: int) -> dict:
+    """Statistiques du catalogue et DataFrames de la page Statistiques"""
+    # pandas n'est chargé que pour cette page
+    import pandas as pd
+    base = agent_partage().base_connaissances
+    stats = base.statistiques()
+    return {
+        "stats": stats,
+        "types": pd.DataFrame(list(stats["par_type"].items()), columns=['Type', 'Nombre']).set_index('Type'),
+        "difficultes": pd.DataFrame(list(stats["par_difficulte"].items()), columns=['Difficulté', 'Nombre']).set_index('Difficulté'),
+        "detail": pd.DataFrame([{
+            'Nom': r.nom,
+            'Type': r.type_plat,
+            'Difficulté': r.difficulte,
+            'Temps (min)': r.temps_preparation,
+            'Nb ingrédients': len(r.noms_ingredients())
+        } for r in base.recettes])
+    }
+
+def repondre_ia(zone, libelle: str, requete: str):
+    """Affiche la réponse de l'IA dans `zone` au fil de la génération puis l'ajoute à l'historique"""
+    with zone:
+        st.markdown(f"**Vous:** {libelle}")
+        st.markdown("**🤖 Assistant:**")
+        assistant = st.session_state.client_api or st.session_state.agent
+        try:
+            # Les appels de l'interface passent avant ceux de l'API dans les files de l'ordonnanceur
+            with priorite(INTERACTIF):
+                response = st.write_stream(BoucleArrierePlan.partagee().iterer(assistant.traiter_requete_ia_flux(requete)))
+            st.session_state.chat_history.append((libelle, f"🤖 IA: {response}"))
+        except ServiceIAIndisponible:
+            # API injoignable : même repli que l'agent embarqué quand Gemini ne répond pas
+            response = st.session_state.agent.reponse_locale(requete)
+            st.markdown(response)
+            st.session_state.chat_history.append((libelle, response))
+        except SurchargeIA as e:
+            response = f"⏳ {e}"
+            st.session_state.chat_history.append((libelle, response))
+        except Exception as e:
+            response = f"❌ Erreur IA: {str(e)}"
+            st.session_state.chat_history.append((libelle, response))
+
+def metriques_ia() -> Optional[dict]:
+    """Compteurs du service IA qui répond à l'interface (API séparée ou agent embarqué)"""
+    if st.session_state.client_api is not None:
+        try:
+            return BoucleArrierePlan.partagee().executer(st.session_state.client_api.metriques())
+        except ServiceIAIndisponible:
+            return None
+    service = st.session_state.agent.gemini_service
+    return {
+        "cache": service.cache.statistiques(),
+        "gemini": service.statistiques(),
+        "ordonnanceur": service.ordonnanceur.statistiques()
+    }
 
 # Interface principale
 st.title("🤖 Agent AI Culinaire")
@@ -109,12 +161,7 @@ if page == "💬 Chatbot":
     with col1:
         if st.button("📤 Envoyer (IA)"):
             if user_input:
-                try:
-                    response = asyncio.run(st.session_state.agent.traiter_requete_ia(user_input))
-                    st.session_state.chat_history.append((user_input, f"🤖 IA: {response}"))
-                except Exception as e:
-                    response = f"❌ Erreur IA: {str(e)}"
-                    st.session_state.chat_history.append((user_input, response))
+                repondre_ia(chat_container, user_input, user_input)
                 st.rerun()
     
     with col2:
@@ -136,42 +183,22 @@ if page == "💬 Chatbot":
     
     with col1:
         if st.button("🎲 Surprise IA"):
-            try:
-                response = asyncio.run(st.session_state.agent.traiter_requete_ia("Suggère-moi une recette originale et créative"))
-                st.session_state.chat_history.append(("Surprise IA", f"🤖 IA: {response}"))
-            except Exception as e:
-                response = f"❌ Erreur IA: {str(e)}"
-                st.session_state.chat_history.append(("Surprise IA", response))
+            repondre_ia(chat_container, "Surprise IA", "Suggère-moi une recette originale et créative")
             st.rerun()
     
     with col2:
         if st.button("⚡ Rapide IA"):
-            try:
-                response = asyncio.run(st.session_state.agent.traiter_requete_ia("Donne-moi une recette rapide et facile à faire"))
-                st.session_state.chat_history.append(("Recette rapide IA", f"🤖 IA: {response}"))
-            except Exception as e:
-                response = f"❌ Erreur IA: {str(e)}"
-                st.session_state.chat_history.append(("Recette rapide IA", response))
+            repondre_ia(chat_container, "Recette rapide IA", "Donne-moi une recette rapide et facile à faire")
             st.rerun()
     
     with col3:
         if st.button("🍰 Dessert IA"):
-            try:
-                response = asyncio.run(st.session_state.agent.traiter_requete_ia("Propose-moi un dessert original et délicieux"))
-                st.session_state.chat_history.append(("Dessert IA", f"🤖 IA: {response}"))
-            except Exception as e:
-                response = f"❌ Erreur IA: {str(e)}"
-                st.session_state.chat_history.append(("Dessert IA", response))
+            repondre_ia(chat_container, "Dessert IA", "Propose-moi un dessert original et délicieux")
             st.rerun()
     
     with col4:
         if st.button("🥘 Conseil Chef"):
-            try:
-                response = asyncio.run(st.session_state.agent.traiter_requete_ia("Donne-moi un conseil de chef professionnel pour améliorer ma cuisine"))
-                st.session_state.chat_history.append(("Conseil Chef", f"🤖 IA: {response}"))
-            except Exception as e:
-                response = f"❌ Erreur IA: {str(e)}"
-                st.session_state.chat_history.append(("Conseil Chef", response))
+            repondre_ia(chat_container, "Conseil Chef", "Donne-moi un conseil de chef professionnel pour améliorer ma cuisine")
             st.rerun()
 
 # Page Recherche
@@ -179,9 +206,10 @@ elif page == "🔍 Recherche":
     st.header("🔍 Recherche de Recettes")
     
     # Debug: Display total recipes and their names
-    recettes = st.session_state.agent.base_connaissances.recettes
-    st.write(f"**Debug**: {len(recettes)} recettes chargées depuis la base de données")
-    st.write("**Noms des recettes**: " + ", ".join([r.nom for r in recettes]))
+    version = st.session_state.agent.base_connaissances.version
+    noms = noms_recettes(version)
+    st.write(f"**Debug**: {len(noms)} recettes chargées depuis la base de données")
+    st.write("**Noms des recettes**: " + ", ".join(noms))
     
     col1, col2, col3 = st.columns(3)
     
@@ -204,24 +232,17 @@ elif page == "🔍 Recherche":
     
     ingredient_recherche = st.text_input("🔍 Rechercher par ingrédient")
     
-    recettes_filtrees = st.session_state.agent.base_connaissances.recettes
-    
-    if type_filtre != "Tous":
-        recettes_filtrees = [r for r in recettes_filtrees if r.type_plat == type_filtre]
-    
-    if difficulte_filtre != "Toutes":
-        recettes_filtrees = [r for r in recettes_filtrees if r.difficulte == difficulte_filtre]
-    
-    recettes_filtrees = [r for r in recettes_filtrees if r.temps_preparation <= temps_max]
-    
-    if ingredient_recherche:
-        recettes_filtrees = [r for r in recettes_filtrees 
-                           if any(ingredient_recherche.lower() in ing.nom.lower() 
-                                 for ing in r.ingredients)]
+    recettes_filtrees = rechercher_recettes(
+        version,
+        type_filtre if type_filtre != "Tous" else None,
+        difficulte_filtre if difficulte_filtre != "Toutes" else None,
+        temps_max,
+        ingredient_recherche or None
+    )
     
     st.markdown(f"### 📋 Résultats ({len(recettes_filtrees)} recettes)")
     
-    for recette in recettes_filtrees:
+    for position, recette in enumerate(recettes_filtrees):
         with st.expander(f"🍽️ {recette.nom} ({recette.temps_preparation} min)"):
             col1, col2 = st.columns([2, 1])
             
@@ -238,6 +259,12 @@ elif page == "🔍 Recherche":
                 st.markdown("**Instructions:**")
                 for i, instruction in enumerate(recette.instructions, 1):
                     st.markdown(f"{i}. {instruction}")
+            
+            # Calculées à la demande : chaque recherche est un produit matrice-vecteur sur tout le catalogue
+            if st.checkbox("🔗 Recettes similaires", key=f"similaires_{position}_{recette.nom}"):
+                similaires = recettes_similaires(version, recette.nom)
+                for similaire, score in similaires:
+                    st.markdown(f"• {similaire.nom} ({similaire.type_plat}, {similaire.temps_preparation} min) — {score:.0%}")
 
 # Page Gestion des recettes
 elif page == "📚 Gestion des recettes":
@@ -278,7 +305,6 @@ elif page == "📚 Gestion des recettes":
                 if nom and ingredients and instructions:
                     nouvelle_recette = Recette(nom, ingredients, instructions, temps, difficulte, type_plat)
                     st.session_state.agent.base_connaissances.ajouter_recette(nouvelle_recette)
-                    st.session_state.agent.base_connaissances.sauvegarder()
                     st.success(f"✅ Recette '{nom}' ajoutée avec succès!")
                 else:
                     st.error("❌ Veuillez remplir tous les champs obligatoires")
@@ -286,12 +312,11 @@ elif page == "📚 Gestion des recettes":
     with tab2:
         st.subheader("📝 Modifier une recette")
         
-        recettes_noms = [r.nom for r in st.session_state.agent.base_connaissances.recettes]
+        recettes_noms = noms_recettes(st.session_state.agent.base_connaissances.version)
         if recettes_noms:
             recette_selectionnee = st.selectbox("Choisir une recette", recettes_noms)
             
-            recette = next(r for r in st.session_state.agent.base_connaissances.recettes 
-                          if r.nom == recette_selectionnee)
+            recette = st.session_state.agent.base_connaissances.recette_par_nom(recette_selectionnee)
             
             st.markdown("**Détails actuels:**")
             st.json(recette.to_dict())
@@ -303,13 +328,12 @@ elif page == "📚 Gestion des recettes":
     with tab3:
         st.subheader("🗑️ Supprimer une recette")
         
-        recettes_noms = [r.nom for r in st.session_state.agent.base_connaissances.recettes]
+        recettes_noms = noms_recettes(st.session_state.agent.base_connaissances.version)
         if recettes_noms:
             recette_a_supprimer = st.selectbox("Choisir une recette à supprimer", recettes_noms)
             
             if st.button("🗑️ Supprimer", type="secondary"):
                 st.session_state.agent.base_connaissances.supprimer_recette(recette_a_supprimer)
-                st.session_state.agent.base_connaissances.sauvegarder()
                 st.success(f"✅ Recette '{recette_a_supprimer}' supprimée!")
                 st.rerun()
         else:
@@ -319,61 +343,53 @@ elif page == "📚 Gestion des recettes":
 elif page == "📊 Statistiques":
     st.header("📊 Statistiques des Recettes")
     
-    recettes = st.session_state.agent.base_connaissances.recettes
-    
-    if recettes:
+    if st.session_state.agent.base_connaissances.recettes:
+        # Comptages calculés sur la vue colonnaire, DataFrames gardés jusqu'à la prochaine mutation
+        tableaux = tableaux_statistiques(st.session_state.agent.base_connaissances.version)
+        stats = tableaux["stats"]
+        type_counts = stats["par_type"]
+        diff_counts = stats["par_difficulte"]
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total recettes", len(recettes))
+            st.metric("Total recettes", stats["total"])
         
         with col2:
-            temps_moyen = sum(r.temps_preparation for r in recettes) / len(recettes)
-            st.metric("Temps moyen", f"{temps_moyen:.0f} min")
+            st.metric("Temps moyen", f"{stats['temps_moyen']:.0f} min")
         
         with col3:
-            types = [r.type_plat for r in recettes]
-            type_populaire = max(set(types), key=types.count)
+            type_populaire = max(type_counts, key=type_counts.get)
             st.metric("Type populaire", type_populaire)
         
         with col4:
-            difficultes = [r.difficulte for r in recettes]
-            diff_populaire = max(set(difficultes), key=difficultes.count)
+            diff_populaire = max(diff_counts, key=diff_counts.get)
             st.metric("Difficulté populaire", diff_populaire)
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📈 Répartition par type")
-            type_counts = {}
-            for r in recettes:
-                type_counts[r.type_plat] = type_counts.get(r.type_plat, 0) + 1
-            
-            df_types = pd.DataFrame(list(type_counts.items()), columns=['Type', 'Nombre'])
-            st.bar_chart(df_types.set_index('Type'))
+            st.bar_chart(tableaux["types"])
         
         with col2:
             st.subheader("📈 Répartition par difficulté")
-            diff_counts = {}
-            for r in recettes:
-                diff_counts[r.difficulte] = diff_counts.get(r.difficulte, 0) + 1
-            
-            df_diff = pd.DataFrame(list(diff_counts.items()), columns=['Difficulté', 'Nombre'])
-            st.bar_chart(df_diff.set_index('Difficulté'))
+            st.bar_chart(tableaux["difficultes"])
         
-        st.subheader("📋 Tableau détaillé")
-        data = []
-        for r in recettes:
-            data.append({
-                'Nom': r.nom,
-                'Type': r.type_plat,
-                'Difficulté': r.difficulte,
-                'Temps (min)': r.temps_preparation,
-                'Nb ingrédients': len(r.ingredients)
-            })
+        metriques = metriques_ia()
+        if metriques is not None:
+            cache_ia, appels_ia, files_ia = metriques["cache"], metriques["gemini"], metriques["ordonnanceur"]
+            st.caption(f"🧠 Cache IA : {cache_ia['entrees']} réponses, {cache_ia['hits']} hits / {cache_ia['misses']} misses "
+                       f"({cache_ia['taux_hits']:.0%}) · API : {appels_ia['appels']} appels Gemini, "
+                       f"{appels_ia['jonctions']} requêtes identiques regroupées")
+            st.caption("⏱️ Files IA : " + " · ".join(
+                f"{classe} {file['en_attente']}/{file['file_max']} en attente, "
+                f"{file['attente_moyenne_ms']:.0f} ms d'attente moyenne, {file['rejets']} rejets"
+                for classe, file in files_ia["classes"].items()
+            ))
         
-        df = pd.DataFrame(data)
-        st.dataframe(df, use_container_width=True)
+        st.subheader("📋 Tableau détaillé")
+        st.dataframe(tableaux["detail"], use_container_width=True)
     
     else:
         st.info("Aucune recette disponible pour les statistiques")
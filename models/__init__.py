@@ -5,6 +5,11 @@ Contient :
 - ingredient.py : Modèle d'ingrédient
 - recette.py : Modèle de recette
 - base_connaissances.py : Base de données des recettes
+- indexation.py : Index de recherche sur le catalogue
+- catalogue_colonnaire.py : Représentation colonnaire compacte du catalogue
+- index_pertinence.py : Index BM25 pour classer les recettes selon une requête
+- index_similarite.py : Matrice TF-IDF pour trouver les recettes similaires
+- index_garde_manger.py : Matrice recettes × ingrédients pour les recommandations par garde-manger
 """
 
 from .ingredient import Ingredient
@@ -1,31 +1,276 @@
-from typing import List
+import heapq
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from models.recette import Recette
-from services.data_manager import DataManager
+from models.catalogue import CatalogueDiffere, CatalogueMemoire
+from models.indexation import IndexCategoriel, IndexIngredients, IndexTemps
+from services.stockage import SourceRecettes, creer_stockage
+from services.sauvegarde_differee import PlanificateurSauvegarde
+from utils.config import Config
 from models.ingredient import Ingredient
 
 class BaseConnaissances:
     """Base de connaissances des recettes culinaires"""
     
+    _instance_partagee: Optional["BaseConnaissances"] = None
+    _verrou_instance = threading.Lock()
+    
+    @classmethod
+    def partagee(cls) -> "BaseConnaissances":
+        """Catalogue unique du processus, partagé par tous les agents et threads"""
+        if cls._instance_partagee is None:
+            with cls._verrou_instance:
+                if cls._instance_partagee is None:
+                    cls._instance_partagee = cls()
+        return cls._instance_partagee
+    
     def __init__(self):
         """Initialise avec les recettes par défaut ou depuis JSON"""
-        self.data_manager = DataManager()
-        self.recettes = self._charger_recettes()
-        print(f"Debug: {len(self.recettes)} recettes chargées dans BaseConnaissances")
+        # Protège le catalogue et ses index (lectures et mutations concurrentes)
+        self.verrou = threading.RLock()
+        # Incrémenté à chaque mutation : permet d'invalider les caches dérivés
+        self.version = 0
+        self.stockage = creer_stockage()
+        self._sauvegarde_differee = None
+        if Config.SAUVEGARDE_DIFFEREE and not self.stockage.incremental:
+            self._sauvegarde_differee = PlanificateurSauvegarde(
+                self._ecrire_catalogue, Config.SAUVEGARDE_DELAI, Config.SAUVEGARDE_DELAI_MAX
+            )
+        # En mémoire, ou décodées à la demande depuis le stockage (voir _charger_source)
+        self._recettes: Union[CatalogueMemoire, CatalogueDiffere] = CatalogueMemoire()
+        self._liste_recettes: Optional[Sequence[Recette]] = None
+        self._prochain_id = 0
+        self.index_ingredients = IndexIngredients()
+        self.index_types = IndexCategoriel("type_plat")
+        self.index_difficultes = IndexCategoriel("difficulte")
+        self.index_temps = IndexTemps()
+        self._index = [self.index_ingredients, self.index_types, self.index_difficultes, self.index_temps]
+        self._colonnes = None
+        self._pertinence = None
+        self._similarite = None
+        self._garde_manger = None
+        # Compteur de modifications du stockage correspondant au catalogue en mémoire
+        self._generation = self.stockage.generation()
+        self._charger_catalogue()
+        print(f"Debug: {len(self._recettes)} recettes chargées dans BaseConnaissances")
+    
+    def _charger_catalogue(self):
+        """(Re)charge le catalogue depuis le stockage ; les index dérivés seront reconstruits à la demande"""
+        self._index = self._index[:4]
+        self._colonnes = self._pertinence = self._similarite = self._garde_manger = None
+        source = self.stockage.source_differee()
+        if source is not None and len(source) >= 8:
+            self._charger_source(source)
+        else:
+            self._remplacer_recettes(self._charger_recettes())
+    
+    def synchroniser(self) -> bool:
+        """Recharge le catalogue si un autre processus a modifié le stockage partagé
+        
+        Les workers de l'API partagent la base SQLite mais gardent chacun leurs index en
+        mémoire : le compteur de modifications du stockage dit si ceux-ci sont périmés.
+        Le rechargement incrémente la version (caches dérivés invalidés). Retourne True
+        si le catalogue a été rechargé.
+        """
+        if self.stockage.generation() in (None, self._generation):
+            return False
+        with self.verrou:
+            generation = self.stockage.generation()
+            if generation == self._generation:
+                return False
+            print(f"Debug: Stockage modifié par un autre processus (génération {generation}), rechargement du catalogue")
+            self._charger_catalogue()
+            self._generation = generation
+        return True
+    
+    @property
+    def recettes(self) -> Sequence[Recette]:
+        """Recettes du catalogue, dans l'ordre d'insertion (séquence à ne pas modifier)"""
+        with self.verrou:
+            if self._liste_recettes is None:
+                self._liste_recettes = self._recettes.sequence()
+            return self._liste_recettes
+    
+    def _indexer(self, recette: Recette, indexer: bool = True) -> int:
+        """Enregistre une recette en mémoire et dans les index"""
+        recette_id = self._prochain_id
+        self._prochain_id += 1
+        self._recettes[recette_id] = recette
+        self._liste_recettes = None
+        if indexer:
+            for n, index in enumerate(self._index):
+                try:
+                    index.ajouter(recette_id, recette)
+                except Exception:
+                    # Pas de recette à moitié indexée : les index déjà renseignés sont défaits
+                    for precedent in self._index[:n]:
+                        precedent.retirer(recette_id, recette)
+                    del self._recettes[recette_id]
+                    raise
+        return recette_id
+    
+    def _desindexer(self, recette_id: int):
+        """Retire une recette de la mémoire et des index"""
+        recette = self._recettes.pop(recette_id)
+        for index in self._index:
+            index.retirer(recette_id, recette)
+        self._liste_recettes = None
+    
+    def _remplacer_recettes(self, recettes: List[Recette]):
+        """Remplace tout le catalogue et reconstruit les index"""
+        self._recettes = CatalogueMemoire()
+        for recette in recettes:
+            self._indexer(recette, indexer=False)
+        for index in self._index:
+            index.reconstruire(self._recettes)
+        self._liste_recettes = None
+        self.version += 1
+    
+    def _charger_source(self, source: SourceRecettes):
+        """Catalogue servi par le stockage : seuls les champs filtrables sont chargés
+        
+        Les index de filtres sont remplis à partir des colonnes de la source ; les objets
+        Recette ne sont décodés qu'à la lecture (affichage, sérialisation).
+        """
+        filtres = source.filtres()
+        self._recettes = CatalogueDiffere(source, filtres["temps"])
+        self._prochain_id = len(source)
+        self.index_types.charger(filtres["type_plat"])
+        self.index_difficultes.charger(filtres["difficulte"])
+        self.index_ingredients.charger(filtres["ingredients"])
+        self.index_temps.charger(filtres["temps"])
+        self._liste_recettes = None
+        self.version += 1
+        print(f"Debug: {len(source)} recettes indexées depuis le stockage, décodées à la demande")
+    
+    def colonnes(self) -> "CatalogueColonnaire":
+        """Vue colonnaire du catalogue, construite au premier appel puis tenue à jour"""
+        with self.verrou:
+            if self._colonnes is None:
+                from models.catalogue_colonnaire import CatalogueColonnaire
+                self._colonnes = CatalogueColonnaire()
+                self._colonnes.reconstruire(self._recettes)
+                self._index.append(self._colonnes)
+            return self._colonnes
+    
+    def pertinence(self) -> "IndexBM25":
+        """Index BM25 du catalogue, construit au premier appel puis tenu à jour"""
+        with self.verrou:
+            if self._pertinence is None:
+                from models.index_pertinence import IndexBM25
+                self._pertinence = IndexBM25()
+                self._pertinence.reconstruire(self._recettes)
+                self._index.append(self._pertinence)
+            return self._pertinence
+    
+    def recettes_pertinentes(self, requete: str, k: int = 10) -> List[Recette]:
+        """Les k recettes les plus pertinentes pour la requête (score BM25), par ordre décroissant"""
+        with self.verrou:
+            return self._recettes.plusieurs(recette_id for recette_id, _ in self.pertinence().rechercher(requete, k))
+    
+    def similarite(self) -> "IndexSimilarite":
+        """Index de similarité (matrice TF-IDF), construit au premier appel puis tenu à jour"""
+        with self.verrou:
+            if self._similarite is None:
+                from models.index_similarite import IndexSimilarite
+                self._similarite = IndexSimilarite(Config.SIMILARITE_DIMENSION)
+                self._similarite.reconstruire(self._recettes)
+                self._index.append(self._similarite)
+            elif self._similarite.a_reconstruire():
+                print(f"Debug: Index de similarité reconstruit ({len(self._recettes)} recettes)")
+                self._similarite.reconstruire(self._recettes)
+            return self._similarite
+    
+    def recettes_similaires(self, nom: str, k: int = 5) -> Optional[List[Tuple[Recette, float]]]:
+        """Les k recettes les plus proches de la recette `nom` (None si elle n'existe pas)"""
+        with self.verrou:
+            ids = self._recettes.ids_nom(nom)
+            if not ids:
+                return None
+            resultats = self.similarite().similaires(ids[0], k)
+            recettes = dict(self._recettes.paires(i for i, _ in resultats))
+            return [(recettes[i], score) for i, score in resultats if i in recettes]
+    
+    def garde_manger(self) -> "IndexGardeManger":
+        """Matrice recettes × ingrédients, construite au premier appel puis tenue à jour"""
+        with self.verrou:
+            if self._garde_manger is None:
+                from models.index_garde_manger import IndexGardeManger
+                self._garde_manger = IndexGardeManger()
+                self._garde_manger.reconstruire(self._recettes)
+                self._index.append(self._garde_manger)
+            return self._garde_manger
+    
+    def recommander_garde_mangers(self, garde_mangers: List[List[str]],
+                                  k: Optional[int] = 10) -> List[List[Tuple[Recette, float]]]:
+        """Pour chaque garde-manger (ingrédients disponibles), les k recettes dont il couvre la plus grande part
+        
+        Un ingrédient disponible correspond à tous les ingrédients du catalogue qui le
+        contiennent ("tomate" -> "tomates cerises") ; k=None renvoie toutes les recettes
+        utilisant au moins un ingrédient disponible.
+        """
+        with self.verrou:
+            index = self.garde_manger()
+            # Les mêmes ingrédients reviennent d'un garde-manger à l'autre : correspondances calculées une fois
+            correspondances: Dict[str, set] = {}
+            lot = []
+            for ingredients in garde_mangers:
+                colonnes = set()
+                for ingredient in ingredients:
+                    fragment = ingredient.lower()
+                    if fragment not in correspondances:
+                        correspondances[fragment] = index.colonnes(self.index_ingredients.noms_correspondants(fragment))
+                    colonnes |= correspondances[fragment]
+                lot.append(colonnes)
+            scores = index.scorer(lot, k)
+            recettes = dict(self._recettes.paires({i for resultats in scores for i, _ in resultats}))
+            return [[(recettes[i], score) for i, score in resultats if i in recettes] for resultats in scores]
+    
+    def statistiques(self) -> dict:
+        """Statistiques globales du catalogue (voir CatalogueColonnaire.statistiques)"""
+        with self.verrou:
+            return self.colonnes().statistiques()
+    
+    def recettes_par_ids(self, ids, limit: Optional[int] = None) -> List[Recette]:
+        """Recettes correspondant aux identifiants, dans l'ordre du catalogue"""
+        with self.verrou:
+            ids_tries = heapq.nsmallest(limit, ids) if limit is not None else sorted(ids)
+            return self._recettes.plusieurs(ids_tries)
+    
+    def recette_par_nom(self, nom: str) -> Optional[Recette]:
+        """Première recette portant exactement ce nom (None si elle n'existe pas)"""
+        with self.verrou:
+            ids = self._recettes.ids_nom(nom)
+            return self._recettes[ids[0]] if ids else None
     
     def _charger_recettes(self) -> List[Recette]:
-        """Charge les recettes depuis JSON ou initialise les valeurs par défaut"""
+        """Charge les recettes depuis le stockage ou initialise les valeurs par défaut"""
         try:
-            donnees = self.data_manager.charger_recettes()
-            if not donnees or len(donnees) < 8:  # Reset if fewer than 8 recipes
-                print(f"Debug: {len(donnees) if donnees else 0} recettes trouvées dans recettes.json, réinitialisation des recettes par défaut")
+            if Config.CHARGEMENT_PARESSEUX:
+                # Lecture en flux ; les ingrédients ne sont construits qu'à l'affichage
+                recettes = self._construire_valides(self.stockage.iterer_recettes(), Recette.from_dict_differe)
+            else:
+                recettes = self._construire_valides(self.stockage.charger_recettes(), Recette.from_dict)
+            if len(recettes) < 8:  # Reset if fewer than 8 recipes
+                print(f"Debug: {len(recettes)} recettes trouvées dans recettes.json, réinitialisation des recettes par défaut")
                 return self._initialiser_recettes_defaut()
-            recettes = [Recette.from_dict(d) for d in donnees]
             print(f"Debug: {len(recettes)} recettes chargées depuis recettes.json")
             return recettes
         except Exception as e:
             print(f"Debug: Erreur lors du chargement de recettes.json: {str(e)}, initialisation des recettes par défaut")
             return self._initialiser_recettes_defaut()
     
+    @staticmethod
+    def _construire_valides(donnees, construire) -> List[Recette]:
+        """Construit les recettes stockées en écartant les enregistrements invalides"""
+        recettes = []
+        for d in donnees:
+            try:
+                recettes.append(construire(d))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Debug: Recette invalide ignorée ({type(e).__name__}: {e})")
+        return recettes
+    
     def _initialiser_recettes_defaut(self) -> List[Recette]:
         """Retourne les recettes par défaut si la base est vide"""
         recettes_defaut = [
@@ -178,44 +423,164 @@ class BaseConnaissances:
             )
         ]
         print(f"Debug: Sauvegarde de {len(recettes_defaut)} recettes par défaut dans recettes.json")
-        self.data_manager.sauvegarder_recettes(recettes_defaut)
+        self.stockage.sauvegarder_recettes(recettes_defaut)
+        self._suivre_ecriture()
         return recettes_defaut
     
     def ajouter_recette(self, recette: Recette):
         """Ajoute une recette et met à jour le JSON"""
-        self.recettes.append(recette)
-        print(f"Debug: Ajout de la recette '{recette.nom}', total: {len(self.recettes)} recettes")
-        self.data_manager.sauvegarder_recettes(self.recettes)
+        with self.verrou:
+            self._indexer(recette)
+            self.version += 1
+            print(f"Debug: Ajout de la recette '{recette.nom}', total: {len(self._recettes)} recettes")
+            self._persister_mutation(lambda: self.stockage.enregistrer_ajout([recette]))
+    
+    def ajouter_recettes(self, recettes: List[Recette]):
+        """Ajoute un lot de recettes avec une seule étape de persistance (aucune si une recette échoue)"""
+        if not recettes:
+            return
+        with self.verrou:
+            ajoutees = []
+            try:
+                for recette in recettes:
+                    ajoutees.append(self._indexer(recette))
+            except Exception:
+                # Tout ou rien : les recettes du lot déjà indexées sont retirées
+                for recette_id in reversed(ajoutees):
+                    self._desindexer(recette_id)
+                raise
+            self.version += 1
+            print(f"Debug: Ajout de {len(recettes)} recettes, total: {len(self._recettes)} recettes")
+            self._persister_mutation(lambda: self.stockage.enregistrer_ajout(recettes))
     
     def supprimer_recette(self, nom: str):
         """Supprime une recette et met à jour le JSON"""
-        initial_len = len(self.recettes)
-        self.recettes = [r for r in self.recettes if r.nom != nom]
-        print(f"Debug: Suppression de la recette '{nom}', total après: {len(self.recettes)} recettes")
-        self.data_manager.sauvegarder_recettes(self.recettes)
-        if len(self.recettes) == 0:
-            print("Debug: Base de données vide après suppression, réinitialisation des recettes par défaut")
-            self.recettes = self._initialiser_recettes_defaut()
+        with self.verrou:
+            for recette_id in self._recettes.ids_nom(nom):
+                self._desindexer(recette_id)
+            self.version += 1
+            print(f"Debug: Suppression de la recette '{nom}', total après: {len(self._recettes)} recettes")
+            if self._recettes:
+                self._persister_mutation(lambda: self.stockage.enregistrer_suppression(nom))
+            else:
+                print("Debug: Base de données vide après suppression, réinitialisation des recettes par défaut")
+                self._remplacer_recettes(self._initialiser_recettes_defaut())
     
     def sauvegarder(self):
-        """Sauvegarde toutes les recettes"""
+        """Sauvegarde toutes les recettes (réintègre aussi le journal)"""
+        if self.stockage.toujours_a_jour:
+            print("Debug: Sauvegarde inutile, chaque mutation est déjà écrite dans le stockage")
+            return
         print(f"Debug: Sauvegarde de {len(self.recettes)} recettes dans recettes.json")
-        self.data_manager.sauvegarder_recettes(self.recettes)
+        if self._sauvegarde_differee is not None and self._sauvegarde_differee.modifie:
+            self._sauvegarde_differee.flush()
+        else:
+            self._ecrire_catalogue()
+    
+    def flush(self):
+        """Écrit immédiatement les mutations encore en attente de sauvegarde différée"""
+        if self._sauvegarde_differee is not None:
+            self._sauvegarde_differee.flush()
+    
+    def _ecrire_catalogue(self):
+        """Réécrit tout le catalogue dans le stockage"""
+        # Sous verrou : chaque écriture porte sur un état cohérent et les écritures sont ordonnées
+        with self.verrou:
+            self.stockage.sauvegarder_recettes(self.recettes)
+    
+    def _persister_mutation(self, enregistrer_incremental):
+        """Persiste une mutation selon le mode de stockage configuré"""
+        if self.stockage.incremental:
+            enregistrer_incremental()
+            self._suivre_ecriture()
+            self._compacter_si_necessaire()
+        elif self._sauvegarde_differee is not None:
+            self._sauvegarde_differee.marquer_modifie()
+        else:
+            self._ecrire_catalogue()
+    
+    def _suivre_ecriture(self):
+        """Après une écriture de ce processus dans un stockage partagé
+        
+        Seule écriture depuis la dernière synchronisation : la copie en mémoire reste à jour ;
+        sinon, un autre processus a aussi écrit et synchroniser() rechargera le catalogue.
+        """
+        generation = self.stockage.generation()
+        if generation is not None and self._generation is not None and generation == self._generation + 1:
+            self._generation = generation
+    
+    def _compacter_si_necessaire(self):
+        """Replie le journal dans recettes.json au-delà du seuil configuré"""
+        if self.stockage.compactage_necessaire():
+            self.stockage.compacter(self.recettes)
     
     def rechercher_par_ingredient(self, ingredient: str) -> List[Recette]:
         """Recherche des recettes contenant un ingrédient"""
-        resultats = []
-        for recette in self.recettes:
-            for ing in recette.ingredients:
-                if ingredient.lower() in ing.nom.lower():
-                    resultats.append(recette)
-                    break
-        return resultats
+        with self.verrou:
+            return self.recettes_par_ids(self.index_ingredients.rechercher(ingredient))
     
     def rechercher_par_type(self, type_plat: str) -> List[Recette]:
         """Recherche des recettes par type de plat"""
-        return [r for r in self.recettes if r.type_plat.lower() == type_plat.lower()]
+        return self.query(type_plat=type_plat)
     
     def rechercher_par_difficulte(self, difficulte: str) -> List[Recette]:
         """Recherche des recettes par difficulté"""
-        return [r for r in self.recettes if r.difficulte.lower() == difficulte.lower()]
\ No newline at end of file
+        return self.query(difficulte=difficulte)
+    
+    def query(self, type_plat: Optional[str] = None, difficulte: Optional[str] = None,
+              temps_max: Optional[float] = None, ingredient: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Recette]:
+        """
+        Recherche combinée sur les index (critères à None ignorés)
+        :param type_plat: Type de plat exact (insensible à la casse)
+        :param difficulte: Difficulté exacte (insensible à la casse)
+        :param temps_max: Temps de préparation maximum en minutes
+        :param ingredient: Fragment de nom d'ingrédient
+        :param limit: Nombre maximum de résultats
+        :return: Recettes correspondantes, dans l'ordre du catalogue
+        """
+        with self.verrou:
+            return self._query(type_plat, difficulte, temps_max, ingredient, limit)
+    
+    def _query(self, type_plat, difficulte, temps_max, ingredient, limit) -> List[Recette]:
+        """Exécute query() (verrou déjà pris)"""
+        # (taille estimée, identifiants à la demande, test d'appartenance)
+        criteres = []
+        if type_plat is not None:
+            ids_type = self.index_types.rechercher(type_plat)
+            criteres.append((len(ids_type), lambda: ids_type, ids_type.__contains__))
+        if difficulte is not None:
+            ids_diff = self.index_difficultes.rechercher(difficulte)
+            criteres.append((len(ids_diff), lambda: ids_diff, ids_diff.__contains__))
+        if ingredient:
+            ids_ing = self.index_ingredients.rechercher(ingredient)
+            criteres.append((len(ids_ing), lambda: ids_ing, ids_ing.__contains__))
+        if temps_max is not None:
+            criteres.append((
+                self.index_temps.compter(temps_max),
+                lambda: self.index_temps.rechercher(temps_max),
+                lambda i: self._recettes.temps(i) <= temps_max
+            ))
+        
+        if not criteres:
+            recettes = self.recettes
+            return recettes[:limit] if limit is not None else list(recettes)
+        
+        # On part de l'index le plus sélectif, les autres ne servent qu'à filtrer
+        criteres.sort(key=lambda c: c[0])
+        ids = criteres[0][1]()
+        for _, _, contient in criteres[1:]:
+            ids = [i for i in ids if contient(i)]
+        return self.recettes_par_ids(ids, limit)
+    
+    def page_recettes(self, offset: int = 0, limit: int = 50, **filtres) -> Tuple[int, List[Dict]]:
+        """
+        Page de recettes sérialisées et nombre total de correspondances
+        Avec le backend SQLite, la page est calculée par la base elle-même.
+        """
+        if offset < 0 or limit < 0:
+            raise ValueError(f"offset et limit doivent être positifs (offset={offset}, limit={limit})")
+        if self.stockage.requetes_natives:
+            return self.stockage.compter(**filtres), self.stockage.lister_page(offset, limit, **filtres)
+        recettes = self.query(**filtres)
+        return len(recettes), [r.to_dict() for r in recettes[offset:offset + limit]]
\ No newline at end of file
@@ -0,0 +1,180 @@
+from array import array
+from collections.abc import ItemsView, MutableMapping, Sequence, ValuesView
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Set, Tuple
+from models.recette import Recette
+
+if TYPE_CHECKING:
+    # Import réservé au typage : services importe lui-même models
+    from services.stockage import SourceRecettes
+
+# Enregistrements décodés par appel à la source
+TAILLE_LOT = 500
+
+
+class CatalogueMemoire(dict):
+    """Catalogue de BaseConnaissances entièrement en mémoire : identifiant -> Recette"""
+    
+    def paires(self, ids: Iterable[int]) -> List[Tuple[int, Recette]]:
+        """(identifiant, recette) pour chaque identifiant, dans l'ordre donné"""
+        return [(i, self[i]) for i in ids]
+    
+    def plusieurs(self, ids: Iterable[int]) -> List[Recette]:
+        """Recettes des identifiants, dans l'ordre donné"""
+        return [self[i] for i in ids]
+    
+    def ids_nom(self, nom: str) -> List[int]:
+        """Identifiants des recettes portant exactement ce nom, dans l'ordre du catalogue"""
+        return [i for i, r in self.items() if r.nom == nom]
+    
+    def temps(self, recette_id: int) -> float:
+        return self[recette_id].temps_preparation
+    
+    def sequence(self) -> List[Recette]:
+        """Recettes dans l'ordre d'insertion"""
+        return list(self.values())
+
+
+def _decoder(source: "SourceRecettes", ajoutees: Dict[int, Recette], ids: List[int]) -> List[Tuple[int, Recette]]:
+    """(identifiant, recette) des ids, décodés par lots ; les enregistrements disparus sont omis"""
+    paires = []
+    for debut in range(0, len(ids), TAILLE_LOT):
+        tranche = ids[debut:debut + TAILLE_LOT]
+        decodees = iter(source.recettes([i for i in tranche if i not in ajoutees]))
+        for i in tranche:
+            recette = ajoutees[i] if i in ajoutees else next(decodees)
+            if recette is not None:
+                paires.append((i, recette))
+    return paires
+
+
+class CatalogueDiffere(MutableMapping):
+    """Catalogue de BaseConnaissances servi par une source stockée, décodé à chaque lecture
+    
+    Les identifiants 0..n-1 désignent les enregistrements de la source (SQLite, snapshot
+    binaire) ; les recettes ajoutées ensuite sont gardées en mémoire et les suppressions
+    masquent la source. Seul le temps de préparation est conservé par enregistrement,
+    pour le filtre temps_max de query : aucun objet Recette n'est gardé pour la source.
+    """
+    
+    def __init__(self, source: "SourceRecettes", temps: array):
+        self.source = source
+        self._taille_source = len(source)
+        self._temps = temps
+        self._ajoutees: Dict[int, Recette] = {}
+        self._supprimees: Set[int] = set()
+    
+    def _dans_source(self, recette_id: int) -> bool:
+        return 0 <= recette_id < self._taille_source and recette_id not in self._supprimees
+    
+    def __contains__(self, recette_id) -> bool:
+        return recette_id in self._ajoutees or self._dans_source(recette_id)
+    
+    def __getitem__(self, recette_id: int) -> Recette:
+        recette = self._ajoutees.get(recette_id)
+        if recette is not None:
+            return recette
+        if self._dans_source(recette_id):
+            recettes = self.source.recettes([recette_id])
+            if recettes[0] is not None:
+                return recettes[0]
+        raise KeyError(recette_id)
+    
+    def __setitem__(self, recette_id: int, recette: Recette):
+        if recette_id < self._taille_source:
+            raise KeyError(f"Identifiant réservé aux enregistrements de la source : {recette_id}")
+        self._ajoutees[recette_id] = recette
+    
+    def __delitem__(self, recette_id: int):
+        if recette_id in self._ajoutees:
+            del self._ajoutees[recette_id]
+        elif self._dans_source(recette_id):
+            self._supprimees.add(recette_id)
+        else:
+            raise KeyError(recette_id)
+    
+    def __iter__(self) -> Iterator[int]:
+        supprimees = self._supprimees
+        for recette_id in range(self._taille_source):
+            if recette_id not in supprimees:
+                yield recette_id
+        yield from list(self._ajoutees)
+    
+    def __len__(self) -> int:
+        return self._taille_source - len(self._supprimees) + len(self._ajoutees)
+    
+    def items(self) -> "ElementsDifferes":
+        return ElementsDifferes(self)
+    
+    def values(self) -> "ValeursDifferees":
+        return ValeursDifferees(self)
+    
+    def paires(self, ids: Iterable[int]) -> List[Tuple[int, Recette]]:
+        """(identifiant, recette) pour chaque identifiant, décodés par lots (KeyError si inconnu)"""
+        ids = list(ids)
+        for i in ids:
+            if i not in self:
+                raise KeyError(i)
+        return _decoder(self.source, self._ajoutees, ids)
+    
+    def plusieurs(self, ids: Iterable[int]) -> List[Recette]:
+        """Recettes des identifiants, dans l'ordre donné, décodées par lots"""
+        return [recette for _, recette in self.paires(ids)]
+    
+    def ids_nom(self, nom: str) -> List[int]:
+        """Identifiants des recettes portant exactement ce nom, dans l'ordre du catalogue"""
+        ids = [i for i in self.source.positions_nom(nom) if i not in self._supprimees]
+        return ids + [i for i, r in self._ajoutees.items() if r.nom == nom]
+    
+    def temps(self, recette_id: int) -> float:
+        recette = self._ajoutees.get(recette_id)
+        return recette.temps_preparation if recette is not None else self._temps[recette_id]
+    
+    def sequence(self) -> "VueRecettes":
+        """Recettes dans l'ordre d'insertion, décodées à l'accès (état figé à l'appel)"""
+        return VueRecettes(self.source, list(self), dict(self._ajoutees))
+
+
+class ElementsDifferes(ItemsView):
+    """items() d'un CatalogueDiffere : parcours décodé par lots plutôt qu'une lecture par recette"""
+    
+    def __iter__(self):
+        catalogue = self._mapping
+        ids = list(catalogue)
+        for debut in range(0, len(ids), TAILLE_LOT):
+            yield from _decoder(catalogue.source, catalogue._ajoutees, ids[debut:debut + TAILLE_LOT])
+
+
+class ValeursDifferees(ValuesView):
+    """values() d'un CatalogueDiffere, décodées par lots"""
+    
+    def __iter__(self):
+        for _, recette in ElementsDifferes(self._mapping):
+            yield recette
+
+
+class VueRecettes(Sequence):
+    """Liste en lecture seule des recettes d'un CatalogueDiffere, décodées à l'accès
+    
+    Les identifiants et les recettes ajoutées sont figés à la création : la vue reste
+    cohérente même si le catalogue change pendant qu'on la parcourt.
+    """
+    
+    def __init__(self, source: "SourceRecettes", ids: List[int], ajoutees: Dict[int, Recette]):
+        self._source = source
+        self._ids = ids
+        self._ajoutees = ajoutees
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [recette for _, recette in _decoder(self._source, self._ajoutees, self._ids[index])]
+        paires = _decoder(self._source, self._ajoutees, [self._ids[index]])
+        if not paires:
+            raise IndexError(index)
+        return paires[0][1]
+    
+    def __iter__(self) -> Iterator[Recette]:
+        for debut in range(0, len(self._ids), TAILLE_LOT):
+            yield from self[debut:debut + TAILLE_LOT]
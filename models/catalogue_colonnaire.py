@@ -0,0 +1,111 @@
+from array import array
+from typing import Dict, List
+import numpy as np
+from models.indexation import Index
+from models.recette import Recette
+
+
+class Dictionnaire:
+    """Table de codes : valeur <-> petit entier"""
+    
+    def __init__(self):
+        self.valeurs: List[str] = []
+        self._codes: Dict[str, int] = {}
+    
+    def code(self, valeur: str) -> int:
+        code = self._codes.get(valeur)
+        if code is None:
+            code = self._codes[valeur] = len(self.valeurs)
+            self.valeurs.append(valeur)
+        return code
+    
+    def vider(self):
+        self.valeurs.clear()
+        self._codes.clear()
+
+
+class CatalogueColonnaire(Index):
+    """Colonnes compactes (array) des champs agrégés par statistiques()
+    
+    Index dérivé, pas un stockage : les recettes restent dans BaseConnaissances et
+    seuls le temps, les codes de type et de difficulté et le nombre d'ingrédients
+    sont recopiés ici. Les recettes supprimées sont marquées inactives, puis les
+    colonnes sont compactées dès que les lignes inactives dépassent les actives.
+    """
+    
+    # Lignes inactives tolérées avant compactage (et au moins autant que de lignes actives)
+    INACTIVES_MIN = 64
+    
+    def __init__(self):
+        self.types = Dictionnaire()
+        self.difficultes = Dictionnaire()
+        self._position_par_id: Dict[int, int] = {}
+        self.vider()
+    
+    def vider(self):
+        """Réinitialise toutes les colonnes"""
+        self.types.vider()
+        self.difficultes.vider()
+        self._position_par_id.clear()
+        # Une ligne par recette
+        self.ids = array('q')
+        self.temps = array('d')
+        self.codes_type = array('H')
+        self.codes_difficulte = array('H')
+        self.nb_ingredients = array('L')
+        self.actif = array('B')
+        self._inactives = 0
+    
+    def __len__(self) -> int:
+        return len(self._position_par_id)
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        """Ajoute une ligne pour la recette"""
+        self._position_par_id[recette_id] = len(self.ids)
+        self.ids.append(recette_id)
+        self.temps.append(recette.temps_preparation)
+        self.codes_type.append(self.types.code(recette.type_plat))
+        self.codes_difficulte.append(self.difficultes.code(recette.difficulte))
+        self.nb_ingredients.append(len(recette.noms_ingredients()))
+        self.actif.append(1)
+    
+    def retirer(self, recette_id: int, recette: Recette = None):
+        """Marque la ligne de la recette comme inactive, puis compacte si nécessaire"""
+        position = self._position_par_id.pop(recette_id, None)
+        if position is None:
+            return
+        self.actif[position] = 0
+        self._inactives += 1
+        if self._inactives >= max(self.INACTIVES_MIN, len(self._position_par_id)):
+            self.compacter()
+    
+    def compacter(self):
+        """Recopie les seules lignes actives (les positions sont renumérotées)"""
+        garder = np.flatnonzero(np.frombuffer(self.actif, dtype=self.actif.typecode))
+        for nom in ("ids", "temps", "codes_type", "codes_difficulte", "nb_ingredients"):
+            colonne = getattr(self, nom)
+            valeurs = np.frombuffer(colonne, dtype=colonne.typecode)[garder]
+            setattr(self, nom, array(colonne.typecode, valeurs.tobytes()))
+        self.actif = array('B', bytes([1]) * len(garder))
+        self._position_par_id = {recette_id: position for position, recette_id in enumerate(self.ids)}
+        self._inactives = 0
+    
+    def statistiques(self) -> dict:
+        """Nombre, temps moyen et répartitions, calculés sur les colonnes"""
+        # np.frombuffer lit les arrays sans copie ; les vues restent temporaires
+        # car un array exporté ne peut plus être agrandi
+        actif = np.frombuffer(self.actif, dtype=self.actif.typecode).astype(bool)
+        temps = np.frombuffer(self.temps, dtype=self.temps.typecode)[actif]
+        types = np.bincount(np.frombuffer(self.codes_type, dtype=self.codes_type.typecode)[actif],
+                            minlength=len(self.types.valeurs))
+        difficultes = np.bincount(np.frombuffer(self.codes_difficulte, dtype=self.codes_difficulte.typecode)[actif],
+                                  minlength=len(self.difficultes.valeurs))
+        nb_ingredients = np.frombuffer(self.nb_ingredients, dtype=self.nb_ingredients.typecode)[actif]
+        stats = {
+            "total": int(actif.sum()),
+            "temps_moyen": float(temps.mean()) if temps.size else 0.0,
+            "par_type": {v: int(n) for v, n in zip(self.types.valeurs, types) if n},
+            "par_difficulte": {v: int(n) for v, n in zip(self.difficultes.valeurs, difficultes) if n},
+            "ingredients_moyen": float(nb_ingredients.mean()) if nb_ingredients.size else 0.0
+        }
+        return stats
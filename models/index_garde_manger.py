@@ -0,0 +1,155 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from models.indexation import Index
+from models.recette import Recette
+
+
+class IndexGardeManger(Index):
+    """Matrice creuse recettes × ingrédients canoniques, stockée par colonne
+    
+    Chaque ingrédient canonique (nom en minuscules) a sa colonne : les lignes
+    (recettes) qui l'utilisent, avec son nombre d'occurrences dans la recette. Le score
+    d'un garde-manger pour une recette est, comme dans la boucle d'origine du moteur de
+    recommandation, la part des lignes d'ingrédients de la recette (doublons compris)
+    qu'il couvre ; les ex aequo restent dans l'ordre du catalogue. Pour toutes les
+    recettes à la fois, c'est un produit matrice creuse-vecteur : on somme les
+    occurrences des lignes dans les colonnes du garde-manger. Un lot de garde-mangers
+    est compté d'un seul coup, chaque garde-manger décalé sur sa propre plage de lignes.
+    """
+    
+    # Nombre maximal de cases non nulles (garde-manger, recette) calculées en une fois
+    CELLULES_MAX = 4_000_000
+    
+    def __init__(self):
+        self.vider()
+    
+    def vider(self):
+        self._colonne_par_nom: Dict[str, int] = {}
+        # Par colonne : ligne -> occurrences de l'ingrédient dans la recette
+        self._lignes_par_colonne: List[Dict[int, int]] = []
+        # Colonnes converties en tableaux NumPy (lignes, occurrences), invalidées à chaque modification
+        self._colonnes_np: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._nb_ingredients = np.zeros(0, dtype=np.float64)
+        self._ligne_par_id: Dict[int, int] = {}
+        # Identifiant de chaque ligne (-1 si libre) ; les identifiants croissent avec l'ordre d'insertion
+        self._id_par_ligne = np.zeros(0, dtype=np.int64)
+        self._nb_lignes = 0
+        self._lignes_libres: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self._ligne_par_id)
+    
+    @staticmethod
+    def _noms_recette(recette: Recette) -> Set[str]:
+        """Ingrédients canoniques de la recette (mêmes noms que IndexIngredients)"""
+        return {nom.lower() for nom in recette.noms_ingredients()}
+    
+    def _ligne_libre(self) -> int:
+        """Ligne disponible, en agrandissant les tableaux (capacité doublée) si besoin"""
+        if self._lignes_libres:
+            return self._lignes_libres.pop()
+        ligne = self._nb_lignes
+        if ligne == len(self._nb_ingredients):
+            capacite = max(64, 2 * ligne)
+            nb_ingredients = np.zeros(capacite, dtype=np.float64)
+            nb_ingredients[:ligne] = self._nb_ingredients
+            self._nb_ingredients = nb_ingredients
+            id_par_ligne = np.full(capacite, -1, dtype=np.int64)
+            id_par_ligne[:ligne] = self._id_par_ligne
+            self._id_par_ligne = id_par_ligne
+        self._nb_lignes += 1
+        return ligne
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        noms = recette.noms_ingredients()
+        ligne = self._ligne_libre()
+        for nom, occurrences in Counter(nom.lower() for nom in noms).items():
+            colonne = self._colonne_par_nom.get(nom)
+            if colonne is None:
+                colonne = self._colonne_par_nom[nom] = len(self._lignes_par_colonne)
+                self._lignes_par_colonne.append({})
+            self._lignes_par_colonne[colonne][ligne] = occurrences
+            self._colonnes_np.pop(colonne, None)
+        self._nb_ingredients[ligne] = len(noms)
+        self._ligne_par_id[recette_id] = ligne
+        self._id_par_ligne[ligne] = recette_id
+    
+    def retirer(self, recette_id: int, recette: Recette):
+        ligne = self._ligne_par_id.pop(recette_id, None)
+        if ligne is None:
+            return
+        for nom in self._noms_recette(recette):
+            colonne = self._colonne_par_nom.get(nom)
+            if colonne is not None:
+                # La colonne vide est gardée : son numéro reste valable
+                self._lignes_par_colonne[colonne].pop(ligne, None)
+                self._colonnes_np.pop(colonne, None)
+        self._nb_ingredients[ligne] = 0
+        self._id_par_ligne[ligne] = -1
+        self._lignes_libres.append(ligne)
+    
+    def colonnes(self, noms: Iterable[str]) -> Set[int]:
+        """Colonnes des ingrédients canoniques donnés (les noms inconnus sont ignorés)"""
+        return {self._colonne_par_nom[nom] for nom in noms if nom in self._colonne_par_nom}
+    
+    def _colonne_np(self, colonne: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(lignes, occurrences) de la colonne"""
+        tableaux = self._colonnes_np.get(colonne)
+        if tableaux is None:
+            occurrences = self._lignes_par_colonne[colonne]
+            tableaux = self._colonnes_np[colonne] = (
+                np.fromiter(occurrences.keys(), dtype=np.int64, count=len(occurrences)),
+                np.fromiter(occurrences.values(), dtype=np.float64, count=len(occurrences))
+            )
+        return tableaux
+    
+    def _meilleures(self, lignes: np.ndarray, scores: np.ndarray, k: Optional[int]) -> List[Tuple[int, float]]:
+        """Les k meilleures lignes (toutes si k est None) : (identifiant, score) décroissant"""
+        if k is not None and len(lignes) > k:
+            # Seuil du k-ième score : les ex aequo sont départagés ci-dessous, pas au hasard
+            garder = scores >= -np.partition(-scores, k - 1)[k - 1]
+            lignes, scores = lignes[garder], scores[garder]
+        # Score décroissant, puis ordre d'insertion (identifiant, les lignes étant réutilisées) à égalité
+        ids = self._id_par_ligne[lignes]
+        ordre = np.lexsort((ids, -scores))[:k]
+        return [(int(recette_id), float(score)) for recette_id, score in zip(ids[ordre], scores[ordre])]
+    
+    def _scorer_bloc(self, morceaux: List[np.ndarray], poids: List[np.ndarray], taille: int,
+                     k: Optional[int]) -> List[List[Tuple[int, float]]]:
+        """Scores d'un bloc de `taille` garde-mangers, dont les lignes sont décalées de n par garde-manger"""
+        n = self._nb_lignes
+        if not morceaux:
+            return [[] for _ in range(taille)]
+        # Lignes d'ingrédients couvertes = somme des occurrences de chaque ligne décalée (clés triées par garde-manger)
+        cles, inverse = np.unique(np.concatenate(morceaux), return_inverse=True)
+        communs = np.bincount(inverse, weights=np.concatenate(poids), minlength=len(cles))
+        lignes = cles % n
+        scores = communs / np.maximum(self._nb_ingredients[lignes], 1)
+        bornes = np.searchsorted(cles, np.arange(taille + 1) * n)
+        return [self._meilleures(lignes[a:b], scores[a:b], k) for a, b in zip(bornes[:-1], bornes[1:])]
+    
+    def scorer(self, garde_mangers: List[Set[int]], k: Optional[int] = 10) -> List[List[Tuple[int, float]]]:
+        """Pour chaque garde-manger (ensemble de colonnes), ses k meilleures recettes : (identifiant, score)
+        
+        Seules les cases non nulles du produit sont calculées ; les garde-mangers sont
+        traités par blocs d'au plus CELLULES_MAX cases pour borner la mémoire.
+        """
+        n = self._nb_lignes
+        if not n or (k is not None and k <= 0):
+            return [[] for _ in garde_mangers]
+        resultats = []
+        morceaux, poids, cellules, taille = [], [], 0, 0
+        for colonnes in garde_mangers:
+            for colonne in colonnes:
+                lignes, occurrences = self._colonne_np(colonne)
+                morceaux.append(lignes + taille * n)
+                poids.append(occurrences)
+                cellules += len(lignes)
+            taille += 1
+            if cellules >= self.CELLULES_MAX:
+                resultats.extend(self._scorer_bloc(morceaux, poids, taille, k))
+                morceaux, poids, cellules, taille = [], [], 0, 0
+        if taille:
+            resultats.extend(self._scorer_bloc(morceaux, poids, taille, k))
+        return resultats
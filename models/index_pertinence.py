@@ -0,0 +1,100 @@
+import heapq
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from models.indexation import Index
+from models.recette import Recette
+
+# Mots trop fréquents dans les requêtes pour départager des recettes
+MOTS_VIDES = {
+    "au", "aux", "avec", "ce", "ces", "de", "des", "du", "en", "et", "la", "le", "les", "ma", "mes",
+    "moi", "mon", "ou", "par", "pour", "quelque", "sans", "se", "sur", "un", "une", "veux", "je",
+    "recette", "recettes", "donne", "propose", "suggere", "chose", "faire", "quoi", "quel", "quelle"
+}
+
+
+@lru_cache(maxsize=65536)
+def termes(texte: str) -> Tuple[str, ...]:
+    """Découpe un texte en termes normalisés (minuscules, sans accents, singulier approximatif)
+    
+    Mis en cache : types et noms d'ingrédients reviennent d'une recette à l'autre.
+    """
+    texte = unicodedata.normalize("NFKD", texte.lower()).encode("ascii", "ignore").decode("ascii")
+    resultat = []
+    for mot in re.findall(r"[a-z0-9]+", texte):
+        if len(mot) < 2 or mot in MOTS_VIDES:
+            continue
+        if len(mot) > 3 and mot[-1] in "sx":
+            mot = mot[:-1]
+        resultat.append(mot)
+    return tuple(resultat)
+
+
+class IndexBM25(Index):
+    """Index de pertinence BM25 sur le nom, le type et les ingrédients des recettes
+    
+    Listes inversées terme -> {identifiant: fréquence} tenues à jour recette par
+    recette ; les statistiques globales (longueur moyenne, nombre de documents)
+    sont lues au moment de la recherche.
+    """
+    
+    K1 = 1.2
+    B = 0.75
+    # Les termes du nom comptent double : ils décrivent le plat lui-même
+    POIDS_NOM = 2
+    
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._longueurs: Dict[int, int] = {}
+        self._longueur_totale = 0
+    
+    def _termes_recette(self, recette: Recette) -> Dict[str, int]:
+        """Fréquence de chaque terme dans la recette"""
+        frequences: Dict[str, int] = {}
+        for terme in termes(recette.nom):
+            frequences[terme] = frequences.get(terme, 0) + self.POIDS_NOM
+        for texte in (recette.type_plat, *recette.noms_ingredients()):
+            for terme in termes(texte):
+                frequences[terme] = frequences.get(terme, 0) + 1
+        return frequences
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        frequences = self._termes_recette(recette)
+        for terme, frequence in frequences.items():
+            self._postings.setdefault(terme, {})[recette_id] = frequence
+        longueur = sum(frequences.values())
+        self._longueurs[recette_id] = longueur
+        self._longueur_totale += longueur
+    
+    def retirer(self, recette_id: int, recette: Recette):
+        for terme in self._termes_recette(recette):
+            postings = self._postings.get(terme)
+            if postings is not None:
+                postings.pop(recette_id, None)
+                if not postings:
+                    del self._postings[terme]
+        self._longueur_totale -= self._longueurs.pop(recette_id, 0)
+    
+    def vider(self):
+        self._postings.clear()
+        self._longueurs.clear()
+        self._longueur_totale = 0
+    
+    def rechercher(self, requete: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Les k recettes les plus pertinentes : liste de (identifiant, score) décroissante"""
+        n = len(self._longueurs)
+        if not n:
+            return []
+        longueur_moyenne = self._longueur_totale / n
+        scores: Dict[int, float] = {}
+        for terme in set(termes(requete)):
+            postings = self._postings.get(terme)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for recette_id, frequence in postings.items():
+                norme = self.K1 * (1 - self.B + self.B * self._longueurs[recette_id] / longueur_moyenne)
+                scores[recette_id] = scores.get(recette_id, 0.0) + idf * frequence * (self.K1 + 1) / (frequence + norme)
+        return heapq.nlargest(k, scores.items(), key=lambda x: (x[1], -x[0]))
@@ -0,0 +1,154 @@
+import math
+import zlib
+from typing import Dict, List, Tuple
+import numpy as np
+from models.index_pertinence import termes
+from models.indexation import Index
+from models.recette import Recette
+
+
+class IndexSimilarite(Index):
+    """Vecteurs TF-IDF hachés des recettes, dans une matrice NumPy normalisée
+    
+    Chaque recette occupe une ligne (norme 1) ; la similarité cosinus avec toutes
+    les autres est un seul produit matrice-vecteur. Les termes (nom, ingrédients,
+    instructions) sont projetés sur `dimension` colonnes par hachage.
+    
+    Les poids IDF sont figés à la dernière reconstruction : les lignes ajoutées
+    ensuite les réutilisent, et BaseConnaissances reconstruit l'index quand la taille
+    du catalogue a trop changé depuis (voir a_reconstruire).
+    """
+    
+    # Poids des termes selon leur origine
+    POIDS_NOM = 2.0
+    POIDS_INGREDIENT = 1.5
+    POIDS_INSTRUCTION = 0.5
+    # Variation relative du nombre de recettes au-delà de laquelle les IDF sont recalculés
+    DERIVE_MAX = 0.2
+    
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+        self.vider()
+    
+    def vider(self):
+        self._matrice = np.zeros((0, self.dimension), dtype=np.float32)
+        self._actives = np.zeros(0, dtype=bool)
+        self._ligne_par_id: Dict[int, int] = {}
+        self._id_par_ligne: List[int] = []
+        self._lignes_libres: List[int] = []
+        self._frequences_documents = np.zeros(self.dimension, dtype=np.int64)
+        self._idf = np.ones(self.dimension, dtype=np.float32)
+        self._taille_reference = 0
+    
+    def __len__(self) -> int:
+        return len(self._ligne_par_id)
+    
+    def _colonne(self, terme: str) -> int:
+        # crc32 plutôt que hash() : le hachage des chaînes change d'un processus à l'autre
+        return zlib.crc32(terme.encode("utf-8")) % self.dimension
+    
+    def _frequences(self, recette: Recette) -> Dict[int, float]:
+        """Fréquences pondérées des termes de la recette, par colonne"""
+        frequences: Dict[int, float] = {}
+        
+        def compter(textes, poids):
+            for texte in textes:
+                for terme in termes(texte):
+                    colonne = self._colonne(terme)
+                    frequences[colonne] = frequences.get(colonne, 0.0) + poids
+        
+        compter([recette.nom], self.POIDS_NOM)
+        compter(recette.noms_ingredients(), self.POIDS_INGREDIENT)
+        compter(recette.instructions, self.POIDS_INSTRUCTION)
+        return frequences
+    
+    def _vecteur(self, frequences: Dict[int, float]) -> np.ndarray:
+        """Vecteur TF-IDF normalisé (tf logarithmique)"""
+        vecteur = np.zeros(self.dimension, dtype=np.float32)
+        for colonne, frequence in frequences.items():
+            vecteur[colonne] = (1.0 + math.log(frequence)) if frequence >= 1 else frequence
+        vecteur *= self._idf
+        norme = np.linalg.norm(vecteur)
+        return vecteur / norme if norme else vecteur
+    
+    def _calculer_idf(self):
+        n = max(len(self._ligne_par_id), 1)
+        self._idf = (np.log((1 + n) / (1 + self._frequences_documents)) + 1).astype(np.float32)
+        self._taille_reference = len(self._ligne_par_id)
+    
+    def _ligne_libre(self) -> int:
+        """Ligne disponible, en agrandissant la matrice (capacité doublée) si besoin"""
+        if self._lignes_libres:
+            return self._lignes_libres.pop()
+        ligne = len(self._id_par_ligne)
+        if ligne == len(self._matrice):
+            capacite = max(64, 2 * len(self._matrice))
+            matrice = np.zeros((capacite, self.dimension), dtype=np.float32)
+            matrice[:ligne] = self._matrice
+            actives = np.zeros(capacite, dtype=bool)
+            actives[:ligne] = self._actives
+            self._matrice, self._actives = matrice, actives
+        self._id_par_ligne.append(-1)
+        return ligne
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        frequences = self._frequences(recette)
+        colonnes = list(frequences)
+        self._frequences_documents[colonnes] += 1
+        ligne = self._ligne_libre()
+        self._matrice[ligne] = self._vecteur(frequences)
+        self._actives[ligne] = True
+        self._ligne_par_id[recette_id] = ligne
+        self._id_par_ligne[ligne] = recette_id
+    
+    def retirer(self, recette_id: int, recette: Recette):
+        ligne = self._ligne_par_id.pop(recette_id, None)
+        if ligne is None:
+            return
+        self._frequences_documents[list(self._frequences(recette))] -= 1
+        self._matrice[ligne] = 0.0
+        self._actives[ligne] = False
+        self._id_par_ligne[ligne] = -1
+        self._lignes_libres.append(ligne)
+    
+    def reconstruire(self, recettes: Dict[int, Recette]):
+        """Recalcule les IDF sur tout le catalogue puis toutes les lignes (vectorisé)"""
+        self.vider()
+        frequences = {recette_id: self._frequences(recette) for recette_id, recette in recettes.items()}
+        for f in frequences.values():
+            self._frequences_documents[list(f)] += 1
+        self._ligne_par_id = {recette_id: ligne for ligne, recette_id in enumerate(frequences)}
+        self._id_par_ligne = list(frequences)
+        self._calculer_idf()
+        
+        capacite = max(64, len(frequences))
+        self._matrice = np.zeros((capacite, self.dimension), dtype=np.float32)
+        self._actives = np.zeros(capacite, dtype=bool)
+        self._actives[:len(frequences)] = True
+        for ligne, f in enumerate(frequences.values()):
+            colonnes = np.fromiter(f.keys(), dtype=np.int64, count=len(f))
+            valeurs = np.fromiter(f.values(), dtype=np.float32, count=len(f))
+            self._matrice[ligne, colonnes] = np.where(valeurs >= 1, 1.0 + np.log(np.maximum(valeurs, 1)), valeurs)
+        self._matrice *= self._idf
+        normes = np.linalg.norm(self._matrice, axis=1, keepdims=True)
+        np.divide(self._matrice, normes, out=self._matrice, where=normes > 0)
+    
+    def a_reconstruire(self) -> bool:
+        """True si le nombre de recettes a trop varié depuis le calcul des IDF"""
+        n = len(self._ligne_par_id)
+        return bool(n) and abs(n - self._taille_reference) > self.DERIVE_MAX * max(self._taille_reference, 1)
+    
+    def similaires(self, recette_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """Les k recettes les plus proches (cosinus), par ordre décroissant : (identifiant, score)"""
+        n = len(self._ligne_par_id)
+        ligne = self._ligne_par_id[recette_id]
+        taille = len(self._id_par_ligne)
+        scores = self._matrice[:taille] @ self._matrice[ligne]
+        scores[~self._actives[:taille]] = -np.inf
+        scores[ligne] = -np.inf
+        k = min(k, n - 1)
+        if k <= 0:
+            return []
+        meilleures = np.argpartition(-scores, k - 1)[:k]
+        meilleures = meilleures[np.argsort(-scores[meilleures])]
+        return [(self._id_par_ligne[i], float(scores[i])) for i in meilleures]
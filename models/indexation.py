@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from models.recette import Recette
+
+
+class Index(ABC):
+    """Interface commune des index tenus à jour par BaseConnaissances"""
+    
+    @abstractmethod
+    def ajouter(self, recette_id: int, recette: Recette):
+        """Indexe une recette"""
+    
+    @abstractmethod
+    def retirer(self, recette_id: int, recette: Recette):
+        """Retire une recette de l'index"""
+    
+    @abstractmethod
+    def vider(self):
+        """Réinitialise l'index"""
+    
+    def reconstruire(self, recettes: Dict[int, Recette]):
+        """Reconstruit l'index à partir de tout le catalogue"""
+        self.vider()
+        for recette_id, recette in recettes.items():
+            self.ajouter(recette_id, recette)
+
+
+class IndexIngredients(Index):
+    """Index inversé des ingrédients pour les recherches par sous-chaîne
+    
+    Deux niveaux :
+    - trigramme -> noms d'ingrédients (en minuscules) qui le contiennent
+    - nom d'ingrédient -> identifiants des recettes qui l'utilisent
+    """
+    
+    TAILLE_NGRAMME = 3
+    
+    def __init__(self):
+        self._recettes_par_nom: Dict[str, Set[int]] = {}
+        self._noms_par_trigramme: Dict[str, Set[str]] = {}
+    
+    @classmethod
+    def _trigrammes(cls, texte: str) -> Set[str]:
+        """Découpe un texte en trigrammes"""
+        n = cls.TAILLE_NGRAMME
+        return {texte[i:i + n] for i in range(len(texte) - n + 1)}
+    
+    @staticmethod
+    def _noms_recette(recette: Recette) -> Set[str]:
+        """Noms d'ingrédients normalisés d'une recette"""
+        return {nom.lower() for nom in recette.noms_ingredients()}
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        """Indexe les ingrédients d'une recette"""
+        for nom in self._noms_recette(recette):
+            ids = self._recettes_par_nom.get(nom)
+            if ids is None:
+                ids = self._recettes_par_nom[nom] = set()
+                for trigramme in self._trigrammes(nom):
+                    self._noms_par_trigramme.setdefault(trigramme, set()).add(nom)
+            ids.add(recette_id)
+    
+    def retirer(self, recette_id: int, recette: Recette):
+        """Retire une recette de l'index"""
+        for nom in self._noms_recette(recette):
+            ids = self._recettes_par_nom.get(nom)
+            if ids is None:
+                continue
+            ids.discard(recette_id)
+            if not ids:
+                del self._recettes_par_nom[nom]
+                for trigramme in self._trigrammes(nom):
+                    noms = self._noms_par_trigramme.get(trigramme)
+                    if noms is not None:
+                        noms.discard(nom)
+                        if not noms:
+                            del self._noms_par_trigramme[trigramme]
+    
+    def vider(self):
+        """Réinitialise l'index"""
+        self._recettes_par_nom.clear()
+        self._noms_par_trigramme.clear()
+    
+    def charger(self, postings: Dict[str, Iterable[int]]):
+        """Reconstruit l'index à partir de listes nom d'ingrédient -> identifiants déjà calculées"""
+        self.vider()
+        for nom, ids in postings.items():
+            nom = nom.lower()
+            existants = self._recettes_par_nom.get(nom)
+            if existants is not None:
+                existants.update(ids)
+                continue
+            self._recettes_par_nom[nom] = set(ids)
+            for trigramme in self._trigrammes(nom):
+                self._noms_par_trigramme.setdefault(trigramme, set()).add(nom)
+    
+    def noms_correspondants(self, fragment: str) -> Set[str]:
+        """Noms d'ingrédients indexés contenant le fragment (insensible à la casse)"""
+        fragment = fragment.lower()
+        trigrammes = self._trigrammes(fragment)
+        if not trigrammes:
+            # Fragment trop court : on parcourt le vocabulaire, pas le catalogue
+            return {nom for nom in self._recettes_par_nom if fragment in nom}
+        
+        listes = []
+        for trigramme in trigrammes:
+            noms = self._noms_par_trigramme.get(trigramme)
+            if not noms:
+                return set()
+            listes.append(noms)
+        listes.sort(key=len)
+        candidats = set(listes[0])
+        for noms in listes[1:]:
+            candidats &= noms
+            if not candidats:
+                return candidats
+        # Les trigrammes communs ne garantissent pas la sous-chaîne : vérification finale
+        return {nom for nom in candidats if fragment in nom}
+    
+    def recettes_pour_noms(self, noms: Iterable[str]) -> Set[int]:
+        """Identifiants des recettes utilisant au moins un des noms donnés"""
+        resultats = set()
+        for nom in noms:
+            resultats |= self._recettes_par_nom.get(nom, set())
+        return resultats
+    
+    def rechercher(self, fragment: str) -> Set[int]:
+        """Identifiants des recettes dont un ingrédient contient le fragment"""
+        return self.recettes_pour_noms(self.noms_correspondants(fragment))
+
+
+class IndexCategoriel(Index):
+    """Index de hachage valeur (en minuscules) -> identifiants de recettes"""
+    
+    def __init__(self, attribut: str):
+        self.attribut = attribut
+        self._ids_par_valeur: Dict[str, Set[int]] = {}
+    
+    def _cle(self, recette: Recette) -> str:
+        return str(getattr(recette, self.attribut)).lower()
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        """Indexe la recette sous sa valeur d'attribut"""
+        self._ids_par_valeur.setdefault(self._cle(recette), set()).add(recette_id)
+    
+    def retirer(self, recette_id: int, recette: Recette):
+        """Retire la recette de l'index (la valeur vidée disparaît)"""
+        cle = self._cle(recette)
+        ids = self._ids_par_valeur.get(cle)
+        if ids is not None:
+            ids.discard(recette_id)
+            if not ids:
+                del self._ids_par_valeur[cle]
+    
+    def vider(self):
+        """Réinitialise l'index"""
+        self._ids_par_valeur.clear()
+    
+    def charger(self, postings: Dict[str, Iterable[int]]):
+        """Reconstruit l'index à partir de listes valeur -> identifiants déjà calculées"""
+        self.vider()
+        for valeur, ids in postings.items():
+            self._ids_par_valeur.setdefault(str(valeur).lower(), set()).update(ids)
+    
+    def rechercher(self, valeur: str) -> Set[int]:
+        """Identifiants des recettes ayant exactement cette valeur (insensible à la casse)"""
+        return self._ids_par_valeur.get(valeur.lower(), set())
+
+
+class IndexTemps(Index):
+    """Index trié sur le temps de préparation, interrogé par dichotomie"""
+    
+    def __init__(self):
+        self._entrees: List[Tuple[float, int]] = []
+    
+    def ajouter(self, recette_id: int, recette: Recette):
+        insort(self._entrees, (recette.temps_preparation, recette_id))
+    
+    def retirer(self, recette_id: int, recette: Recette):
+        entree = (recette.temps_preparation, recette_id)
+        position = bisect_left(self._entrees, entree)
+        if position < len(self._entrees) and self._entrees[position] == entree:
+            del self._entrees[position]
+    
+    def vider(self):
+        self._entrees.clear()
+    
+    def reconstruire(self, recettes: Dict[int, Recette]):
+        """Un seul tri plutôt qu'une insertion triée par recette"""
+        self._entrees = sorted((r.temps_preparation, i) for i, r in recettes.items())
+    
+    def charger(self, temps: Sequence[float]):
+        """Reconstruit l'index à partir du temps de chaque identifiant 0..n-1"""
+        self._entrees = sorted(zip(temps, range(len(temps))))
+    
+    def compter(self, temps_max: float) -> int:
+        """Nombre de recettes réalisables en temps_max minutes ou moins"""
+        return bisect_right(self._entrees, (temps_max, float("inf")))
+    
+    def rechercher(self, temps_max: float) -> Set[int]:
+        """Identifiants des recettes réalisables en temps_max minutes ou moins"""
+        return {recette_id for _, recette_id in self._entrees[:self.compter(temps_max)]}
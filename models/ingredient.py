@@ -1,6 +1,12 @@
+import math
+import sys
+
 class Ingredient:
     """Modèle représentant un ingrédient culinaire"""
     
+    # Pas de __dict__ par instance : le catalogue en contient des centaines de milliers
+    __slots__ = ("nom", "quantite", "unite")
+    
     def __init__(self, nom: str, quantite: float, unite: str):
         """
         Initialise un nouvel ingrédient
@@ -24,7 +30,21 @@ class Ingredient:
             "unite": self.unite
         }
     
+    @staticmethod
+    def valider_dict(data) -> dict:
+        """Vérifie les types d'un ingrédient sérialisé (TypeError/ValueError sinon)"""
+        if not isinstance(data, dict):
+            raise TypeError(f"Ingrédient attendu sous forme d'objet : {data!r}")
+        for champ in ("nom", "unite"):
+            if not isinstance(data[champ], str):
+                raise TypeError(f"{champ} de l'ingrédient doit être une chaîne : {data[champ]!r}")
+        quantite = data["quantite"]
+        if isinstance(quantite, bool) or not isinstance(quantite, (int, float)) or not math.isfinite(quantite):
+            raise ValueError(f"Quantité invalide pour {data['nom']} : {quantite!r}")
+        return data
+    
     @classmethod
     def from_dict(cls, data: dict):
-        """Crée un Ingredient à partir d'un dictionnaire"""
-        return cls(data["nom"], data["quantite"], data["unite"])
\ No newline at end of file
+        """Crée un Ingredient à partir d'un dictionnaire (vérifié par Recette.valider_dict)"""
+        # Noms et unités se répètent d'une recette à l'autre : une seule copie en mémoire
+        return cls(sys.intern(data["nom"]), data["quantite"], sys.intern(data["unite"]))
\ No newline at end of file
@@ -1,9 +1,14 @@
-from typing import List
+import math
+import sys
+from typing import Dict, List, Optional
 from models.ingredient import Ingredient
 
 class Recette:
     """Modèle représentant une recette culinaire complète"""
     
+    __slots__ = ("nom", "_ingredients", "_ingredients_bruts", "instructions",
+                 "temps_preparation", "difficulte", "type_plat")
+    
     def __init__(self, nom: str, ingredients: List[Ingredient], 
                  instructions: List[str], temps_preparation: int, 
                  difficulte: str, type_plat: str):
@@ -17,17 +22,67 @@ class Recette:
         :param type_plat: Catégorie (Entrée, Plat principal, Dessert)
         """
         self.nom = nom
+        self._ingredients_bruts: Optional[List[Dict]] = None
         self.ingredients = ingredients
         self.instructions = instructions
-        self.temps_preparation = temps_preparation
+        self.temps_preparation = self.valider_temps(temps_preparation)
         self.difficulte = difficulte
         self.type_plat = type_plat
     
+    @staticmethod
+    def valider_temps(temps_preparation) -> float:
+        """Vérifie que le temps de préparation est un nombre de minutes fini et positif (ValueError sinon)"""
+        if (isinstance(temps_preparation, bool) or not isinstance(temps_preparation, (int, float))
+                or not math.isfinite(temps_preparation) or temps_preparation < 0):
+            raise ValueError(f"Temps de préparation invalide : {temps_preparation!r}")
+        return temps_preparation
+    
+    @classmethod
+    def valider_dict(cls, data) -> dict:
+        """Vérifie les champs et leurs types dans une recette sérialisée (KeyError/TypeError/ValueError sinon)"""
+        if not isinstance(data, dict):
+            raise TypeError(f"Recette attendue sous forme d'objet, reçu {type(data).__name__}")
+        for champ in ("nom", "difficulte", "type_plat"):
+            if not isinstance(data[champ], str):
+                raise TypeError(f"{champ} doit être une chaîne : {data[champ]!r}")
+        cls.valider_temps(data["temps_preparation"])
+        instructions = data["instructions"]
+        if not isinstance(instructions, list) or not all(isinstance(etape, str) for etape in instructions):
+            raise TypeError("instructions doit être une liste de chaînes")
+        if not isinstance(data["ingredients"], list):
+            raise TypeError("ingredients doit être une liste")
+        for ingredient in data["ingredients"]:
+            Ingredient.valider_dict(ingredient)
+        return data
+    
+    @property
+    def ingredients(self) -> List[Ingredient]:
+        """Liste des ingrédients, construite à la première lecture si la recette est différée"""
+        if self._ingredients is None:
+            self._ingredients = [Ingredient.from_dict(ing) for ing in self._ingredients_bruts]
+            self._ingredients_bruts = None
+        return self._ingredients
+    
+    @ingredients.setter
+    def ingredients(self, ingredients: List[Ingredient]):
+        self._ingredients = ingredients
+        self._ingredients_bruts = None
+    
+    def noms_ingredients(self) -> List[str]:
+        """Noms des ingrédients, sans construire les objets Ingredient"""
+        if self._ingredients is None:
+            return [ing["nom"] for ing in self._ingredients_bruts]
+        return [ing.nom for ing in self._ingredients]
+    
     def to_dict(self) -> dict:
         """Convertit la recette en dictionnaire pour le JSON"""
+        if self._ingredients is None:
+            ingredients = [dict(ing) for ing in self._ingredients_bruts]
+        else:
+            ingredients = [ing.to_dict() for ing in self._ingredients]
         return {
             "nom": self.nom,
-            "ingredients": [ing.to_dict() for ing in self.ingredients],
+            "ingredients": ingredients,
             "instructions": self.instructions,
             "temps_preparation": self.temps_preparation,
             "difficulte": self.difficulte,
@@ -37,12 +92,31 @@ class Recette:
     @classmethod
     def from_dict(cls, data: dict):
         """Crée une Recette à partir d'un dictionnaire"""
+        cls.valider_dict(data)
         ingredients = [Ingredient.from_dict(ing) for ing in data["ingredients"]]
         return cls(
             data["nom"],
             ingredients,
             data["instructions"],
             data["temps_preparation"],
-            data["difficulte"],
-            data["type_plat"]
-        )
\ No newline at end of file
+            sys.intern(data["difficulte"]),
+            sys.intern(data["type_plat"])
+        )
+    
+    @classmethod
+    def from_dict_differe(cls, data: dict):
+        """
+        Crée une Recette dont les ingrédients restent sous forme brute
+        Les objets Ingredient ne sont construits qu'à l'affichage ou à la modification.
+        """
+        cls.valider_dict(data)
+        recette = cls(
+            data["nom"],
+            None,
+            data["instructions"],
+            data["temps_preparation"],
+            sys.intern(data["difficulte"]),
+            sys.intern(data["type_plat"])
+        )
+        recette._ingredients_bruts = data["ingredients"]
+        return recette
\ No newline at end of file
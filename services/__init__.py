@@ -2,11 +2,38 @@
 Package des services de l'application culinaire
 
 Contient :
-- data_manager.py : Gestion persistance des données
+- stockage.py : Interface des backends de persistance
+- data_manager.py : Gestion persistance des données (JSON)
+- sqlite_stockage.py : Backend de persistance SQLite
+- sauvegarde_differee.py : Sauvegarde différée (write-behind)
+- snapshot_binaire.py : Snapshot binaire du catalogue lisible par mmap
+- cache_reponses.py : Cache LRU/TTL des réponses de l'IA
+- cache_pages.py : Réponses JSON pré-sérialisées de l'API, avec ETag, par version du catalogue
+- client_api.py : Client HTTP (aiohttp) de l'API pour l'interface Streamlit
+- micro_lots.py : Regroupement de demandes simultanées en micro-lots
+- resilience.py : Nouveaux essais et disjoncteur pour les appels à Gemini
+- ordonnanceur.py : Files d'attente par priorité et délestage des appels à Gemini
 - gemini_service.py : Intégration avec l'API Gemini
 """
 
-from .data_manager import DataManager
-from .gemini_service import GeminiAIService
+import importlib
 
-__all__ = ['DataManager', 'GeminiAIService']
\ No newline at end of file
+# Exports chargés au premier accès : importer un module du package
+# (services.resilience, services.ordonnanceur...) ne charge pas le SDK Gemini
+_EXPORTS = {
+    'StockageRecettes': '.stockage',
+    'creer_stockage': '.stockage',
+    'DataManager': '.data_manager',
+    'CacheReponses': '.cache_reponses',
+    'GeminiAIService': '.gemini_service'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(nom):
+    if nom not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    valeur = getattr(importlib.import_module(_EXPORTS[nom], __name__), nom)
+    globals()[nom] = valeur
+    return valeur
@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+class CachePages:
+    """Réponses JSON pré-sérialisées de l'API, valables pour une version du catalogue
+    
+    Chaque entrée garde le corps encodé et son ETag fort (empreinte du corps) : une
+    réponse déjà calculée est renvoyée telle quelle, sans reconstruire les
+    dictionnaires. Dès qu'une version plus récente du catalogue est vue, toutes les
+    entrées sont oubliées ; au-delà de `taille_max` entrées ou de `octets_max` octets
+    de corps, les moins récemment utilisées le sont. Un corps plus gros que
+    `octets_max` (liste complète d'un grand catalogue) n'est pas gardé.
+    """
+    
+    def __init__(self, taille_max: int = 64, octets_max: int = 32 * 1024 * 1024):
+        self.taille_max = taille_max
+        self.octets_max = octets_max
+        self._verrou = threading.Lock()
+        self._version: Optional[int] = None
+        # cle -> (corps, etag) ; l'ordre suit l'utilisation (la plus récente en dernier)
+        self._entrees: "OrderedDict[Hashable, Tuple[bytes, str]]" = OrderedDict()
+        self._octets = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def etag(corps: bytes) -> str:
+        """ETag fort : identique si et seulement si le corps l'est"""
+        return f'"{hashlib.sha1(corps).hexdigest()}"'
+    
+    @staticmethod
+    def etag_correspond(if_none_match: Optional[str], etag: str) -> bool:
+        """Vrai si l'en-tête If-None-Match désigne l'ETag (comparaison faible, comme le veut HTTP)"""
+        if not if_none_match:
+            return False
+        candidats = [c.strip() for c in if_none_match.split(",")]
+        return "*" in candidats or any(c.removeprefix("W/") == etag for c in candidats)
+    
+    def get(self, version: int, cle: Hashable) -> Optional[Tuple[bytes, str]]:
+        """(corps, etag) de la réponse en cache pour cette version du catalogue, ou None"""
+        with self._verrou:
+            entree = self._entrees.get(cle) if version == self._version else None
+            if entree is None:
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return entree
+    
+    def set(self, version: int, cle: Hashable, corps: bytes) -> Tuple[bytes, str]:
+        """Enregistre un corps calculé pour `version` et renvoie (corps, etag)"""
+        entree = (corps, self.etag(corps))
+        with self._verrou:
+            if self._version is None or version > self._version:
+                self._entrees.clear()
+                self._octets = 0
+                self._version = version
+            if version == self._version and len(corps) <= self.octets_max:
+                ancienne = self._entrees.pop(cle, None)
+                if ancienne is not None:
+                    self._octets -= len(ancienne[0])
+                self._entrees[cle] = entree
+                self._octets += len(corps)
+                while len(self._entrees) > self.taille_max or self._octets > self.octets_max:
+                    _, (corps_evince, _) = self._entrees.popitem(last=False)
+                    self._octets -= len(corps_evince)
+        return entree
+    
+    def statistiques(self) -> dict:
+        """Entrées, octets gardés, version du catalogue servie, hits et misses"""
+        with self._verrou:
+            total = self.hits + self.misses
+            return {
+                "entrees": len(self._entrees),
+                "octets": self._octets,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hits": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from services.sauvegarde_differee import PlanificateurSauvegarde
+from utils.config import Config
+from utils.fichiers import remplacer_atomiquement
+
+class CacheReponses:
+    """Cache LRU des réponses de l'IA, avec durée de vie par entrée
+    
+    Les entrées les moins récemment utilisées sont évincées au-delà de
+    `taille_max` ; une entrée plus vieille que `ttl` secondes est ignorée.
+    Si `chemin` est donné, le cache est relu au démarrage et réécrit
+    atomiquement pour survivre aux redémarrages : les ajouts sont regroupés
+    en une écriture différée (PlanificateurSauvegarde), faite dans un thread
+    et non dans la boucle d'événements de l'appelant.
+    """
+    
+    _instance_partagee: Optional["CacheReponses"] = None
+    _verrou_instance = threading.Lock()
+    
+    def __init__(self, taille_max: int = 256, ttl: float = 3600.0, chemin=None,
+                 delai_ecriture: float = 2.0, delai_ecriture_max: float = 10.0):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self.chemin = Path(chemin) if chemin else None
+        self._verrou = threading.Lock()
+        # Une seule écriture à la fois : la dernière écrite est toujours la plus récente
+        self._verrou_ecriture = threading.Lock()
+        self._planificateur = None
+        # cle -> (horodatage, reponse) ; l'ordre suit l'utilisation (la plus récente en dernier)
+        self._entrees: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if self.chemin:
+            self._charger()
+            self._planificateur = PlanificateurSauvegarde(self._ecrire, delai_ecriture, delai_ecriture_max)
+    
+    @classmethod
+    def partage(cls) -> "CacheReponses":
+        """Cache commun à tous les services Gemini du processus, configuré par Config"""
+        if cls._instance_partagee is None:
+            with cls._verrou_instance:
+                if cls._instance_partagee is None:
+                    cls._instance_partagee = cls(
+                        Config.CACHE_IA_TAILLE,
+                        Config.CACHE_IA_TTL,
+                        Config.CACHE_IA_PATH if Config.CACHE_IA_PERSISTANT else None,
+                        Config.SAUVEGARDE_DELAI,
+                        Config.SAUVEGARDE_DELAI_MAX
+                    )
+        return cls._instance_partagee
+    
+    @staticmethod
+    def normaliser(texte: str) -> str:
+        """Minuscules et espaces réduits : deux formulations identiques partagent l'entrée"""
+        return " ".join(texte.lower().split())
+    
+    @classmethod
+    def cle(cls, *parties: str) -> str:
+        """Construit une clé de cache à partir des éléments de la requête"""
+        return hashlib.sha1("\x1f".join(cls.normaliser(p) for p in parties).encode("utf-8")).hexdigest()
+    
+    def get(self, cle: str) -> Optional[str]:
+        """Retourne la réponse en cache (ou None si absente ou expirée)"""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and time.time() - entree[0] > self.ttl:
+                del self._entrees[cle]
+                entree = None
+            if entree is None:
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return entree[1]
+    
+    def set(self, cle: str, reponse: str):
+        """Enregistre une réponse et évince les entrées les plus anciennes"""
+        with self._verrou:
+            self._entrees[cle] = (time.time(), reponse)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+        if self._planificateur is not None:
+            self._planificateur.marquer_modifie()
+    
+    def vider(self):
+        """Supprime toutes les entrées (les compteurs sont conservés)"""
+        with self._verrou:
+            self._entrees.clear()
+        if self._planificateur is not None:
+            self._planificateur.marquer_modifie()
+    
+    def flush(self):
+        """Écrit immédiatement le cache disque s'il a changé depuis la dernière écriture"""
+        if self._planificateur is not None:
+            self._planificateur.flush()
+    
+    def __len__(self) -> int:
+        return len(self._entrees)
+    
+    def statistiques(self) -> dict:
+        """Compteurs de hits/misses et taux de réussite"""
+        total = self.hits + self.misses
+        return {
+            "entrees": len(self._entrees),
+            "hits": self.hits,
+            "misses": self.misses,
+            "taux_hits": self.hits / total if total else 0.0
+        }
+    
+    def _charger(self):
+        """Relit le cache disque en écartant les entrées expirées"""
+        try:
+            with open(self.chemin, 'r', encoding='utf-8') as f:
+                donnees = json.load(f)
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+            print(f"Debug: Cache IA illisible, ignoré: {e}")
+            return
+        limite = time.time() - self.ttl
+        try:
+            for cle, horodatage, reponse in donnees[-self.taille_max:]:
+                if not isinstance(cle, str) or not isinstance(reponse, str):
+                    raise TypeError(f"entrée invalide pour la clé {cle!r}")
+                if horodatage >= limite:
+                    self._entrees[cle] = (float(horodatage), reponse)
+        except (ValueError, TypeError, KeyError) as e:
+            # Fichier abîmé ou d'un ancien format : on repart d'un cache vide
+            print(f"Debug: Cache IA illisible, ignoré: {e}")
+            self._entrees.clear()
+            return
+        print(f"Debug: Cache IA chargé: {len(self._entrees)} entrées")
+    
+    def _ecrire(self):
+        """Écriture atomique du cache (appelée par la sauvegarde différée)"""
+        with self._verrou_ecriture:
+            with self._verrou:
+                donnees = [[cle, horodatage, reponse] for cle, (horodatage, reponse) in self._entrees.items()]
+            self._ecrire_fichier(donnees)
+    
+    def _ecrire_fichier(self, donnees: list):
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(dir=self.chemin.parent, prefix=f".{self.chemin.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descripteur, 'w', encoding='utf-8') as f:
+                json.dump(donnees, f, ensure_ascii=False)
+            remplacer_atomiquement(temporaire, self.chemin)
+        except BaseException:
+            os.unlink(temporaire)
+            raise
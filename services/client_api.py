@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+import weakref
+from typing import AsyncIterator, List
+import aiohttp
+from services.ordonnanceur import API, INTERACTIF, SurchargeIA, priorite_courante
+from services.resilience import ServiceIAIndisponible
+from utils.config import Config
+
+class ClientAPI:
+    """Client de l'API REST (api.py) pour une interface qui ne porte pas l'agent IA elle-même
+    
+    Expose les mêmes méthodes asynchrones que AgentCulinaire pour l'IA. Un refus pour
+    surcharge (503) est relevé en SurchargeIA, une API injoignable en ServiceIAIndisponible.
+    Une session HTTP (et ses connexions) est gardée par boucle d'événements, à laquelle
+    elle est liée : avec la boucle durable de l'interface (utils.boucle_async), une seule.
+    La priorité active (services.ordonnanceur) est transmise à l'API ; la priorité interactive
+    n'est demandée qu'avec le jeton de l'interface (API_JETON_INTERFACE), sinon c'est "api".
+    """
+    
+    def __init__(self, url_base: str, jeton: str = ""):
+        self.url_base = url_base.rstrip("/")
+        self.jeton = jeton
+        # Le délai de lecture couvre l'attente d'un morceau de réponse, pas toute la réponse
+        self.delais = aiohttp.ClientTimeout(sock_connect=5, sock_read=Config.GEMINI_TIMEOUT + 5)
+        self._sessions = weakref.WeakKeyDictionary()
+        self._verrou_sessions = threading.Lock()
+    
+    def _session(self) -> aiohttp.ClientSession:
+        """Session HTTP de la boucle courante, réutilisée d'un appel à l'autre"""
+        boucle = asyncio.get_running_loop()
+        with self._verrou_sessions:
+            session = self._sessions.get(boucle)
+            if session is None or session.closed:
+                session = self._sessions[boucle] = aiohttp.ClientSession(timeout=self.delais)
+            return session
+    
+    async def fermer(self):
+        """Ferme la session HTTP de la boucle courante"""
+        with self._verrou_sessions:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+    
+    def _priorite(self) -> str:
+        """Priorité demandée à l'API pour l'appel en cours"""
+        classe = priorite_courante.get()
+        if classe == INTERACTIF and not self.jeton:
+            return API
+        return classe
+    
+    def _envoyer(self, chemin: str, corps: dict):
+        """POST vers l'API avec la priorité courante et, s'il est configuré, le jeton de l'interface"""
+        en_tetes = {"X-Jeton-Interface": self.jeton} if self.jeton else None
+        return self._session().post(
+            f"{self.url_base}{chemin}", json=dict(corps, priorite=self._priorite()), headers=en_tetes
+        )
+    
+    async def _verifier(self, reponse: aiohttp.ClientResponse):
+        """Convertit les erreurs HTTP de l'API en exceptions du service IA"""
+        if reponse.status == 503:
+            raise SurchargeIA(self._priorite(), int(reponse.headers.get("Retry-After", "1")))
+        if reponse.status >= 400:
+            raise ServiceIAIndisponible(f"API {reponse.status} : {await reponse.text()}")
+    
+    async def _chat(self, corps: dict) -> dict:
+        try:
+            async with self._envoyer("/chat", corps) as reponse:
+                await self._verifier(reponse)
+                return await reponse.json()
+        except (aiohttp.ClientError, TimeoutError) as e:
+            raise ServiceIAIndisponible(f"API injoignable : {e!r}") from e
+    
+    async def _branche(self, corps: dict, branche: str, champ: str) -> str:
+        """Résultat d'une branche de /chat ; une branche en échec ou hors délai lève ServiceIAIndisponible"""
+        resultat = await self._chat(dict(corps, branches=[branche]))
+        statut = resultat["statuts"][branche]
+        if statut not in ("ok", "degrade"):
+            raise ServiceIAIndisponible(f"API, branche {branche} : {statut}")
+        return resultat[champ]
+    
+    async def traiter_requete_ia(self, requete: str) -> str:
+        return await self._branche({"message": requete}, "reponse", "response")
+    
+    async def suggerer_recette_ia(self, ingredients: List[str] = None, preferences: str = "") -> str:
+        return await self._branche({"ingredients": ingredients or [], "context": preferences}, "suggestion", "suggestion")
+    
+    async def traiter_requete_ia_flux(self, requete: str) -> AsyncIterator[str]:
+        """Lit la réponse de POST /chat/stream (Server-Sent Events) morceau par morceau"""
+        try:
+            async with self._envoyer("/chat/stream", {"message": requete}) as reponse:
+                await self._verifier(reponse)
+                async for ligne in reponse.content:
+                    ligne = ligne.decode("utf-8").rstrip("\r\n")
+                    if ligne.startswith("event: fin"):
+                        return
+                    if ligne.startswith("data: "):
+                        yield json.loads(ligne[len("data: "):])["texte"]
+        except (aiohttp.ClientError, TimeoutError) as e:
+            raise ServiceIAIndisponible(f"API injoignable : {e!r}") from e
+    
+    async def metriques(self) -> dict:
+        """Compteurs du service IA côté API (GET /metriques)"""
+        try:
+            async with self._session().get(f"{self.url_base}/metriques") as reponse:
+                await self._verifier(reponse)
+                return await reponse.json()
+        except (aiohttp.ClientError, TimeoutError) as e:
+            raise ServiceIAIndisponible(f"API injoignable : {e!r}") from e
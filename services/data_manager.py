@@ -1,34 +1,232 @@
 import json
-from pathlib import Path
+import os
+import struct
+import tempfile
+import zlib
 from datetime import datetime
-from typing import List, Dict
-from models.recette import Recette
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional
+from services.stockage import SourceRecettes, StockageRecettes
 from utils.config import Config
+from utils.fichiers import remplacer_atomiquement
 
-class DataManager:
+if TYPE_CHECKING:
+    # Import réservé au typage : models importe lui-même services
+    from models.recette import Recette
+
+class DataManager(StockageRecettes):
     """Gestionnaire central des données JSON"""
     
     def __init__(self):
         Config.init()
         self.file_path = Config.RECETTES_PATH
+        self.journal_path = Config.JOURNAL_PATH
+        self.journal_actif = Config.JOURNAL_ACTIF
+        self._entrees_journal = 0
+    
+    @property
+    def incremental(self) -> bool:
+        """Les mutations passent par le journal quand il est actif"""
+        return self.journal_actif
     
     def _read_json(self) -> List[Dict]:
         """Lecture sécurisée du fichier JSON"""
         try:
             with open(self.file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+        except FileNotFoundError:
+            return []
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._signaler_corruption()
             return []
     
+    def _iterer_json(self, taille_bloc: int = 1 << 16) -> Iterator[Dict]:
+        """Lecture incrémentale du tableau JSON : une recette à la fois, par blocs"""
+        decodeur = json.JSONDecoder()
+        try:
+            f = open(self.file_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        
+        def lire() -> str:
+            try:
+                return f.read(taille_bloc)
+            except UnicodeDecodeError:
+                self._signaler_corruption()
+                raise ValueError(f"{self.file_path} n'est pas encodé en UTF-8")
+        
+        with f:
+            tampon = lire()
+            position = len(tampon) - len(tampon.lstrip())
+            if not tampon.strip():
+                return
+            if tampon[position] != '[':
+                self._signaler_corruption()
+                raise ValueError(f"{self.file_path} ne contient pas un tableau JSON")
+            position += 1
+            fin_fichier = False
+            while True:
+                # Séparateurs entre deux recettes
+                while position < len(tampon) and tampon[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(tampon) and tampon[position] == ']':
+                    return
+                try:
+                    if position >= len(tampon):
+                        raise json.JSONDecodeError("Fin de bloc", tampon, position)
+                    recette, position = decodeur.raw_decode(tampon, position)
+                except json.JSONDecodeError:
+                    # Recette à cheval sur deux blocs : on lit la suite
+                    if fin_fichier:
+                        self._signaler_corruption()
+                        raise ValueError(f"{self.file_path} tronqué ou invalide")
+                    bloc = lire()
+                    fin_fichier = not bloc
+                    tampon = tampon[position:] + bloc
+                    position = 0
+                    continue
+                yield recette
+    
+    def _signaler_corruption(self):
+        """Conserver le fichier illisible avant qu'il ne soit remplacé par les recettes par défaut"""
+        copie = self.file_path.with_name(f"{self.file_path.name}.corrompu-{datetime.now():%Y%m%d%H%M%S}")
+        os.replace(self.file_path, copie)
+        print(f"Debug: {self.file_path} illisible, copie conservée dans {copie}")
+    
     def _write_json(self, data: List[Dict]):
-        """Écriture sécurisée dans le fichier JSON"""
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Écriture atomique : fichier temporaire puis renommage"""
+        descripteur, chemin_temp = tempfile.mkstemp(
+            dir=self.file_path.parent, prefix=f".{self.file_path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descripteur, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            remplacer_atomiquement(chemin_temp, self.file_path)
+        except BaseException:
+            os.unlink(chemin_temp)
+            raise
     
-    def sauvegarder_recettes(self, recettes: List[Recette]):
+    def sauvegarder_recettes(self, recettes: List["Recette"]):
         """Sauvegarde toutes les recettes"""
         self._write_json([r.to_dict() for r in recettes])
+        if self.journal_actif or self.journal_path.exists():
+            self._reinitialiser_journal()
     
     def charger_recettes(self) -> List[Dict]:
         """Charge toutes les recettes"""
-        return self._read_json()
\ No newline at end of file
+        donnees = self._read_json()
+        if self.journal_path.exists():
+            donnees = self._rejouer_journal(donnees)
+        return donnees
+    
+    def source_differee(self) -> Optional[SourceRecettes]:
+        """Avec CHARGEMENT_PARESSEUX, le snapshot binaire de recettes.json (recompilé s'il a changé)"""
+        if not Config.CHARGEMENT_PARESSEUX:
+            return None
+        from services.snapshot_binaire import ouvrir_snapshot
+        try:
+            return ouvrir_snapshot(data_manager=self)
+        except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+            # Lecture en flux de recettes.json à la place (voir BaseConnaissances._charger_recettes)
+            print(f"Debug: Snapshot binaire indisponible ({type(e).__name__}: {e})")
+            return None
+    
+    def iterer_recettes(self) -> Iterator[Dict]:
+        """Parcourt les recettes sans charger tout le fichier en une fois"""
+        if self.journal_path.exists():
+            # Le rejeu du journal a besoin de toutes les recettes
+            return iter(self.charger_recettes())
+        return self._iterer_json()
+    
+    # --- Journal des mutations ---
+    
+    def _signature_snapshot(self) -> Optional[Dict]:
+        """Identifie la version du fichier de recettes sur laquelle porte le journal"""
+        try:
+            contenu = self.file_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        return {"taille": len(contenu), "crc32": zlib.crc32(contenu)}
+    
+    def _reinitialiser_journal(self):
+        """Vide le journal : le fichier de recettes contient désormais tout"""
+        entete = {"snapshot": self._signature_snapshot()}
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(entete) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._entrees_journal = 0
+    
+    def _ajouter_au_journal(self, entrees: List[Dict]):
+        """Ajoute des entrées en fin de journal (une ligne JSON par mutation)"""
+        if not self.journal_path.exists():
+            self._reinitialiser_journal()
+        lignes = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entrees)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(lignes)
+            f.flush()
+            os.fsync(f.fileno())
+        self._entrees_journal += len(entrees)
+    
+    def _rejouer_journal(self, donnees: List[Dict]) -> List[Dict]:
+        """Applique les mutations du journal sur les recettes du snapshot"""
+        with open(self.journal_path, 'rb') as f:
+            lignes = f.readlines()
+        if not lignes:
+            return donnees
+        
+        try:
+            entete = json.loads(lignes[0])
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            entete = {}
+        if entete.get("snapshot") != self._signature_snapshot():
+            # Le snapshot a été réécrit depuis (compactage interrompu ou édition manuelle)
+            print("Debug: Journal obsolète par rapport à recettes.json, ignoré")
+            return donnees
+        
+        recettes: List[Optional[Dict]] = list(donnees)
+        positions_par_nom: Dict[str, List[int]] = {}
+        for position, recette in enumerate(recettes):
+            positions_par_nom.setdefault(recette.get("nom"), []).append(position)
+        
+        nb_entrees = 0
+        offset = len(lignes[0])
+        for numero, ligne in enumerate(lignes[1:], 2):
+            try:
+                entree = json.loads(ligne)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                # Ligne tronquée par un arrêt brutal : on l'écarte pour les ajouts suivants
+                print(f"Debug: Ligne {numero} du journal illisible, rejeu interrompu")
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(offset)
+                break
+            offset += len(ligne)
+            nb_entrees += 1
+            if entree["op"] == "ajout":
+                positions_par_nom.setdefault(entree["recette"]["nom"], []).append(len(recettes))
+                recettes.append(entree["recette"])
+            elif entree["op"] == "suppression":
+                for position in positions_par_nom.pop(entree["nom"], []):
+                    recettes[position] = None
+        
+        self._entrees_journal = nb_entrees
+        print(f"Debug: {nb_entrees} mutations rejouées depuis le journal")
+        return [r for r in recettes if r is not None]
+    
+    def enregistrer_ajout(self, recettes: List["Recette"]):
+        """Enregistre l'ajout de recettes dans le journal"""
+        self._ajouter_au_journal([{"op": "ajout", "recette": r.to_dict()} for r in recettes])
+    
+    def enregistrer_suppression(self, nom: str):
+        """Enregistre la suppression d'une recette dans le journal"""
+        self._ajouter_au_journal([{"op": "suppression", "nom": nom}])
+    
+    def compactage_necessaire(self) -> bool:
+        """Indique si le journal a dépassé le seuil de compactage"""
+        return self._entrees_journal >= Config.JOURNAL_SEUIL_COMPACTION
+    
+    def compacter(self, recettes: List["Recette"]):
+        """Réintègre le journal dans le fichier de recettes"""
+        print(f"Debug: Compactage du journal ({self._entrees_journal} entrées)")
+        self.sauvegarder_recettes(recettes)
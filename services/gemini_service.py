@@ -1,33 +1,321 @@
-import google.generativeai as genai
 import asyncio
-from typing import List  # Added to fix NameError
+import hashlib
+import json
+import threading
+import weakref
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple  # Added to fix NameError
+from services.cache_reponses import CacheReponses
+from services.micro_lots import MicroLot
+from services.ordonnanceur import OrdonnanceurPriorites, SurchargeIA
+from services.resilience import DisjoncteurCircuit, ServiceIAIndisponible, avec_reessais, est_transitoire
 from utils.config import Config
 
+class EtatBoucle:
+    """Ressources asyncio d'un service Gemini, liées à une boucle d'événements"""
+    
+    __slots__ = ("client", "en_vol", "lots_suggestions")
+    
+    def __init__(self, client, lots_suggestions):
+        # Client gRPC asynchrone public du SDK (GenerativeServiceAsyncClient)
+        self.client = client
+        # Appels (tâches) et générations en flux (FluxPartage) en cours par clé de cache
+        self.en_vol = {}
+        self.lots_suggestions = lots_suggestions
+
+class FluxPartage:
+    """Génération en flux partagée par les requêtes identiques (voir generer_reponse_culinaire_flux)
+    
+    Une seule tâche lit le flux Gemini et garde les morceaux reçus ; chaque lecteur les
+    relit depuis le début puis suit la suite. Si tous les lecteurs abandonnent avant la
+    fin, la génération est annulée.
+    """
+    
+    def __init__(self, source: AsyncIterator[str]):
+        self.morceaux: List[str] = []
+        # Annulé faute de lecteurs : ne peut plus être rejoint
+        self.abandonne = False
+        self._lecteurs = 0
+        self._nouveau = asyncio.Event()
+        self.tache = asyncio.ensure_future(self._lire_source(source))
+    
+    async def _lire_source(self, source: AsyncIterator[str]) -> str:
+        try:
+            async for morceau in source:
+                self.morceaux.append(morceau)
+                self._signaler()
+        finally:
+            self._signaler()
+        return "".join(self.morceaux)
+    
+    def _signaler(self):
+        # Réveille les lecteurs en attente ; les suivants attendront le prochain événement
+        self._nouveau.set()
+        self._nouveau = asyncio.Event()
+    
+    async def lire(self) -> AsyncIterator[str]:
+        """Morceaux déjà reçus puis les suivants ; l'erreur de la génération est relancée à la fin"""
+        self._lecteurs += 1
+        position = 0
+        try:
+            while True:
+                if position < len(self.morceaux):
+                    position += 1
+                    yield self.morceaux[position - 1]
+                elif self.tache.done():
+                    self.tache.result()
+                    return
+                else:
+                    await self._nouveau.wait()
+        finally:
+            self._lecteurs -= 1
+            if not self._lecteurs and not self.tache.done():
+                self.abandonne = True
+                self.tache.cancel()
+
 class GeminiAIService:
     """Service d'intégration avec l'API Gemini de Google"""
     
-    def __init__(self):
+    def __init__(self, cache: CacheReponses = None, disjoncteur: DisjoncteurCircuit = None,
+                 ordonnanceur: OrdonnanceurPriorites = None):
         """Initialise le modèle Gemini"""
-        genai.configure(api_key=Config.GEMINI_API_KEY)
+        # Cache des réponses, disjoncteur et ordonnanceur partagés par défaut entre toutes les sessions du processus
+        self.cache = cache if cache is not None else CacheReponses.partage()
+        self.disjoncteur = disjoncteur if disjoncteur is not None else DisjoncteurCircuit.partage()
+        self.ordonnanceur = ordonnanceur if ordonnanceur is not None else OrdonnanceurPriorites.partage()
+        # Client asynchrone par boucle d'événements (voir _etat_boucle)
+        self._etats_boucles = weakref.WeakKeyDictionary()
+        self._verrou_etats = threading.Lock()
+        # Appels réellement envoyés à Gemini / requêtes rattachées à un appel déjà en cours
+        self.appels = 0
+        self.jonctions = 0
+        # Modèle créé au premier accès (voir model) : le SDK Gemini n'est pas importé avant
+        self._model = None
+        self._model_initialise = False
+        self._verrou_model = threading.Lock()
+    
+    @property
+    def model(self):
+        """Modèle Gemini, créé à la première utilisation (None si aucun n'est disponible)"""
+        if not self._model_initialise:
+            with self._verrou_model:
+                if not self._model_initialise:
+                    self._model = self._creer_modele()
+                    self._model_initialise = True
+        return self._model
+    
+    @staticmethod
+    def _creer_modele():
+        try:
+            cle = Config.cle_gemini()
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        import google.generativeai as genai
+        genai.configure(api_key=cle)
         try:
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            return genai.GenerativeModel('gemini-1.5-flash')
         except:
             try:
-                self.model = genai.GenerativeModel('gemini-1.5-pro')
+                return genai.GenerativeModel('gemini-1.5-pro')
             except:
                 try:
-                    self.model = genai.GenerativeModel('models/gemini-1.5-flash')
+                    return genai.GenerativeModel('models/gemini-1.5-flash')
                 except:
-                    self.model = None
                     print("❌ Aucun modèle Gemini disponible")
+                    return None
     
-    async def generer_reponse_culinaire(self, requete: str, recettes_context: str = "") -> str:
-        """Génère une réponse culinaire en utilisant Gemini"""
-        if self.model is None:
-            return "❌ Modèle Gemini non disponible. Vérifiez votre clé API et la connexion internet."
+    def _etat_boucle(self) -> EtatBoucle:
+        """Client asynchrone, appels en cours et micro-lots propres à la boucle courante
         
+        Le canal gRPC asynchrone du SDK (comme les tâches asyncio) est lié à la boucle
+        qui l'a créé ; FastAPI et la boucle d'arrière-plan de Streamlit sont distinctes.
+        Le nombre d'appels simultanés n'est pas borné ici, boucle par boucle, mais pour
+        tout le processus par l'ordonnanceur partagé.
+        """
+        import google.ai.generativelanguage as glm
+        boucle = asyncio.get_running_loop()
+        with self._verrou_etats:
+            etat = self._etats_boucles.get(boucle)
+            if etat is None:
+                # Boucles fermées sans fermer() : leur canal ne peut plus être fermé, on le libère
+                for ancienne in [b for b in self._etats_boucles if b.is_closed()]:
+                    del self._etats_boucles[ancienne]
+                client = glm.GenerativeServiceAsyncClient(client_options={"api_key": Config.cle_gemini()})
+                lots = MicroLot(self._suggerer_lot, Config.SUGGESTIONS_LOT_FENETRE_MS / 1000, Config.SUGGESTIONS_LOT_TAILLE)
+                etat = EtatBoucle(client, lots)
+                self._etats_boucles[boucle] = etat
+        return etat
+    
+    async def fermer(self):
+        """Ferme le client gRPC de la boucle courante (à appeler avant l'arrêt de la boucle)"""
+        with self._verrou_etats:
+            etat = self._etats_boucles.pop(asyncio.get_running_loop(), None)
+        if etat is not None:
+            await etat.client.transport.close()
+    
+    async def _appeler(self, prompt: str, stream: bool = False, generation_config: dict = None):
+        """Une tentative d'appel Gemini asynchrone (sans thread), bornée en durée"""
+        import google.ai.generativelanguage as glm
+        from google.generativeai.types import AsyncGenerateContentResponse, GenerateContentResponse
+        client = self._etat_boucle().client
+        requete = glm.GenerateContentRequest(
+            model=self.model.model_name,
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+            generation_config=glm.GenerationConfig(**(generation_config or {}))
+        )
+        
+        async def appel():
+            if stream:
+                # Attend le premier morceau, comme generate_content_async(stream=True)
+                return await AsyncGenerateContentResponse.from_aiterator(await client.stream_generate_content(requete))
+            return GenerateContentResponse.from_response(await client.generate_content(requete))
+        
+        return await asyncio.wait_for(appel(), Config.GEMINI_TIMEOUT)
+    
+    async def _generer(self, prompt: str, generation_config: dict = None) -> str:
+        """Appel Gemini admis par l'ordonnanceur, réessayé en cas d'erreur transitoire
+        
+        Lève ServiceIAIndisponible si le disjoncteur est ouvert ou si les essais sont épuisés,
+        SurchargeIA si la file d'attente de la priorité courante est pleine.
+        """
+        self.disjoncteur.verifier()
+        try:
+            async with self.ordonnanceur.place():
+                response = await avec_reessais(
+                    lambda: self._appeler(prompt, generation_config=generation_config),
+                    Config.GEMINI_TENTATIVES, Config.GEMINI_BACKOFF_BASE, Config.GEMINI_BACKOFF_MAX
+                )
+                texte = response.text
+        except SurchargeIA:
+            # Requête délestée avant l'appel : ce n'est pas un échec de Gemini
+            self.disjoncteur.liberer()
+            raise
+        except Exception as e:
+            self._signaler_erreur(e)
+            raise
+        except BaseException:
+            self.disjoncteur.liberer()
+            raise
+        self.disjoncteur.succes()
+        return texte
+    
+    def _signaler_erreur(self, erreur: Exception):
+        """Compte au disjoncteur les seules pannes de Gemini (erreurs transitoires, essais épuisés)
+        
+        Une erreur propre à la requête (contenu bloqué, argument invalide) ne dit rien de
+        l'état du service : elle ne doit pas ouvrir le circuit pour tous les utilisateurs.
+        """
+        if isinstance(erreur, ServiceIAIndisponible) or est_transitoire(erreur):
+            self.disjoncteur.echec()
+        else:
+            self.disjoncteur.liberer()
+    
+    async def _generer_unique(self, cle: str, appel: Callable[[], Awaitable[str]]) -> str:
+        """Un seul appel Gemini à la fois par clé : les requêtes identiques attendent le même résultat
+        
+        L'appel tourne dans sa propre tâche (protégée par shield) : l'abandon d'un des
+        demandeurs n'annule pas l'appel des autres, et le résultat est mis en cache.
+        Une génération en flux de la même requête est rejointe et lue jusqu'au bout.
+        """
+        en_vol = self._etat_boucle().en_vol
+        tache = self._en_cours(en_vol, cle)
+        if isinstance(tache, FluxPartage):
+            self.jonctions += 1
+            async with aclosing(tache.lire()) as lecture:
+                return "".join([morceau async for morceau in lecture])
+        if tache is not None:
+            self.jonctions += 1
+        else:
+            self.appels += 1
+            tache = asyncio.ensure_future(self._generer_et_memoriser(cle, appel))
+            en_vol[cle] = tache
+            tache.add_done_callback(lambda _: en_vol.pop(cle, None))
+        return await asyncio.shield(tache)
+    
+    async def _generer_et_memoriser(self, cle: str, appel: Callable[[], Awaitable[str]]) -> str:
+        reponse = await appel()
+        self.cache.set(cle, reponse)
+        return reponse
+    
+    @staticmethod
+    def _en_cours(en_vol: dict, cle: str):
+        """Tâche ou FluxPartage en cours pour cette clé (None si aucun ou flux abandonné)"""
+        entree = en_vol.get(cle)
+        if isinstance(entree, FluxPartage) and entree.abandonne:
+            return None
+        return entree
+    
+    def _lancer_flux(self, en_vol: dict, cle: str, prompt: str) -> FluxPartage:
+        """Démarre une génération en flux partagée, enregistrée dans en_vol jusqu'à sa fin"""
+        flux = FluxPartage(self._generer_flux_et_memoriser(cle, prompt))
+        en_vol[cle] = flux
+        # Un flux abandonné a pu être remplacé entre-temps : on ne retire que le sien
+        flux.tache.add_done_callback(lambda _: en_vol.pop(cle) if en_vol.get(cle) is flux else None)
+        return flux
+    
+    async def _generer_flux_et_memoriser(self, cle: str, prompt: str) -> AsyncIterator[str]:
+        morceaux = []
+        async for morceau in self._generer_flux(prompt):
+            morceaux.append(morceau)
+            yield morceau
+        self.cache.set(cle, "".join(morceaux))
+    
+    def statistiques(self) -> dict:
+        """Appels Gemini envoyés, requêtes dédupliquées, appels en cours et micro-lots de suggestions"""
+        with self._verrou_etats:
+            etats = list(self._etats_boucles.values())
+        lots = [etat.lots_suggestions.statistiques() for etat in etats]
+        elements = sum(l["elements"] for l in lots)
+        return {
+            "appels": self.appels,
+            "jonctions": self.jonctions,
+            "en_vol": sum(len(etat.en_vol) for etat in etats),
+            "lots_suggestions": {
+                "lots": sum(l["lots"] for l in lots),
+                "elements": elements,
+                "taille_moyenne": elements / max(1, sum(l["lots"] for l in lots)),
+                "latence_moyenne_ms": sum(l["latence_moyenne_ms"] * l["elements"] for l in lots) / max(1, elements),
+                "latence_max_ms": max((l["latence_max_ms"] for l in lots), default=0.0)
+            }
+        }
+    
+    async def _generer_flux(self, prompt: str) -> AsyncIterator[str]:
+        """Appel Gemini en flux : produit les morceaux de texte dès leur arrivée"""
+        self.disjoncteur.verifier()
         try:
-            prompt = f"""
+            async with self.ordonnanceur.place():
+                # Seule l'ouverture du flux est réessayée : un flux entamé ne peut pas être rejoué
+                response = await avec_reessais(
+                    lambda: self._appeler(prompt, stream=True),
+                    Config.GEMINI_TENTATIVES, Config.GEMINI_BACKOFF_BASE, Config.GEMINI_BACKOFF_MAX
+                )
+                morceaux = response.__aiter__()
+                while True:
+                    # Le délai s'applique à l'attente de chaque morceau, pas à toute la réponse
+                    try:
+                        morceau = await asyncio.wait_for(morceaux.__anext__(), Config.GEMINI_TIMEOUT)
+                    except StopAsyncIteration:
+                        break
+                    if morceau.parts:
+                        yield morceau.text
+        except SurchargeIA:
+            # Requête délestée avant l'appel : ce n'est pas un échec de Gemini
+            self.disjoncteur.liberer()
+            raise
+        except Exception as e:
+            self._signaler_erreur(e)
+            raise
+        except BaseException:
+            # Flux annulé ou abandonné par le lecteur
+            self.disjoncteur.liberer()
+            raise
+        self.disjoncteur.succes()
+    
+    @staticmethod
+    def _prompt_culinaire(requete: str, recettes_context: str) -> str:
+        """Prompt de l'assistant culinaire"""
+        return f"""
             Tu es un assistant culinaire expert, passionné et créatif. Tu dois répondre de manière naturelle et conversationnelle.
             
             CONTEXTE - Recettes disponibles dans la base de données:
@@ -48,12 +336,20 @@ class GeminiAIService:
             
             Réponds comme un vrai chef cuisinier passionné qui adore partager ses connaissances !
             """
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
-            return response.text
-        except Exception as e:
-            error_msg = str(e)
-            if "404" in error_msg:
-                return """❌ **Erreur de modèle Gemini**
+    
+    @staticmethod
+    def _cle_reponse(requete: str, recettes_context: str) -> str:
+        # Le contexte reflète le catalogue : s'il change, la clé change aussi
+        return CacheReponses.cle("reponse", requete, hashlib.sha1(recettes_context.encode("utf-8")).hexdigest())
+    
+    @staticmethod
+    def _message_erreur(e: Exception) -> str:
+        """Message affiché à l'utilisateur quand l'appel Gemini échoue"""
+        if isinstance(e, asyncio.TimeoutError):
+            return f"⏱️ Gemini n'a pas répondu en {Config.GEMINI_TIMEOUT:.0f} s. Réessayez dans un instant."
+        error_msg = str(e)
+        if "404" in error_msg:
+            return """❌ **Erreur de modèle Gemini**
                 
 🔧 **Solutions possibles :**
 1. Vérifiez que votre clé API Gemini est valide
@@ -62,15 +358,72 @@ class GeminiAIService:
 4. La clé API doit avoir les permissions pour Gemini
 
 💡 **Modèles testés :** gemini-1.5-flash, gemini-1.5-pro"""
-            return f"🤖 Erreur technique: {error_msg}\n\n💡 Vérifiez votre configuration Gemini."
+        return f"🤖 Erreur technique: {error_msg}\n\n💡 Vérifiez votre configuration Gemini."
     
-    async def suggerer_recette_ia(self, ingredients: List[str] = None, preferences: str = "") -> str:
-        """Suggère une recette originale via Gemini"""
+    def _verifier_modele(self):
+        """Lève ServiceIAIndisponible si aucun modèle Gemini n'a pu être créé (clé absente, SDK)"""
         if self.model is None:
-            return "❌ Modèle Gemini non disponible"
+            raise ServiceIAIndisponible("Modèle Gemini non disponible. Vérifiez votre clé API et la connexion internet.")
+    
+    async def generer_reponse_culinaire(self, requete: str, recettes_context: str = "") -> str:
+        """Génère une réponse culinaire en utilisant Gemini
+        
+        Les erreurs de l'appel sont propagées à l'appelant (voir _message_erreur pour l'affichage).
+        """
+        self._verifier_modele()
+        cle = self._cle_reponse(requete, recettes_context)
+        reponse = self.cache.get(cle)
+        if reponse is not None:
+            return reponse
         
+        prompt = self._prompt_culinaire(requete, recettes_context)
+        return await self._generer_unique(cle, lambda: self._generer(prompt))
+    
+    async def generer_reponse_culinaire_flux(self, requete: str, recettes_context: str = "") -> AsyncIterator[str]:
+        """Comme generer_reponse_culinaire, mais produit le texte au fil de la génération
+        
+        Une erreur en cours de génération est écrite dans le flux, à la suite du texte déjà produit.
+        """
+        self._verifier_modele()
+        cle = self._cle_reponse(requete, recettes_context)
+        reponse = self.cache.get(cle)
+        if reponse is not None:
+            yield reponse
+            return
+        
+        en_vol = self._etat_boucle().en_vol
+        entree = self._en_cours(en_vol, cle)
+        if entree is not None:
+            self.jonctions += 1
+        if isinstance(entree, asyncio.Future):
+            # Même requête déjà en cours hors flux : on attend son résultat plutôt que de relancer
+            try:
+                yield await asyncio.shield(entree)
+            except (ServiceIAIndisponible, SurchargeIA):
+                raise
+            except Exception as e:
+                yield self._message_erreur(e)
+            return
+        
+        if entree is None:
+            self.appels += 1
+            entree = self._lancer_flux(en_vol, cle, self._prompt_culinaire(requete, recettes_context))
+        # Flux lancé ici ou rejoint : les morceaux déjà reçus sont relus depuis le début
+        texte_produit = False
         try:
-            prompt = f"""
+            async with aclosing(entree.lire()) as lecture:
+                async for morceau in lecture:
+                    texte_produit = True
+                    yield morceau
+        except (ServiceIAIndisponible, SurchargeIA):
+            raise
+        except Exception as e:
+            yield ("\n\n" if texte_produit else "") + self._message_erreur(e)
+    
+    @staticmethod
+    def _prompt_suggestion(ingredients: List[str], preferences: str) -> str:
+        """Prompt d'une suggestion de recette"""
+        return f"""
             Tu es un chef cuisinier créatif. Crée une suggestion de recette originale.
             
             Ingrédients disponibles: {', '.join(ingredients) if ingredients else 'Aucun spécifié'}
@@ -84,7 +437,55 @@ class GeminiAIService:
             
             Format: 🍽️ **Nom** (Temps min, Difficulté) - Description courte
             """
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
-            return response.text
-        except Exception as e:
-            return "🤖 Impossible de générer une suggestion pour le moment."
\ No newline at end of file
+    
+    @staticmethod
+    def _prompt_suggestions_lot(demandes: List[Tuple[List[str], str]]) -> str:
+        """Prompt regroupant plusieurs demandes de suggestion, réponse attendue en JSON"""
+        lignes = "\n".join(
+            f"{i}. Ingrédients disponibles: {', '.join(ingredients) if ingredients else 'Aucun spécifié'} ; "
+            f"Préférences: {preferences or 'aucune'}"
+            for i, (ingredients, preferences) in enumerate(demandes, 1)
+        )
+        return f"""
+            Tu es un chef cuisinier créatif. Pour chacune des {len(demandes)} demandes ci-dessous, crée une suggestion de recette originale.
+            
+            {lignes}
+            
+            Chaque suggestion est courte et attrayante, avec le nom de la recette, le temps de préparation
+            estimé, le niveau de difficulté et une phrase d'accroche appétissante, au format :
+            🍽️ **Nom** (Temps min, Difficulté) - Description courte
+            
+            Réponds uniquement par un tableau JSON de {len(demandes)} chaînes, dans l'ordre des demandes.
+            """
+    
+    async def _suggerer_lot(self, demandes: List[Tuple[List[str], str]]) -> List[str]:
+        """Traite un micro-lot de suggestions en un seul appel Gemini"""
+        if len(demandes) == 1:
+            return [await self._generer(self._prompt_suggestion(*demandes[0]))]
+        texte = await self._generer(
+            self._prompt_suggestions_lot(demandes), generation_config={"response_mime_type": "application/json"}
+        )
+        try:
+            suggestions = json.loads(texte)
+            if isinstance(suggestions, list) and len(suggestions) == len(demandes) and all(isinstance(x, str) for x in suggestions):
+                return suggestions
+        except json.JSONDecodeError:
+            pass
+        # Réponse inexploitable : une requête par demande, dont l'échec ne concerne que son demandeur
+        print(f"Debug: Réponse groupée invalide pour {len(demandes)} suggestions, envoi individuel")
+        return list(await asyncio.gather(*(self._generer(self._prompt_suggestion(*d)) for d in demandes),
+                                         return_exceptions=True))
+    
+    async def suggerer_recette_ia(self, ingredients: List[str] = None, preferences: str = "") -> str:
+        """Suggère une recette originale via Gemini (demandes simultanées regroupées en micro-lots)
+        
+        Les erreurs de l'appel sont propagées à l'appelant.
+        """
+        self._verifier_modele()
+        cle = CacheReponses.cle("suggestion", ", ".join(sorted(ingredients or [])), preferences)
+        reponse = self.cache.get(cle)
+        if reponse is not None:
+            return reponse
+        
+        lots = self._etat_boucle().lots_suggestions
+        return await self._generer_unique(cle, lambda: lots.soumettre((ingredients or [], preferences)))
\ No newline at end of file
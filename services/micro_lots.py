@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+from services.ordonnanceur import CLASSES, priorite, priorite_courante
+
+E = TypeVar("E")
+R = TypeVar("R")
+
+
+class MicroLot(Generic[E, R]):
+    """Regroupe les demandes arrivées en quelques millisecondes en un seul traitement
+    
+    Un lot part dès qu'il atteint `taille_max` demandes, ou `fenetre` secondes après
+    sa première demande. `traiter` reçoit la liste des éléments et doit renvoyer les
+    résultats dans le même ordre ; son exception est transmise à chaque demandeur, et
+    un résultat qui est lui-même une exception (gather avec return_exceptions=True)
+    au seul demandeur concerné. Le lot est traité avec la priorité (voir ordonnanceur)
+    la plus urgente de ses demandeurs. À utiliser depuis une seule boucle d'événements
+    (les futures y sont liées).
+    """
+    
+    def __init__(self, traiter: Callable[[List[E]], Awaitable[List[R]]], fenetre: float = 0.02, taille_max: int = 8):
+        self._traiter = traiter
+        self.fenetre = fenetre
+        self.taille_max = taille_max
+        # (élément, future du demandeur, instant de la demande)
+        self._attente: List[Tuple[E, asyncio.Future, float]] = []
+        # Classe de priorité de chaque demande en attente
+        self._classes: List[str] = []
+        self._minuteur: Optional[asyncio.TimerHandle] = None
+        self._taches = set()
+        self.lots = 0
+        self.elements = 0
+        self._latence_totale = 0.0
+        self.latence_max = 0.0
+    
+    async def soumettre(self, element: E) -> R:
+        """Ajoute une demande au lot courant et attend son résultat"""
+        boucle = asyncio.get_running_loop()
+        future = boucle.create_future()
+        self._attente.append((element, future, time.monotonic()))
+        self._classes.append(priorite_courante.get())
+        if len(self._attente) >= self.taille_max:
+            self._envoyer()
+        elif self._minuteur is None:
+            self._minuteur = boucle.call_later(self.fenetre, self._envoyer)
+        return await future
+    
+    def _envoyer(self):
+        """Fait partir le lot en attente"""
+        if self._minuteur is not None:
+            self._minuteur.cancel()
+            self._minuteur = None
+        lot, self._attente = self._attente, []
+        classes, self._classes = self._classes, []
+        if lot:
+            # Ni le premier demandeur ni le minuteur ne fixent la priorité : une demande
+            # interactive n'attend pas derrière l'arrière-plan qui a ouvert le lot
+            with priorite(min(classes, key=CLASSES.index)):
+                tache = asyncio.ensure_future(self._executer(lot))
+            # Référence gardée jusqu'à la fin : la boucle ne garde que des références faibles
+            self._taches.add(tache)
+            tache.add_done_callback(self._taches.discard)
+    
+    async def _executer(self, lot: List[Tuple[E, asyncio.Future, float]]):
+        try:
+            await self._repartir(lot)
+        finally:
+            # Traitement annulé (arrêt de la boucle) : aucun demandeur ne reste en attente
+            for _, future, _ in lot:
+                if not future.done():
+                    future.cancel()
+    
+    async def _repartir(self, lot: List[Tuple[E, asyncio.Future, float]]):
+        """Traite le lot et remplit la future de chaque demandeur avec son propre résultat"""
+        try:
+            resultats = await self._traiter([element for element, _, _ in lot])
+            if len(resultats) != len(lot):
+                raise ValueError(f"{len(resultats)} résultats pour un lot de {len(lot)} demandes")
+        except Exception as e:
+            for _, future, _ in lot:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        fin = time.monotonic()
+        self.lots += 1
+        self.elements += len(lot)
+        for (_, future, debut), resultat in zip(lot, resultats):
+            self._latence_totale += fin - debut
+            self.latence_max = max(self.latence_max, fin - debut)
+            # Un demandeur qui a abandonné (annulation) n'a plus de future à remplir
+            if future.done():
+                continue
+            if isinstance(resultat, asyncio.CancelledError):
+                future.cancel()
+            elif isinstance(resultat, BaseException):
+                future.set_exception(resultat)
+            else:
+                future.set_result(resultat)
+    
+    def statistiques(self) -> dict:
+        """Nombre de lots, taille moyenne et latence des demandes (ms)"""
+        return {
+            "lots": self.lots,
+            "elements": self.elements,
+            "taille_moyenne": self.elements / self.lots if self.lots else 0.0,
+            "latence_moyenne_ms": 1000 * self._latence_totale / self.elements if self.elements else 0.0,
+            "latence_max_ms": 1000 * self.latence_max
+        }
@@ -0,0 +1,196 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional, Tuple
+from utils.config import Config
+
+# Classes de priorité, de la plus urgente à la moins urgente
+INTERACTIF = "interactif"
+API = "api"
+ARRIERE_PLAN = "arriere_plan"
+CLASSES = (INTERACTIF, API, ARRIERE_PLAN)
+
+# Classe des appels Gemini lancés dans le contexte courant (les tâches asyncio en héritent)
+priorite_courante: contextvars.ContextVar[str] = contextvars.ContextVar("priorite_ia", default=API)
+
+
+@contextmanager
+def priorite(classe: str):
+    """Exécute le bloc avec la classe de priorité donnée"""
+    if classe not in CLASSES:
+        raise ValueError(f"Classe de priorité inconnue : {classe}")
+    jeton = priorite_courante.set(classe)
+    try:
+        yield
+    finally:
+        priorite_courante.reset(jeton)
+
+
+class SurchargeIA(Exception):
+    """File d'attente pleine : la requête est refusée tout de suite (délestage)"""
+    
+    def __init__(self, classe: str, reessayer_apres: int):
+        super().__init__(f"Assistant IA surchargé (file {classe} pleine), réessayez dans {reessayer_apres} s")
+        self.classe = classe
+        self.reessayer_apres = reessayer_apres
+
+
+class OrdonnanceurPriorites:
+    """Places d'appel à Gemini attribuées par priorité, avec une file bornée par classe
+    
+    Partagé entre threads et boucles d'événements (Streamlit, FastAPI) : une place
+    libérée revient au plus ancien demandeur de la classe la plus prioritaire, qui est
+    réveillé dans sa propre boucle. Une demande arrivant sur une file pleine est
+    refusée immédiatement (SurchargeIA) plutôt que d'allonger l'attente de tous.
+    """
+    
+    _instance_partagee: Optional["OrdonnanceurPriorites"] = None
+    _verrou_instance = threading.Lock()
+    
+    def __init__(self, capacite: int, tailles_files: Dict[str, int]):
+        self.capacite = capacite
+        self.tailles_files = tailles_files
+        self._verrou = threading.Lock()
+        self._actifs = 0
+        # (boucle du demandeur, future à résoudre, instant de la demande)
+        self._files: Dict[str, Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future, float]]] = {
+            classe: deque() for classe in CLASSES
+        }
+        self._admis = dict.fromkeys(CLASSES, 0)
+        self._rejets = dict.fromkeys(CLASSES, 0)
+        self._attente_totale = dict.fromkeys(CLASSES, 0.0)
+        self._attente_max = dict.fromkeys(CLASSES, 0.0)
+        # Durée moyenne d'occupation d'une place (moyenne glissante), pour Retry-After
+        self._duree_moyenne = 2.0
+    
+    @classmethod
+    def partage(cls) -> "OrdonnanceurPriorites":
+        """Ordonnanceur commun à tous les services Gemini du processus, configuré par Config"""
+        if cls._instance_partagee is None:
+            with cls._verrou_instance:
+                if cls._instance_partagee is None:
+                    cls._instance_partagee = cls(Config.GEMINI_CONCURRENCE_MAX, {
+                        INTERACTIF: Config.FILE_INTERACTIF_MAX,
+                        API: Config.FILE_API_MAX,
+                        ARRIERE_PLAN: Config.FILE_ARRIERE_PLAN_MAX
+                    })
+        return cls._instance_partagee
+    
+    def _prioritaires_en_attente(self, classe: str) -> bool:
+        """Vrai si une demande de priorité égale ou supérieure attend déjà (à appeler sous le verrou)"""
+        return any(self._files[c] for c in CLASSES[:CLASSES.index(classe) + 1])
+    
+    def _refus(self, classe: str) -> SurchargeIA:
+        """Compte le rejet et estime quand réessayer (à appeler sous le verrou)"""
+        self._rejets[classe] += 1
+        devant = sum(len(self._files[c]) for c in CLASSES[:CLASSES.index(classe) + 1])
+        return SurchargeIA(classe, max(1, math.ceil(self._duree_moyenne * (devant + 1) / self.capacite)))
+    
+    def verifier_admission(self, classe: str):
+        """Lève SurchargeIA si la file de la classe est déjà pleine (test sans réservation)"""
+        with self._verrou:
+            if self._actifs >= self.capacite and len(self._files[classe]) >= self.tailles_files[classe]:
+                raise self._refus(classe)
+    
+    def _admettre(self, classe: str, attente: float):
+        """Statistiques d'une demande admise (à appeler sous le verrou)"""
+        self._admis[classe] += 1
+        self._attente_totale[classe] += attente
+        self._attente_max[classe] = max(self._attente_max[classe], attente)
+    
+    async def acquerir(self, classe: str):
+        """Attend une place pour un appel de la classe donnée"""
+        with self._verrou:
+            if self._actifs < self.capacite and not self._prioritaires_en_attente(classe):
+                self._actifs += 1
+                self._admettre(classe, 0.0)
+                return
+            if len(self._files[classe]) >= self.tailles_files[classe]:
+                raise self._refus(classe)
+            boucle = asyncio.get_running_loop()
+            entree = (boucle, boucle.create_future(), time.monotonic())
+            self._files[classe].append(entree)
+        try:
+            await entree[1]
+        except asyncio.CancelledError:
+            with self._verrou:
+                if entree in self._files[classe]:
+                    self._files[classe].remove(entree)
+                    raise
+            # Place attribuée pendant l'annulation : elle est rendue
+            if entree[1].done() and not entree[1].cancelled():
+                self.liberer()
+            raise
+    
+    def liberer(self, duree: Optional[float] = None):
+        """Rend une place, qui passe au demandeur le plus prioritaire en attente"""
+        with self._verrou:
+            if duree is not None:
+                self._duree_moyenne = 0.9 * self._duree_moyenne + 0.1 * duree
+            for classe in CLASSES:
+                if self._files[classe]:
+                    boucle, future, debut = self._files[classe].popleft()
+                    self._admettre(classe, time.monotonic() - debut)
+                    break
+            else:
+                self._actifs -= 1
+                return
+        # La place reste occupée : elle est transmise au demandeur, dans sa boucle
+        try:
+            boucle.call_soon_threadsafe(self._transmettre, future)
+        except RuntimeError:
+            # Boucle du demandeur fermée entre-temps
+            self.liberer()
+    
+    def _transmettre(self, future: asyncio.Future):
+        if future.done():
+            # Demandeur annulé avant d'être réveillé
+            self.liberer()
+        else:
+            future.set_result(True)
+    
+    def place(self, classe: Optional[str] = None) -> "PlaceOrdonnanceur":
+        """Gestionnaire de contexte asynchrone : `async with ordonnanceur.place():`"""
+        return PlaceOrdonnanceur(self, classe or priorite_courante.get())
+    
+    def statistiques(self) -> dict:
+        """Profondeur des files, admissions, rejets et temps d'attente par classe"""
+        with self._verrou:
+            return {
+                "capacite": self.capacite,
+                "actifs": self._actifs,
+                "classes": {
+                    classe: {
+                        "en_attente": len(self._files[classe]),
+                        "file_max": self.tailles_files[classe],
+                        "admis": self._admis[classe],
+                        "rejets": self._rejets[classe],
+                        "attente_moyenne_ms": 1000 * self._attente_totale[classe] / self._admis[classe]
+                        if self._admis[classe] else 0.0,
+                        "attente_max_ms": 1000 * self._attente_max[classe]
+                    }
+                    for classe in CLASSES
+                }
+            }
+
+
+class PlaceOrdonnanceur:
+    """Place réservée auprès de l'ordonnanceur pour la durée d'un bloc `async with`"""
+    
+    def __init__(self, ordonnanceur: OrdonnanceurPriorites, classe: str):
+        self.ordonnanceur = ordonnanceur
+        self.classe = classe
+        self._debut = 0.0
+    
+    async def __aenter__(self):
+        await self.ordonnanceur.acquerir(self.classe)
+        self._debut = time.monotonic()
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.ordonnanceur.liberer(time.monotonic() - self._debut)
+        return False
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+from utils.config import Config
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def erreurs_transitoires() -> Tuple[type, ...]:
+    """Erreurs de l'API qui valent la peine d'un nouvel essai (quotas 429, erreurs serveur 5xx)
+    
+    google.api_core n'est importé qu'au premier échec à classer.
+    """
+    from google.api_core import exceptions as erreurs_google
+    return (
+        erreurs_google.TooManyRequests,
+        erreurs_google.ResourceExhausted,
+        erreurs_google.InternalServerError,
+        erreurs_google.BadGateway,
+        erreurs_google.ServiceUnavailable,
+        erreurs_google.GatewayTimeout,
+        erreurs_google.DeadlineExceeded,
+        asyncio.TimeoutError,
+        ConnectionError
+    )
+
+
+class ServiceIAIndisponible(Exception):
+    """Gemini ne répond pas (circuit ouvert ou erreurs transitoires répétées)"""
+
+
+def est_transitoire(erreur: BaseException) -> bool:
+    return isinstance(erreur, erreurs_transitoires())
+
+
+async def avec_reessais(appel: Callable[[], Awaitable[T]], tentatives: int = 3,
+                        delai_base: float = 0.5, delai_max: float = 8.0) -> T:
+    """Exécute `appel` en réessayant les erreurs transitoires (backoff exponentiel avec gigue)
+    
+    Après la dernière tentative, l'erreur transitoire est convertie en ServiceIAIndisponible ;
+    les autres erreurs (clé invalide, modèle introuvable...) remontent immédiatement.
+    """
+    for tentative in range(tentatives):
+        try:
+            return await appel()
+        except Exception as e:
+            if not est_transitoire(e):
+                raise
+            if tentative == tentatives - 1:
+                raise ServiceIAIndisponible(f"Gemini indisponible après {tentatives} tentatives : {e!r}") from e
+            # « Full jitter » : les clients ne réessaient pas tous au même instant
+            attente = random.uniform(0, min(delai_max, delai_base * 2 ** tentative))
+            print(f"Debug: Erreur transitoire Gemini ({e!r}), nouvel essai dans {attente:.2f}s")
+            await asyncio.sleep(attente)
+
+
+class DisjoncteurCircuit:
+    """Disjoncteur : après `seuil` échecs consécutifs, les appels échouent immédiatement
+    
+    Une fois `delai_reouverture` secondes écoulées, un seul appel d'essai est laissé
+    passer (état semi-ouvert) : son succès referme le circuit, son échec le rouvre.
+    """
+    
+    FERME = "fermé"
+    OUVERT = "ouvert"
+    SEMI_OUVERT = "semi-ouvert"
+    
+    _instance_partagee: Optional["DisjoncteurCircuit"] = None
+    _verrou_instance = threading.Lock()
+    
+    def __init__(self, seuil: int = 5, delai_reouverture: float = 30.0):
+        self.seuil = seuil
+        self.delai_reouverture = delai_reouverture
+        self._verrou = threading.Lock()
+        self._echecs = 0
+        self._ouvert_depuis: Optional[float] = None
+        self._essai_en_cours = False
+        self.refus = 0
+    
+    @classmethod
+    def partage(cls) -> "DisjoncteurCircuit":
+        """Disjoncteur commun à tous les services Gemini du processus, configuré par Config"""
+        if cls._instance_partagee is None:
+            with cls._verrou_instance:
+                if cls._instance_partagee is None:
+                    cls._instance_partagee = cls(Config.DISJONCTEUR_SEUIL, Config.DISJONCTEUR_DELAI)
+        return cls._instance_partagee
+    
+    @property
+    def etat(self) -> str:
+        if self._ouvert_depuis is None:
+            return self.FERME
+        if time.monotonic() - self._ouvert_depuis >= self.delai_reouverture:
+            return self.SEMI_OUVERT
+        return self.OUVERT
+    
+    def autoriser(self) -> bool:
+        """Indique si un appel peut partir (et réserve l'appel d'essai en semi-ouvert)"""
+        with self._verrou:
+            etat = self.etat
+            if etat == self.FERME:
+                return True
+            if etat == self.SEMI_OUVERT and not self._essai_en_cours:
+                self._essai_en_cours = True
+                return True
+            self.refus += 1
+            return False
+    
+    def succes(self):
+        with self._verrou:
+            self._echecs = 0
+            self._ouvert_depuis = None
+            self._essai_en_cours = False
+    
+    def echec(self):
+        with self._verrou:
+            self._echecs += 1
+            if self._essai_en_cours or self._echecs >= self.seuil:
+                if self._ouvert_depuis is None:
+                    print(f"Debug: Disjoncteur Gemini ouvert après {self._echecs} échecs")
+                self._ouvert_depuis = time.monotonic()
+            self._essai_en_cours = False
+    
+    def liberer(self):
+        """Appel abandonné (annulation) : ni succès ni échec, l'essai éventuel est rendu"""
+        with self._verrou:
+            self._essai_en_cours = False
+    
+    def verifier(self):
+        """Lève ServiceIAIndisponible si le circuit refuse l'appel"""
+        if not self.autoriser():
+            raise ServiceIAIndisponible("Disjoncteur ouvert : Gemini est temporairement ignoré")
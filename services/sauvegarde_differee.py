@@ -0,0 +1,73 @@
+import atexit
+import threading
+import time
+from typing import Callable, Optional
+
+class PlanificateurSauvegarde:
+    """Sauvegarde différée (write-behind) : regroupe les mutations en une seule écriture
+    
+    Chaque mutation marque le catalogue comme modifié ; l'écriture a lieu après
+    `delai` secondes sans nouvelle mutation, au plus tard `delai_max` secondes
+    après la première mutation non sauvegardée, ou à l'arrêt du processus.
+    """
+    
+    def __init__(self, sauvegarder: Callable[[], None], delai: float = 2.0, delai_max: float = 10.0):
+        self._sauvegarder = sauvegarder
+        self.delai = delai
+        self.delai_max = delai_max
+        self._verrou = threading.RLock()
+        self._minuteur: Optional[threading.Timer] = None
+        self._premiere_modification: Optional[float] = None
+        self.mutations_en_attente = 0
+        self.ecritures = 0
+        atexit.register(self.flush)
+    
+    @property
+    def modifie(self) -> bool:
+        return self._premiere_modification is not None
+    
+    def marquer_modifie(self):
+        """Signale une mutation et (re)programme l'écriture"""
+        with self._verrou:
+            maintenant = time.monotonic()
+            if self._premiere_modification is None:
+                self._premiere_modification = maintenant
+            self.mutations_en_attente += 1
+            
+            attente = min(self.delai, self._premiere_modification + self.delai_max - maintenant)
+            if self._minuteur is not None:
+                self._minuteur.cancel()
+            self._minuteur = threading.Timer(max(attente, 0.0), self.flush)
+            self._minuteur.daemon = True
+            self._minuteur.start()
+    
+    def flush(self):
+        """Écrit immédiatement les mutations en attente (sans effet si rien n'a changé)"""
+        with self._verrou:
+            if self._minuteur is not None:
+                self._minuteur.cancel()
+                self._minuteur = None
+            if self._premiere_modification is None:
+                return
+            premiere_modification = self._premiere_modification
+            mutations = self.mutations_en_attente
+            self._premiere_modification = None
+            self.mutations_en_attente = 0
+        
+        # L'écriture se fait hors du verrou : une mutation concurrente ne reste pas bloquée
+        print(f"Debug: Sauvegarde différée de {mutations} mutations")
+        try:
+            self._sauvegarder()
+        except Exception:
+            with self._verrou:
+                if self._premiere_modification is None:
+                    self._premiere_modification = premiere_modification
+                self.mutations_en_attente += mutations
+            raise
+        with self._verrou:
+            self.ecritures += 1
+    
+    def arreter(self):
+        """Écrit les mutations en attente et se désinscrit de l'arrêt du processus"""
+        self.flush()
+        atexit.unregister(self.flush)
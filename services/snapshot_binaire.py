@@ -0,0 +1,294 @@
+"""
+Snapshot binaire du catalogue, lisible par mmap sans désérialisation
+
+recettes.json reste la source de vérité : le snapshot en est une copie compilée,
+reconstruite dès que la source change (taille ou date de modification).
+
+Disposition du fichier (petit-boutiste) :
+- en-tête : magique, version, nombre de recettes, signature de la source,
+  puis (offset, longueur) de chaque section
+- RECORDS : une entrée de taille fixe par recette (temps, codes type/difficulté,
+  offsets du nom et des détails dans la table des chaînes)
+- CHAINES : chaînes UTF-8 concaténées (noms, détails JSON, valeurs catégorielles)
+- TYPES / DIFFICULTES : table des valeurs catégorielles (offset, longueur)
+- INDEX_TEMPS : numéros de recettes triés par temps de préparation
+- INDEX_TYPE / INDEX_DIFFICULTE : (début, nombre) par code, puis listes de numéros
+- VOCABULAIRE : noms d'ingrédients (offset, longueur, début, nombre)
+- INDEX_INGREDIENTS : listes de numéros de recettes par nom d'ingrédient
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+from models.recette import Recette
+from services.stockage import SourceRecettes
+from utils.config import Config
+from utils.fichiers import remplacer_atomiquement
+
+MAGIQUE = b"RCTSNAP1"
+VERSION_FORMAT = 1
+SECTIONS = (
+    "RECORDS", "CHAINES", "TYPES", "DIFFICULTES", "INDEX_TEMPS",
+    "INDEX_TYPE", "INDEX_DIFFICULTE", "VOCABULAIRE", "INDEX_INGREDIENTS"
+)
+ENTETE = struct.Struct("<8sIIQQ" + "QQ" * len(SECTIONS))
+RECORD = struct.Struct("<dHHIIII")
+CHAINE = struct.Struct("<II")
+PLAGE = struct.Struct("<II")
+MOT = struct.Struct("<IIII")
+
+
+def signature_source(source: Path, journal: Path = None) -> tuple:
+    """Taille et date de modification de recettes.json (et de son journal s'il existe)"""
+    taille, mtime_ns = 0, 0
+    for chemin in (source, journal):
+        if chemin is not None and os.path.exists(chemin):
+            stat = os.stat(chemin)
+            taille += stat.st_size
+            mtime_ns = max(mtime_ns, stat.st_mtime_ns)
+    return taille, mtime_ns
+
+
+def _valide(recette: Dict) -> bool:
+    try:
+        Recette.valider_dict(recette)
+        return True
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Debug: Recette invalide ignorée ({type(e).__name__}: {e})")
+        return False
+
+
+def compiler_snapshot(recettes: List[Dict], chemin: Path, signature: tuple = (0, 0)):
+    """Écrit le snapshot binaire (fichier temporaire puis renommage atomique)"""
+    # Comme au chargement complet, les enregistrements invalides sont écartés
+    recettes = [recette for recette in recettes if _valide(recette)]
+    chaines = bytearray()
+    
+    def ajouter_chaine(texte: str) -> tuple:
+        donnees = texte.encode("utf-8")
+        offset = len(chaines)
+        chaines.extend(donnees)
+        return offset, len(donnees)
+    
+    def table_codes(valeurs: List[str]) -> bytes:
+        return b"".join(CHAINE.pack(*ajouter_chaine(v)) for v in valeurs)
+    
+    def postings(listes: List[List[int]]) -> tuple:
+        plages, numeros = bytearray(), []
+        for liste in listes:
+            plages.extend(PLAGE.pack(len(numeros), len(liste)))
+            numeros.extend(liste)
+        return bytes(plages), struct.pack(f"<{len(numeros)}I", *numeros)
+    
+    # Codes attribués sur la valeur en minuscules ; la première graphie rencontrée est conservée
+    types, difficultes = {}, {}
+    valeurs_types: List[str] = []
+    valeurs_difficultes: List[str] = []
+    ids_par_type: List[List[int]] = []
+    ids_par_difficulte: List[List[int]] = []
+    ids_par_ingredient: Dict[str, List[int]] = {}
+    records = bytearray()
+    for numero, recette in enumerate(recettes):
+        code_type = types.setdefault(recette["type_plat"].lower(), len(types))
+        code_diff = difficultes.setdefault(recette["difficulte"].lower(), len(difficultes))
+        if code_type == len(ids_par_type):
+            ids_par_type.append([])
+            valeurs_types.append(recette["type_plat"])
+        if code_diff == len(ids_par_difficulte):
+            ids_par_difficulte.append([])
+            valeurs_difficultes.append(recette["difficulte"])
+        ids_par_type[code_type].append(numero)
+        ids_par_difficulte[code_diff].append(numero)
+        for nom in {ing["nom"].lower() for ing in recette["ingredients"]}:
+            ids_par_ingredient.setdefault(nom, []).append(numero)
+        
+        nom_off, nom_len = ajouter_chaine(recette["nom"])
+        details = {k: v for k, v in recette.items() if k != "nom"}
+        det_off, det_len = ajouter_chaine(json.dumps(details, ensure_ascii=False, separators=(",", ":")))
+        records.extend(RECORD.pack(recette["temps_preparation"], code_type, code_diff,
+                                   nom_off, nom_len, det_off, det_len))
+    
+    table_types = table_codes(valeurs_types)
+    table_difficultes = table_codes(valeurs_difficultes)
+    ordre_temps = sorted(range(len(recettes)), key=lambda i: recettes[i]["temps_preparation"])
+    index_temps = struct.pack(f"<{len(ordre_temps)}I", *ordre_temps)
+    plages_type, numeros_type = postings(ids_par_type)
+    plages_diff, numeros_diff = postings(ids_par_difficulte)
+    
+    vocabulaire = sorted(ids_par_ingredient)
+    mots, numeros_ing = bytearray(), []
+    for nom in vocabulaire:
+        off, longueur = ajouter_chaine(nom)
+        ids = ids_par_ingredient[nom]
+        mots.extend(MOT.pack(off, longueur, len(numeros_ing), len(ids)))
+        numeros_ing.extend(ids)
+    index_ingredients = struct.pack(f"<{len(numeros_ing)}I", *numeros_ing)
+    
+    sections = [
+        bytes(records), bytes(chaines), table_types, table_difficultes, index_temps,
+        plages_type + numeros_type, plages_diff + numeros_diff, bytes(mots), index_ingredients
+    ]
+    positions, offset = [], ENTETE.size
+    for section in sections:
+        positions.extend((offset, len(section)))
+        offset += len(section)
+    entete = ENTETE.pack(MAGIQUE, VERSION_FORMAT, len(recettes), *signature, *positions)
+    
+    chemin = Path(chemin)
+    descripteur, chemin_temp = tempfile.mkstemp(dir=chemin.parent, prefix=f".{chemin.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descripteur, "wb") as f:
+            f.write(entete)
+            for section in sections:
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        # Les processus qui ont déjà projeté l'ancien fichier gardent leur copie
+        remplacer_atomiquement(chemin_temp, chemin)
+    except BaseException:
+        os.unlink(chemin_temp)
+        raise
+
+
+class SnapshotCatalogue(SourceRecettes):
+    """Lecture d'un snapshot binaire projeté en mémoire (mmap)
+    
+    Source de BaseConnaissances avec CHARGEMENT_PARESSEUX : les index de filtres sont
+    chargés depuis les sections du snapshot et chaque recette est décodée à la lecture.
+    """
+    
+    def __init__(self, chemin: Path):
+        self.chemin = Path(chemin)
+        with open(self.chemin, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        valeurs = ENTETE.unpack_from(self._mmap, 0)
+        magique, version, self.nb_recettes, taille, mtime_ns = valeurs[:5]
+        if magique != MAGIQUE or version != VERSION_FORMAT:
+            self.fermer()
+            raise ValueError(f"{self.chemin} n'est pas un snapshot de recettes valide")
+        self.signature = (taille, mtime_ns)
+        plages = valeurs[5:]
+        self._sections = {nom: (plages[2 * i], plages[2 * i + 1]) for i, nom in enumerate(SECTIONS)}
+        self._vue = memoryview(self._mmap)
+        self._chaines = self._sections["CHAINES"][0]
+        self.types = self._lire_table("TYPES")
+        self.difficultes = self._lire_table("DIFFICULTES")
+    
+    def __len__(self) -> int:
+        return self.nb_recettes
+    
+    def fermer(self):
+        """Libère la projection mémoire"""
+        if getattr(self, "_vue", None) is not None:
+            self._vue.release()
+            self._vue = None
+        self._mmap.close()
+    
+    def _entiers(self, section: str) -> Union[memoryview, array]:
+        """Section lue comme un tableau d'entiers 32 bits petit-boutistes
+        
+        Sans copie sur une machine petit-boutiste ; ailleurs, copie puis inversion des octets.
+        """
+        offset, longueur = self._sections[section]
+        vue = self._vue[offset:offset + longueur]
+        if sys.byteorder == "little":
+            return vue.cast("I")
+        entiers = array("I")
+        entiers.frombytes(vue)
+        entiers.byteswap()
+        return entiers
+    
+    def _chaine(self, offset: int, longueur: int) -> str:
+        debut = self._chaines + offset
+        return str(self._vue[debut:debut + longueur], "utf-8")
+    
+    def _lire_table(self, section: str) -> List[str]:
+        offset, longueur = self._sections[section]
+        return [self._chaine(*CHAINE.unpack_from(self._mmap, offset + i))
+                for i in range(0, longueur, CHAINE.size)]
+    
+    def _record(self, numero: int) -> tuple:
+        return RECORD.unpack_from(self._mmap, self._sections["RECORDS"][0] + numero * RECORD.size)
+    
+    def temps(self, numero: int) -> float:
+        return self._record(numero)[0]
+    
+    def nom(self, numero: int) -> str:
+        return self._chaine(*self._record(numero)[3:5])
+    
+    def recette(self, numero: int) -> Recette:
+        """Décode une seule recette (ingrédients construits à l'affichage)"""
+        temps, code_type, code_diff, nom_off, nom_len, det_off, det_len = self._record(numero)
+        details = json.loads(self._chaine(det_off, det_len))
+        details["nom"] = self._chaine(nom_off, nom_len)
+        return Recette.from_dict_differe(details)
+    
+    def _postings(self, section: str, code: int, nb_codes: int) -> List[int]:
+        entiers = self._entiers(section)
+        debut, nombre = entiers[2 * code], entiers[2 * code + 1]
+        base = 2 * nb_codes
+        return list(entiers[base + debut:base + debut + nombre])
+    
+    def recettes(self, positions: Sequence[int]) -> List[Recette]:
+        """Décode les recettes demandées, dans l'ordre donné"""
+        return [self.recette(numero) for numero in positions]
+    
+    def positions_nom(self, nom: str) -> List[int]:
+        """Numéros des recettes portant exactement ce nom (comparaison des octets UTF-8)"""
+        cible = nom.encode("utf-8")
+        offset, longueur = self._sections["RECORDS"]
+        positions = []
+        for numero, record in enumerate(RECORD.iter_unpack(self._vue[offset:offset + longueur])):
+            nom_off, nom_len = record[3:5]
+            debut = self._chaines + nom_off
+            if nom_len == len(cible) and self._vue[debut:debut + nom_len] == cible:
+                positions.append(numero)
+        return positions
+    
+    def filtres(self) -> Dict:
+        """Champs filtrables lus dans les records et les index du snapshot, sans décoder les détails"""
+        offset, longueur = self._sections["RECORDS"]
+        temps = array('d', (record[0] for record in RECORD.iter_unpack(self._vue[offset:offset + longueur])))
+        types = {v: self._postings("INDEX_TYPE", code, len(self.types)) for code, v in enumerate(self.types)}
+        difficultes = {v: self._postings("INDEX_DIFFICULTE", code, len(self.difficultes))
+                       for code, v in enumerate(self.difficultes)}
+        numeros = self._entiers("INDEX_INGREDIENTS")
+        offset, longueur = self._sections["VOCABULAIRE"]
+        ingredients = {
+            self._chaine(mot_off, mot_len): numeros[debut:debut + nombre].tolist()
+            for mot_off, mot_len, debut, nombre in MOT.iter_unpack(self._vue[offset:offset + longueur])
+        }
+        return {"type_plat": types, "difficulte": difficultes, "ingredients": ingredients, "temps": temps}
+
+
+def ouvrir_snapshot(chemin: Path = None, data_manager=None) -> SnapshotCatalogue:
+    """Ouvre le snapshot du catalogue, après l'avoir recompilé si recettes.json a changé"""
+    if data_manager is None:
+        from services.data_manager import DataManager
+        data_manager = DataManager()
+    chemin = Path(chemin or Config.SNAPSHOT_PATH)
+    signature = signature_source(data_manager.file_path, data_manager.journal_path)
+    if chemin.exists():
+        try:
+            snapshot = SnapshotCatalogue(chemin)
+        except (ValueError, struct.error):
+            snapshot = None
+        if snapshot is not None:
+            if snapshot.signature == signature:
+                return snapshot
+            snapshot.fermer()
+    print(f"Debug: Compilation du snapshot binaire {chemin}")
+    # Le journal éventuel est rejoué : le snapshot reflète l'état réel du catalogue
+    compiler_snapshot(data_manager.charger_recettes(), chemin, signature)
+    return SnapshotCatalogue(chemin)
+
+
+if __name__ == "__main__":
+    snapshot = ouvrir_snapshot()
+    print(f"{len(snapshot)} recettes dans {snapshot.chemin}")
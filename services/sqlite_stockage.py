@@ -0,0 +1,282 @@
+import json
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+from models.recette import Recette
+from services.stockage import SourceRecettes, StockageRecettes
+from utils.config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recettes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT NOT NULL,
+    temps_preparation NUMERIC NOT NULL,
+    difficulte TEXT NOT NULL,
+    type_plat TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingredients (
+    recette_id INTEGER NOT NULL REFERENCES recettes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    nom TEXT NOT NULL,
+    nom_normalise TEXT NOT NULL,
+    quantite NUMERIC NOT NULL,
+    unite TEXT NOT NULL,
+    PRIMARY KEY (recette_id, position)
+);
+CREATE TABLE IF NOT EXISTS instructions (
+    recette_id INTEGER NOT NULL REFERENCES recettes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    texte TEXT NOT NULL,
+    PRIMARY KEY (recette_id, position)
+);
+-- Compteur incrémenté par chaque écriture : les autres processus savent que leur copie est périmée
+CREATE TABLE IF NOT EXISTS meta (
+    cle TEXT PRIMARY KEY,
+    valeur INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (cle, valeur) VALUES ('generation', 0);
+CREATE INDEX IF NOT EXISTS idx_recettes_nom ON recettes(nom);
+CREATE INDEX IF NOT EXISTS idx_recettes_temps ON recettes(temps_preparation);
+CREATE INDEX IF NOT EXISTS idx_ingredients_nom ON ingredients(nom_normalise);
+-- Type et difficulté sont filtrés par minuscules() : index des anciennes bases inutilisés
+DROP INDEX IF EXISTS idx_recettes_type;
+DROP INDEX IF EXISTS idx_recettes_difficulte;
+"""
+
+class StockageSQLite(StockageRecettes):
+    """Backend SQLite embarqué : tables normalisées et requêtes paginées"""
+    
+    incremental = True
+    requetes_natives = True
+    toujours_a_jour = True
+    
+    def __init__(self, chemin=None):
+        Config.init()
+        self.db_path = chemin or Config.SQLITE_PATH
+        # Une connexion partagée entre les threads Streamlit/FastAPI, protégée par un verrou
+        self._verrou = threading.RLock()
+        self._connexion = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # Casse repliée par str.lower(), comme les index en mémoire (lower() et NOCASE de
+        # SQLite ne replient que l'ASCII : "ENTRÉE" ne trouverait pas "Entrée")
+        self._connexion.create_function("minuscules", 1, str.lower, deterministic=True)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("PRAGMA foreign_keys=ON")
+        self._connexion.executescript(SCHEMA)
+        self._importer_json_si_vide()
+    
+    def _importer_json_si_vide(self):
+        """Au premier démarrage, reprend le contenu de recettes.json"""
+        with self._verrou:
+            if self._connexion.execute("SELECT 1 FROM recettes LIMIT 1").fetchone():
+                return
+        try:
+            with open(Config.RECETTES_PATH, 'r', encoding='utf-8') as f:
+                donnees = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError, FileNotFoundError):
+            return
+        recettes = []
+        for d in donnees:
+            try:
+                recettes.append(Recette.from_dict(d))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Debug: Recette invalide ignorée ({type(e).__name__}: {e})")
+        if recettes:
+            print(f"Debug: Import de {len(recettes)} recettes depuis recettes.json vers SQLite")
+            self.enregistrer_ajout(recettes)
+    
+    def _modifie(self):
+        """Incrémente le compteur de modifications (à appeler dans la transaction d'écriture)"""
+        self._connexion.execute("UPDATE meta SET valeur = valeur + 1 WHERE cle = 'generation'")
+    
+    def generation(self) -> int:
+        """Nombre d'écritures faites sur la base, par tous les processus"""
+        with self._verrou:
+            return self._connexion.execute("SELECT valeur FROM meta WHERE cle = 'generation'").fetchone()[0]
+    
+    def _inserer(self, recettes: List[Recette]):
+        """Insère des recettes (à appeler dans une transaction)"""
+        for recette in recettes:
+            curseur = self._connexion.execute(
+                "INSERT INTO recettes (nom, temps_preparation, difficulte, type_plat) VALUES (?, ?, ?, ?)",
+                (recette.nom, recette.temps_preparation, recette.difficulte, recette.type_plat)
+            )
+            recette_id = curseur.lastrowid
+            self._connexion.executemany(
+                "INSERT INTO ingredients (recette_id, position, nom, nom_normalise, quantite, unite) VALUES (?, ?, ?, ?, ?, ?)",
+                [(recette_id, i, ing.nom, ing.nom.lower(), ing.quantite, ing.unite)
+                 for i, ing in enumerate(recette.ingredients)]
+            )
+            self._connexion.executemany(
+                "INSERT INTO instructions (recette_id, position, texte) VALUES (?, ?, ?)",
+                [(recette_id, i, texte) for i, texte in enumerate(recette.instructions)]
+            )
+    
+    def sauvegarder_recettes(self, recettes: List[Recette]):
+        """Remplace tout le catalogue en une transaction"""
+        # Copie préalable : les recettes peuvent être lues dans cette même base (SourceSQLite),
+        # dont le DELETE ci-dessous retirerait les lignes
+        recettes = list(recettes)
+        with self._verrou, self._connexion:
+            self._connexion.execute("DELETE FROM recettes")
+            self._inserer(recettes)
+            self._modifie()
+    
+    def enregistrer_ajout(self, recettes: List[Recette]):
+        """Ajoute des recettes en une transaction"""
+        with self._verrou, self._connexion:
+            self._inserer(recettes)
+            self._modifie()
+    
+    def enregistrer_suppression(self, nom: str):
+        """Supprime les recettes portant ce nom (ingrédients et instructions en cascade)"""
+        with self._verrou, self._connexion:
+            self._connexion.execute("DELETE FROM recettes WHERE nom = ?", (nom,))
+            self._modifie()
+    
+    def _where(self, type_plat, difficulte, temps_max, ingredient) -> Tuple[str, list]:
+        """Construit la clause WHERE correspondant aux filtres"""
+        conditions, params = [], []
+        if type_plat is not None:
+            conditions.append("minuscules(r.type_plat) = ?")
+            params.append(type_plat.lower())
+        if difficulte is not None:
+            conditions.append("minuscules(r.difficulte) = ?")
+            params.append(difficulte.lower())
+        if temps_max is not None:
+            conditions.append("r.temps_preparation <= ?")
+            params.append(temps_max)
+        if ingredient:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM ingredients i WHERE i.recette_id = r.id AND instr(i.nom_normalise, ?) > 0)"
+            )
+            params.append(ingredient.lower())
+        clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return clause, params
+    
+    def _construire(self, lignes: List[tuple]) -> List[Dict]:
+        """Assemble les dictionnaires de recettes à partir des lignes de la table recettes"""
+        if not lignes:
+            return []
+        ids = [ligne[0] for ligne in lignes]
+        recettes = {
+            ligne[0]: {
+                "nom": ligne[1],
+                "ingredients": [],
+                "instructions": [],
+                "temps_preparation": ligne[2],
+                "difficulte": ligne[3],
+                "type_plat": ligne[4]
+            }
+            for ligne in lignes
+        }
+        # Par tranches pour rester sous la limite de paramètres SQLite
+        for debut in range(0, len(ids), 500):
+            tranche = ids[debut:debut + 500]
+            marqueurs = ",".join("?" * len(tranche))
+            for recette_id, nom, quantite, unite in self._connexion.execute(
+                f"SELECT recette_id, nom, quantite, unite FROM ingredients "
+                f"WHERE recette_id IN ({marqueurs}) ORDER BY recette_id, position", tranche
+            ):
+                recettes[recette_id]["ingredients"].append({"nom": nom, "quantite": quantite, "unite": unite})
+            for recette_id, texte in self._connexion.execute(
+                f"SELECT recette_id, texte FROM instructions "
+                f"WHERE recette_id IN ({marqueurs}) ORDER BY recette_id, position", tranche
+            ):
+                recettes[recette_id]["instructions"].append(texte)
+        return [recettes[i] for i in ids]
+    
+    def charger_recettes(self) -> List[Dict]:
+        """Charge tout le catalogue"""
+        with self._verrou:
+            lignes = self._connexion.execute(
+                "SELECT id, nom, temps_preparation, difficulte, type_plat FROM recettes ORDER BY id"
+            ).fetchall()
+            return self._construire(lignes)
+    
+    def lister_page(self, offset: int = 0, limit: int = 50, type_plat: Optional[str] = None,
+                    difficulte: Optional[str] = None, temps_max: Optional[float] = None,
+                    ingredient: Optional[str] = None) -> List[Dict]:
+        """Page de recettes filtrées, calculée par SQLite sans charger le catalogue"""
+        clause, params = self._where(type_plat, difficulte, temps_max, ingredient)
+        with self._verrou:
+            lignes = self._connexion.execute(
+                f"SELECT r.id, r.nom, r.temps_preparation, r.difficulte, r.type_plat FROM recettes r"
+                f"{clause} ORDER BY r.id LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+            return self._construire(lignes)
+    
+    def compter(self, type_plat: Optional[str] = None, difficulte: Optional[str] = None,
+                temps_max: Optional[float] = None, ingredient: Optional[str] = None) -> int:
+        """Nombre de recettes correspondant aux filtres"""
+        clause, params = self._where(type_plat, difficulte, temps_max, ingredient)
+        with self._verrou:
+            return self._connexion.execute(f"SELECT COUNT(*) FROM recettes r{clause}", params).fetchone()[0]
+    
+    def source_differee(self) -> "SourceSQLite":
+        """Recettes lues dans la base à la demande : seuls les identifiants sont chargés"""
+        return SourceSQLite(self)
+
+
+class SourceSQLite(SourceRecettes):
+    """Enregistrements de la table recettes, désignés par leur rang dans l'ordre des identifiants"""
+    
+    def __init__(self, stockage: StockageSQLite):
+        self._stockage = stockage
+        with stockage._verrou:
+            self._ids = array('q', (ligne[0] for ligne in stockage._connexion.execute("SELECT id FROM recettes ORDER BY id")))
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def _position(self, recette_id: int) -> Optional[int]:
+        """Rang d'un identifiant (None s'il a été inséré après l'ouverture)"""
+        position = bisect_left(self._ids, recette_id)
+        if position < len(self._ids) and self._ids[position] == recette_id:
+            return position
+        return None
+    
+    def recettes(self, positions: Sequence[int]) -> List[Recette]:
+        """Décode les recettes demandées (None pour celles supprimées depuis par un autre processus)"""
+        ids = [self._ids[p] for p in positions]
+        stockage = self._stockage
+        lignes = []
+        with stockage._verrou:
+            # Par tranches pour rester sous la limite de paramètres SQLite
+            for debut in range(0, len(ids), 500):
+                tranche = ids[debut:debut + 500]
+                lignes.extend(stockage._connexion.execute(
+                    f"SELECT id, nom, temps_preparation, difficulte, type_plat FROM recettes "
+                    f"WHERE id IN ({','.join('?' * len(tranche))})", tranche
+                ))
+            donnees = {ligne[0]: d for ligne, d in zip(lignes, stockage._construire(lignes))}
+        return [Recette.from_dict_differe(donnees[i]) if i in donnees else None for i in ids]
+    
+    def positions_nom(self, nom: str) -> List[int]:
+        with self._stockage._verrou:
+            lignes = self._stockage._connexion.execute("SELECT id FROM recettes WHERE nom = ? ORDER BY id", (nom,)).fetchall()
+        positions = (self._position(ligne[0]) for ligne in lignes)
+        return [p for p in positions if p is not None]
+    
+    def filtres(self) -> Dict:
+        """Champs filtrables lus colonne par colonne, sans assembler les recettes"""
+        rangs = {recette_id: position for position, recette_id in enumerate(self._ids)}
+        types, difficultes, ingredients = {}, {}, {}
+        temps = array('d', bytes(8 * len(self._ids)))
+        connexion = self._stockage._connexion
+        with self._stockage._verrou:
+            for recette_id, temps_preparation, type_plat, difficulte in connexion.execute(
+                "SELECT id, temps_preparation, type_plat, difficulte FROM recettes"
+            ):
+                position = rangs.get(recette_id)
+                if position is not None:
+                    temps[position] = temps_preparation
+                    types.setdefault(type_plat, []).append(position)
+                    difficultes.setdefault(difficulte, []).append(position)
+            # Doublons (même ingrédient deux fois dans une recette) fusionnés par l'index
+            for recette_id, nom in connexion.execute("SELECT recette_id, nom_normalise FROM ingredients"):
+                position = rangs.get(recette_id)
+                if position is not None:
+                    ingredients.setdefault(nom, []).append(position)
+        return {"type_plat": types, "difficulte": difficultes, "ingredients": ingredients, "temps": temps}
@@ -0,0 +1,117 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence
+from utils.config import Config
+
+if TYPE_CHECKING:
+    # Import réservé au typage : models importe lui-même services
+    from models.recette import Recette
+
+class SourceRecettes(ABC):
+    """Enregistrements stockés, décodés en Recette à la demande (voir CatalogueDiffere)
+    
+    Les enregistrements sont désignés par leur position 0..n-1, figée à l'ouverture :
+    les mutations ultérieures sont tenues en mémoire par le catalogue, pas par la source.
+    """
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        """Nombre d'enregistrements"""
+    
+    @abstractmethod
+    def recettes(self, positions: Sequence[int]) -> List["Recette"]:
+        """Décode les enregistrements demandés, dans l'ordre donné (None pour ceux qui ont disparu)"""
+    
+    @abstractmethod
+    def positions_nom(self, nom: str) -> List[int]:
+        """Positions des enregistrements portant exactement ce nom"""
+    
+    @abstractmethod
+    def filtres(self) -> Dict:
+        """Champs filtrables de tous les enregistrements, sans décoder les recettes
+        
+        {"type_plat": {valeur: [positions]}, "difficulte": {valeur: [positions]},
+        "ingredients": {nom en minuscules: [positions]}, "temps": [temps par position]}
+        """
+
+class StockageRecettes(ABC):
+    """Interface commune des backends de persistance du catalogue"""
+    
+    # True si le backend sait enregistrer un ajout/une suppression sans tout réécrire
+    incremental = False
+    # True si le backend filtre et pagine lui-même, sans charger tout le catalogue
+    requetes_natives = False
+    # True si chaque mutation est écrite telle quelle : une réécriture complète n'apporte rien
+    toujours_a_jour = False
+    
+    @abstractmethod
+    def charger_recettes(self) -> List[Dict]:
+        """Charge toutes les recettes sous forme de dictionnaires"""
+    
+    def iterer_recettes(self) -> Iterator[Dict]:
+        """Parcourt les recettes une à une (par défaut : via charger_recettes)"""
+        return iter(self.charger_recettes())
+    
+    @abstractmethod
+    def sauvegarder_recettes(self, recettes: List["Recette"]):
+        """Remplace tout le contenu stocké par ces recettes"""
+    
+    @abstractmethod
+    def enregistrer_ajout(self, recettes: List["Recette"]):
+        """Enregistre l'ajout de recettes sans tout réécrire (appelé si incremental)"""
+    
+    @abstractmethod
+    def enregistrer_suppression(self, nom: str):
+        """Enregistre la suppression d'une recette sans tout réécrire (appelé si incremental)"""
+    
+    def generation(self) -> Optional[int]:
+        """Compteur de modifications partagé entre processus (None : seul ce processus écrit)"""
+        return None
+    
+    def source_differee(self) -> Optional[SourceRecettes]:
+        """Enregistrements lisibles à la demande, sans charger le catalogue (None : chargement complet)"""
+        return None
+    
+    def compactage_necessaire(self) -> bool:
+        """Indique si le backend demande une réécriture complète"""
+        return False
+    
+    def compacter(self, recettes: List["Recette"]):
+        """Réécrit le stockage à partir du catalogue complet"""
+        self.sauvegarder_recettes(recettes)
+    
+    def lister_page(self, offset: int = 0, limit: int = 50, type_plat: Optional[str] = None,
+                    difficulte: Optional[str] = None, temps_max: Optional[float] = None,
+                    ingredient: Optional[str] = None) -> List[Dict]:
+        """Page de recettes filtrées, dans l'ordre d'insertion"""
+        return self._filtrer(self.charger_recettes(), type_plat, difficulte, temps_max, ingredient)[offset:offset + limit]
+    
+    def compter(self, type_plat: Optional[str] = None, difficulte: Optional[str] = None,
+                temps_max: Optional[float] = None, ingredient: Optional[str] = None) -> int:
+        """Nombre de recettes correspondant aux filtres"""
+        return len(self._filtrer(self.charger_recettes(), type_plat, difficulte, temps_max, ingredient))
+    
+    @staticmethod
+    def _filtrer(donnees: List[Dict], type_plat, difficulte, temps_max, ingredient) -> List[Dict]:
+        """Filtrage en mémoire pour les backends sans moteur de requête"""
+        if type_plat is not None:
+            donnees = [d for d in donnees if d["type_plat"].lower() == type_plat.lower()]
+        if difficulte is not None:
+            donnees = [d for d in donnees if d["difficulte"].lower() == difficulte.lower()]
+        if temps_max is not None:
+            donnees = [d for d in donnees if d["temps_preparation"] <= temps_max]
+        if ingredient:
+            fragment = ingredient.lower()
+            donnees = [d for d in donnees if any(fragment in ing["nom"].lower() for ing in d["ingredients"])]
+        return donnees
+
+
+def creer_stockage() -> StockageRecettes:
+    """Instancie le backend choisi par Config.STOCKAGE_BACKEND"""
+    backend = Config.STOCKAGE_BACKEND.lower()
+    if backend == "json":
+        from services.data_manager import DataManager
+        return DataManager()
+    if backend == "sqlite":
+        from services.sqlite_stockage import StockageSQLite
+        return StockageSQLite()
+    raise ValueError(f"Backend de stockage inconnu : {Config.STOCKAGE_BACKEND} (json ou sqlite)")
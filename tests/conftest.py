@@ -0,0 +1,109 @@
+import asyncio
+import sys
+import types
+from pathlib import Path
+import pytest
+
+# Les modules du dépôt s'importent depuis sa racine, comme pour app.py et api.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.config import Config
+
+
+@pytest.fixture
+def dossier_donnees(tmp_path, monkeypatch):
+    """Config pointée vers un dossier de données vide : catalogue JSON chargé entièrement"""
+    monkeypatch.setattr(Config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(Config, "RECETTES_PATH", tmp_path / Config.RECETTES_FILE)
+    monkeypatch.setattr(Config, "JOURNAL_PATH", tmp_path / f"{Config.RECETTES_FILE}.journal")
+    monkeypatch.setattr(Config, "SNAPSHOT_PATH", tmp_path / f"{Config.RECETTES_FILE}.snap")
+    monkeypatch.setattr(Config, "SQLITE_PATH", tmp_path / "recettes.db")
+    monkeypatch.setattr(Config, "CACHE_IA_PATH", tmp_path / "cache_ia.json")
+    monkeypatch.setattr(Config, "STOCKAGE_BACKEND", "json")
+    monkeypatch.setattr(Config, "CHARGEMENT_PARESSEUX", False)
+    monkeypatch.setattr(Config, "JOURNAL_ACTIF", False)
+    monkeypatch.setattr(Config, "SAUVEGARDE_DIFFEREE", False)
+    return tmp_path
+
+
+class GeminiFactice:
+    """Remplace le client gRPC asynchrone du SDK Gemini : appels comptés, réponses simulées
+    
+    `repondre(prompt)` donne le texte d'un appel simple et `morceaux(prompt)` ceux d'un
+    flux ; une exception renvoyée (ou placée parmi les morceaux) est levée à sa place.
+    """
+    
+    def __init__(self):
+        self.requetes = []
+        self.annulations = 0
+        self.delai = 0.02
+        self.repondre = lambda prompt: "réponse"
+        self.morceaux = lambda prompt: ["ré", "pon", "se"]
+        self.service = None
+    
+    def client(self, *args, **kwargs):
+        return ClientFactice(self)
+
+
+class ClientFactice:
+    def __init__(self, faux: GeminiFactice):
+        self.faux = faux
+        self.transport = TransportFactice()
+    
+    @staticmethod
+    def _reponse(texte: str):
+        import google.ai.generativelanguage as glm
+        return glm.GenerateContentResponse(candidates=[glm.Candidate(
+            content=glm.Content(parts=[glm.Part(text=texte)], role="model"), finish_reason=1
+        )])
+    
+    async def generate_content(self, requete, **kwargs):
+        prompt = requete.contents[0].parts[0].text
+        self.faux.requetes.append((prompt, False))
+        await asyncio.sleep(self.faux.delai)
+        texte = self.faux.repondre(prompt)
+        if isinstance(texte, BaseException):
+            raise texte
+        return self._reponse(texte)
+    
+    async def stream_generate_content(self, requete, **kwargs):
+        prompt = requete.contents[0].parts[0].text
+        self.faux.requetes.append((prompt, True))
+        
+        async def flux():
+            try:
+                for morceau in self.faux.morceaux(prompt):
+                    await asyncio.sleep(self.faux.delai)
+                    if isinstance(morceau, BaseException):
+                        raise morceau
+                    yield self._reponse(morceau)
+            except asyncio.CancelledError:
+                self.faux.annulations += 1
+                raise
+        
+        return flux()
+
+
+class TransportFactice:
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """GeminiAIService branché sur un client simulé, avec cache, disjoncteur et ordonnanceur neufs"""
+    glm = pytest.importorskip("google.ai.generativelanguage")
+    from services.cache_reponses import CacheReponses
+    from services.gemini_service import GeminiAIService
+    from services.ordonnanceur import CLASSES, OrdonnanceurPriorites
+    from services.resilience import DisjoncteurCircuit
+    faux = GeminiFactice()
+    monkeypatch.setattr(glm, "GenerativeServiceAsyncClient", faux.client)
+    monkeypatch.setattr(Config, "GEMINI_API_KEY", "cle-de-test")
+    monkeypatch.setattr(Config, "GEMINI_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(Config, "GEMINI_BACKOFF_MAX", 0.001)
+    service = GeminiAIService(CacheReponses(), DisjoncteurCircuit(3, 30), OrdonnanceurPriorites(4, dict.fromkeys(CLASSES, 16)))
+    service._model = types.SimpleNamespace(model_name="models/gemini-test")
+    service._model_initialise = True
+    faux.service = service
+    return faux
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from aiohttp import web
+from fastapi import HTTPException
+import api
+from services.client_api import ClientAPI
+from services.ordonnanceur import API, INTERACTIF, SurchargeIA, priorite, priorite_courante
+from services.resilience import ServiceIAIndisponible
+from utils.config import Config
+
+
+class AgentFactice:
+    """Branches de /chat simulées : chaque coroutine applique le comportement demandé"""
+    
+    def __init__(self, reponse, suggestion):
+        self.comportements = {"reponse": reponse, "suggestion": suggestion}
+        self.annulees = []
+        self.priorites = {}
+    
+    async def _branche(self, nom):
+        self.priorites[nom] = priorite_courante.get()
+        comportement = self.comportements[nom]
+        try:
+            if isinstance(comportement, BaseException):
+                raise comportement
+            await asyncio.sleep(comportement)
+            return f"{nom} IA"
+        except asyncio.CancelledError:
+            self.annulees.append(nom)
+            raise
+    
+    def traiter_requete_ia(self, message, repli_local=True):
+        return self._branche("reponse")
+    
+    def suggerer_recette_ia(self, ingredients=None, preferences="", repli_local=True):
+        return self._branche("suggestion")
+    
+    def reponse_locale(self, message):
+        return "reponse locale"
+    
+    def suggestion_locale(self, ingredients=None):
+        return "suggestion locale"
+
+
+def appeler(monkeypatch, agent, requete=None, jeton=None):
+    monkeypatch.setattr(api, "agent_global", agent)
+    return asyncio.run(api.chat_endpoint(requete or {"message": "Bonjour"}, jeton))
+
+
+def test_statuts_par_branche(monkeypatch):
+    agent = AgentFactice(ServiceIAIndisponible("pas de clé"), 0)
+    resultat = appeler(monkeypatch, agent)
+    assert resultat["response"] == "reponse locale" and resultat["suggestion"] == "suggestion IA"
+    assert resultat["statuts"] == {"reponse": "degrade", "suggestion": "ok"}
+    assert agent.priorites == {"reponse": API, "suggestion": API}
+    resultat = appeler(monkeypatch, AgentFactice(ValueError("invalide"), 0))
+    assert resultat["response"] is None and resultat["statuts"]["reponse"] == "erreur: invalide"
+
+
+def test_delestage_annule_les_autres_branches(monkeypatch):
+    agent = AgentFactice(SurchargeIA(API, 1), 30)
+    monkeypatch.setattr(api, "agent_global", agent)
+    
+    async def scenario():
+        with pytest.raises(SurchargeIA):
+            await api.chat_endpoint({"message": "Bonjour"})
+        # Annulée avant la réponse 503, pas seulement à la fermeture de la boucle
+        return list(agent.annulees)
+    
+    assert asyncio.run(scenario()) == ["suggestion"]
+
+
+@pytest.mark.parametrize("branches", ["reponse", ["reponse", 3], ["autre"]])
+def test_branches_validees(monkeypatch, branches):
+    with pytest.raises(HTTPException) as erreur:
+        appeler(monkeypatch, AgentFactice(0, 0), {"message": "Bonjour", "branches": branches})
+    assert erreur.value.status_code == 400
+
+
+def test_priorite_interactive_reservee_a_l_interface(monkeypatch):
+    monkeypatch.setattr(Config, "API_JETON_INTERFACE", "secret")
+    requete = {"message": "Bonjour", "priorite": INTERACTIF}
+    agent = AgentFactice(0, 0)
+    appeler(monkeypatch, agent, requete, jeton="secret")
+    assert agent.priorites == {"reponse": INTERACTIF, "suggestion": INTERACTIF}
+    for jeton in (None, "autre"):
+        with pytest.raises(HTTPException) as erreur:
+            appeler(monkeypatch, AgentFactice(0, 0), requete, jeton=jeton)
+        assert erreur.value.status_code == 403
+    # Sans jeton configuré, aucun client n'obtient la priorité interactive
+    monkeypatch.setattr(Config, "API_JETON_INTERFACE", "")
+    with pytest.raises(HTTPException):
+        appeler(monkeypatch, AgentFactice(0, 0), requete, jeton="")
+
+
+@pytest.mark.parametrize("jeton, attendue", [("secret", INTERACTIF), ("", API)])
+def test_client_transmet_la_priorite(jeton, attendue):
+    recues = []
+    
+    async def chat(requete):
+        recues.append((requete.headers.get("X-Jeton-Interface"), await requete.json()))
+        return web.json_response({"response": "ok", "statuts": {"reponse": "ok"}})
+    
+    async def scenario():
+        application = web.Application()
+        application.router.add_post("/chat", chat)
+        lanceur = web.AppRunner(application)
+        await lanceur.setup()
+        site = web.TCPSite(lanceur, "127.0.0.1", 0)
+        await site.start()
+        port = lanceur.addresses[0][1]
+        client = ClientAPI(f"http://127.0.0.1:{port}", jeton)
+        try:
+            with priorite(INTERACTIF):
+                return await client.traiter_requete_ia("Bonjour")
+        finally:
+            await client.fermer()
+            await lanceur.cleanup()
+    
+    assert asyncio.run(scenario()) == "ok"
+    assert recues == [(jeton or None, {"message": "Bonjour", "branches": ["reponse"], "priorite": attendue})]
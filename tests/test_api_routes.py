@@ -0,0 +1,24 @@
+import pytest
+from starlette.routing import Match
+import api
+
+
+def route(methode: str, chemin: str):
+    """Première route de l'application qui accepte la requête, comme le routeur de FastAPI"""
+    portee = {"type": "http", "method": methode, "path": chemin}
+    for candidate in api.app.router.routes:
+        correspondance, _ = candidate.matches(portee)
+        if correspondance == Match.FULL:
+            return candidate.endpoint
+    return None
+
+
+@pytest.mark.parametrize("chemin, attendue", [
+    ("/recettes/type/similaires", api.get_recettes_by_type),
+    ("/recettes/type/Dessert", api.get_recettes_by_type),
+    ("/recettes/Tiramisu/similaires", api.get_recettes_similaires),
+    ("/recettes/export", api.export_recettes),
+    ("/recettes", api.get_recettes),
+])
+def test_routes_fixes_prioritaires(chemin, attendue):
+    assert route("GET", chemin) is attendue
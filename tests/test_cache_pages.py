@@ -0,0 +1,57 @@
+from services.cache_pages import CachePages
+
+
+def test_reponse_servie_pour_sa_version():
+    cache = CachePages(taille_max=4)
+    corps, etag = cache.set(1, "page", b'{"total": 1}')
+    assert cache.get(1, "page") == (corps, etag)
+    assert cache.get(2, "page") is None
+    assert cache.get(1, "autre") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_nouvelle_version_oublie_les_entrees():
+    cache = CachePages(taille_max=4)
+    cache.set(1, "a", b"1")
+    cache.set(2, "b", b"2")
+    assert cache.get(2, "a") is None
+    # Une réponse calculée sur une version dépassée n'est pas gardée
+    cache.set(1, "a", b"1")
+    assert cache.get(1, "a") is None
+    assert cache.statistiques()["entrees"] == 1
+
+
+def test_eviction_de_la_moins_recemment_utilisee():
+    cache = CachePages(taille_max=2)
+    cache.set(1, "a", b"a")
+    cache.set(1, "b", b"b")
+    cache.get(1, "a")
+    cache.set(1, "c", b"c")
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "a") is not None and cache.get(1, "c") is not None
+
+
+def test_etag():
+    etag = CachePages.etag(b"corps")
+    assert etag == CachePages.etag(b"corps") != CachePages.etag(b"autre")
+    assert CachePages.etag_correspond(f'"x", W/{etag}', etag)
+    assert CachePages.etag_correspond("*", etag)
+    assert not CachePages.etag_correspond(None, etag)
+    assert not CachePages.etag_correspond('"x"', etag)
+
+
+def test_borne_en_octets():
+    cache = CachePages(taille_max=10, octets_max=10)
+    cache.set(1, "a", b"1234")
+    cache.set(1, "b", b"5678")
+    cache.set(1, "c", b"90ab")
+    assert cache.get(1, "a") is None
+    assert cache.statistiques()["octets"] == 8
+    # Une réponse plus grosse que la borne n'est pas gardée et n'évince rien
+    corps, _ = cache.set(1, "liste", b"x" * 11)
+    assert corps == b"x" * 11
+    assert cache.get(1, "liste") is None
+    assert cache.get(1, "b") is not None and cache.get(1, "c") is not None
+    # Réécrire une clé remplace sa taille au lieu de l'ajouter
+    cache.set(1, "b", b"56")
+    assert cache.statistiques()["octets"] == 6
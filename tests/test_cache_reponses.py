@@ -0,0 +1,52 @@
+import json
+import time
+import pytest
+from services.cache_reponses import CacheReponses
+
+
+def test_lru_et_ttl(monkeypatch):
+    cache = CacheReponses(taille_max=2, ttl=10)
+    cle = CacheReponses.cle("reponse", "Une  Question")
+    assert cle == CacheReponses.cle("REPONSE", "une question")
+    cache.set(cle, "r1")
+    cache.set("b", "r2")
+    cache.get(cle)
+    cache.set("c", "r3")
+    assert cache.get("b") is None and cache.get(cle) == "r1"
+    maintenant = time.time()
+    monkeypatch.setattr(time, "time", lambda: maintenant + 11)
+    assert cache.get(cle) is None
+
+
+def test_ecriture_differee(tmp_path):
+    chemin = tmp_path / "cache_ia.json"
+    cache = CacheReponses(chemin=chemin, delai_ecriture=60, delai_ecriture_max=60)
+    try:
+        for i in range(3):
+            cache.set(f"cle{i}", f"reponse {i}")
+        # Aucun accès disque dans l'appelant : les ajouts attendent l'écriture groupée
+        assert not chemin.exists()
+        cache.flush()
+        assert [e[0] for e in json.loads(chemin.read_text(encoding="utf-8"))] == ["cle0", "cle1", "cle2"]
+        relu = CacheReponses(chemin=chemin)
+        assert relu.get("cle1") == "reponse 1"
+    finally:
+        cache._planificateur.arreter()
+
+
+@pytest.mark.parametrize("contenu", [
+    '{"cle": "reponse"}',
+    '[["cle", "reponse"]]',
+    '[["cle", "hier", "reponse"]]',
+    '[["cle", 1.0, 3]]',
+    "[1, 2]",
+    "pas du json",
+])
+def test_fichier_invalide_ignore(tmp_path, contenu):
+    chemin = tmp_path / "cache_ia.json"
+    chemin.write_text(contenu, encoding="utf-8")
+    cache = CacheReponses(chemin=chemin)
+    assert len(cache) == 0
+    cache.set("cle", "reponse")
+    assert cache.get("cle") == "reponse"
+    cache._planificateur.arreter()
@@ -0,0 +1,91 @@
+import asyncio
+
+
+async def lire(service, question, retard=0.0, max_morceaux=None):
+    """Lit le flux d'une question (éventuellement après un retard, ou en abandonnant en route)"""
+    await asyncio.sleep(retard)
+    morceaux = []
+    flux = service.generer_reponse_culinaire_flux(question)
+    async for morceau in flux:
+        morceaux.append(morceau)
+        if max_morceaux and len(morceaux) >= max_morceaux:
+            await flux.aclose()
+            break
+    return morceaux
+
+
+async def apres(retard, coroutine):
+    await asyncio.sleep(retard)
+    return await coroutine
+
+
+def test_appels_identiques_partages(gemini):
+    service = gemini.service
+    
+    async def scenario():
+        return await asyncio.gather(*(service.generer_reponse_culinaire("Un dessert ?") for _ in range(3)))
+    
+    assert asyncio.run(scenario()) == ["réponse"] * 3
+    assert len(gemini.requetes) == 1
+    assert (service.appels, service.jonctions) == (1, 2)
+    assert service.cache.get(service._cle_reponse("Un dessert ?", "")) == "réponse"
+
+
+def test_flux_rejoint_par_flux_et_appel_simple(gemini):
+    service = gemini.service
+    
+    async def scenario():
+        return await asyncio.gather(
+            lire(service, "Une soupe ?"),
+            lire(service, "Une soupe ?", 0.03),
+            apres(0.05, service.generer_reponse_culinaire("Une soupe ?"))
+        )
+    
+    premier, rejoint, simple = asyncio.run(scenario())
+    # Le lecteur arrivé en cours de route relit les morceaux déjà produits
+    assert premier == rejoint == ["ré", "pon", "se"]
+    assert simple == "réponse"
+    assert gemini.requetes == [(gemini.requetes[0][0], True)]
+    assert service.jonctions == 2
+    assert service.statistiques()["en_vol"] == 0
+
+
+def test_flux_rejoint_un_appel_simple(gemini):
+    service = gemini.service
+    
+    async def scenario():
+        return await asyncio.gather(service.generer_reponse_culinaire("Du riz ?"), lire(service, "Du riz ?", 0.01))
+    
+    assert asyncio.run(scenario()) == ["réponse", ["réponse"]]
+    assert len(gemini.requetes) == 1
+
+
+def test_erreur_transmise_a_tous_les_lecteurs(gemini):
+    gemini.morceaux = lambda prompt: ["dé", "but", ValueError("coupure")]
+    
+    async def scenario():
+        return await asyncio.gather(lire(gemini.service, "Un gâteau ?"), lire(gemini.service, "Un gâteau ?", 0.03))
+    
+    for morceaux in asyncio.run(scenario()):
+        assert morceaux[:2] == ["dé", "but"] and "coupure" in morceaux[2]
+    assert len(gemini.requetes) == 1
+
+
+def test_abandon_du_dernier_lecteur(gemini):
+    service = gemini.service
+    
+    async def scenario():
+        # Deux lecteurs dont l'un abandonne : la génération continue pour l'autre
+        resultats = await asyncio.gather(lire(service, "Des pâtes ?", max_morceaux=1), lire(service, "Des pâtes ?", 0.01))
+        assert gemini.annulations == 0
+        # Seul lecteur : son abandon annule la génération, la requête suivante la relance
+        seul = await lire(service, "Un curry ?", max_morceaux=1)
+        await asyncio.sleep(0.01)
+        annulations = gemini.annulations
+        return resultats, seul, annulations, await lire(service, "Un curry ?")
+    
+    resultats, seul, annulations, relance = asyncio.run(scenario())
+    assert resultats == [["ré"], ["ré", "pon", "se"]]
+    assert seul == ["ré"] and annulations == 1
+    assert relance == ["ré", "pon", "se"]
+    assert len(gemini.requetes) == 3
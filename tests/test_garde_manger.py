@@ -0,0 +1,64 @@
+import random
+import pytest
+from agent import RecommandationEngine
+from models.base_connaissances import BaseConnaissances
+from models.ingredient import Ingredient
+from models.recette import Recette
+
+INGREDIENTS = ["Tomate", "tomates cerises", "Oeuf", "sel", "Sel", "poivre", "riz", "riz basmati", "Lait", "beurre"]
+GARDE_MANGERS = [["tomate"], ["SEL", "oeuf"], ["riz"], ["lait", "beurre", "poivre"], ["tomate", "tomates"], ["absent"], [""]]
+
+
+def recommander_boucle(recettes, ingredients_dispo):
+    """Boucle d'origine de RecommandationEngine.recommander_par_ingredients : (recette, score)"""
+    scores = {}
+    for recette in recettes:
+        score = sum(
+            1 for ing in recette.ingredients
+            if any(i.lower() in ing.nom.lower() for i in ingredients_dispo)
+        )
+        if score > 0:
+            scores[recette] = score / len(recette.ingredients)
+    return [(recette, scores[recette]) for recette in sorted(scores.keys(), key=lambda x: scores[x], reverse=True)]
+
+
+def recette_aleatoire(alea: random.Random, numero: int) -> Recette:
+    # Tirage avec remise : un même ingrédient peut revenir plusieurs fois dans une recette
+    ingredients = [Ingredient(alea.choice(INGREDIENTS), 1, "g") for _ in range(alea.randint(1, 6))]
+    return Recette(f"Recette {numero % 40}", ingredients, ["Cuire"], 10, "Facile", "Plat principal")
+
+
+@pytest.fixture
+def base(dossier_donnees):
+    alea = random.Random(7)
+    base = BaseConnaissances()
+    base.ajouter_recettes([recette_aleatoire(alea, i) for i in range(300)])
+    # Suppressions puis ajouts : les lignes libérées de la matrice sont réutilisées
+    base.garde_manger()
+    for numero in range(0, 40, 3):
+        base.supprimer_recette(f"Recette {numero}")
+    base.ajouter_recettes([recette_aleatoire(alea, i) for i in range(300, 360)])
+    return base
+
+
+@pytest.mark.parametrize("garde_manger", GARDE_MANGERS)
+def test_scores_identiques_a_la_boucle(base, garde_manger):
+    attendu = recommander_boucle(base.recettes, garde_manger)
+    assert base.recommander_garde_mangers([garde_manger], k=None)[0] == attendu
+
+
+def test_moteur_et_top_k(base):
+    moteur = RecommandationEngine(base)
+    lot = base.recommander_garde_mangers(GARDE_MANGERS, k=5)
+    for garde_manger, resultats in zip(GARDE_MANGERS, lot):
+        attendu = recommander_boucle(base.recettes, garde_manger)
+        assert moteur.recommander_par_ingredients(garde_manger) == [recette for recette, _ in attendu]
+        assert resultats == attendu[:5]
+
+
+def test_ingredient_repete(dossier_donnees):
+    base = BaseConnaissances()
+    recette = Recette("Salée", [Ingredient("Sel", 1, "g"), Ingredient("sel", 2, "g"), Ingredient("poivre", 1, "g")],
+                      ["Mélanger"], 5, "Facile", "Entrée")
+    base.ajouter_recette(recette)
+    assert (recette, 2 / 3) in base.recommander_garde_mangers([["sel"]], k=None)[0]
@@ -0,0 +1,61 @@
+import json
+import pytest
+from models.ingredient import Ingredient
+from models.recette import Recette
+from services.data_manager import DataManager
+from utils.config import Config
+
+
+def recette(nom: str, temps: int = 10) -> Recette:
+    return Recette(nom, [Ingredient("riz", 100, "g")], ["Cuire"], temps, "Facile", "Plat principal")
+
+
+@pytest.fixture
+def gestionnaire(dossier_donnees, monkeypatch):
+    monkeypatch.setattr(Config, "JOURNAL_ACTIF", True)
+    Config.init()
+    gestionnaire = DataManager()
+    gestionnaire.sauvegarder_recettes([recette("A"), recette("B")])
+    return gestionnaire
+
+
+def noms(donnees):
+    return [(d["nom"], d["temps_preparation"]) for d in donnees]
+
+
+def test_rejeu_des_mutations(gestionnaire):
+    gestionnaire.enregistrer_ajout([recette("C")])
+    gestionnaire.enregistrer_suppression("A")
+    gestionnaire.enregistrer_ajout([recette("A", 20)])
+    assert noms(json.loads(Config.RECETTES_PATH.read_text(encoding="utf-8"))) == [("A", 10), ("B", 10)]
+    assert noms(DataManager().charger_recettes()) == [("B", 10), ("C", 10), ("A", 20)]
+
+
+def test_ligne_tronquee_ecartee(gestionnaire):
+    gestionnaire.enregistrer_ajout([recette("C")])
+    with open(Config.JOURNAL_PATH, "a", encoding="utf-8") as f:
+        f.write('{"op": "ajout", "recet')
+    relu = DataManager()
+    assert noms(relu.charger_recettes()) == [("A", 10), ("B", 10), ("C", 10)]
+    # Le journal a été tronqué à la dernière ligne complète : les ajouts suivants restent lisibles
+    relu.enregistrer_ajout([recette("D")])
+    assert noms(DataManager().charger_recettes())[-2:] == [("C", 10), ("D", 10)]
+
+
+def test_journal_obsolete_ignore(gestionnaire):
+    gestionnaire.enregistrer_ajout([recette("C")])
+    # recettes.json réécrit hors de DataManager : le journal ne porte plus sur ce contenu
+    Config.RECETTES_PATH.write_text(json.dumps([recette("Z").to_dict()]), encoding="utf-8")
+    assert noms(DataManager().charger_recettes()) == [("Z", 10)]
+
+
+def test_compactage(gestionnaire, monkeypatch):
+    monkeypatch.setattr(Config, "JOURNAL_SEUIL_COMPACTION", 2)
+    gestionnaire.enregistrer_ajout([recette("C")])
+    assert not gestionnaire.compactage_necessaire()
+    gestionnaire.enregistrer_suppression("B")
+    assert gestionnaire.compactage_necessaire()
+    gestionnaire.compacter([recette("A"), recette("C")])
+    assert not gestionnaire.compactage_necessaire()
+    assert len(Config.JOURNAL_PATH.read_text(encoding="utf-8").splitlines()) == 1
+    assert noms(DataManager().charger_recettes()) == [("A", 10), ("C", 10)]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import pytest
+from services.micro_lots import MicroLot
+from services.ordonnanceur import ARRIERE_PLAN, INTERACTIF, priorite, priorite_courante
+
+
+def test_regroupement_et_resultats_individuels():
+    lots = []
+    
+    async def traiter(elements):
+        lots.append((list(elements), priorite_courante.get()))
+        return [ValueError(f"refus {e}") if e == 2 else e * 10 for e in elements]
+    
+    async def scenario():
+        micro_lot = MicroLot(traiter, fenetre=0.01, taille_max=3)
+        return await asyncio.gather(*(micro_lot.soumettre(i) for i in range(5)), return_exceptions=True), micro_lot
+    
+    resultats, micro_lot = asyncio.run(scenario())
+    # Trois demandes font partir le lot tout de suite, les deux autres à la fin de la fenêtre
+    assert [elements for elements, _ in lots] == [[0, 1, 2], [3, 4]]
+    assert resultats[:2] == [0, 10] and resultats[3:] == [30, 40]
+    assert isinstance(resultats[2], ValueError)
+    assert micro_lot.statistiques()["taille_moyenne"] == 2.5
+
+
+def test_nombre_de_resultats_incorrect():
+    async def traiter(elements):
+        return [1]
+    
+    async def scenario():
+        micro_lot = MicroLot(traiter, fenetre=0.005)
+        return await asyncio.gather(*(micro_lot.soumettre(i) for i in range(3)), return_exceptions=True)
+    
+    assert all(isinstance(r, ValueError) for r in asyncio.run(scenario()))
+
+
+def test_traitement_annule_libere_les_demandeurs():
+    async def traiter(elements):
+        await asyncio.sleep(10)
+    
+    async def scenario():
+        micro_lot = MicroLot(traiter, fenetre=0.001)
+        demandes = [asyncio.ensure_future(micro_lot.soumettre(i)) for i in range(2)]
+        await asyncio.sleep(0.02)
+        for tache in list(micro_lot._taches):
+            tache.cancel()
+        return await asyncio.gather(*demandes, return_exceptions=True)
+    
+    assert all(isinstance(r, asyncio.CancelledError) for r in asyncio.run(scenario()))
+
+
+def test_priorite_la_plus_urgente_du_lot():
+    classes = []
+    
+    async def traiter(elements):
+        classes.append(priorite_courante.get())
+        return elements
+    
+    async def demander(micro_lot, element, classe, retard=0.0):
+        await asyncio.sleep(retard)
+        with priorite(classe):
+            return await micro_lot.soumettre(element)
+    
+    async def scenario():
+        micro_lot = MicroLot(traiter, fenetre=0.03)
+        # Lot ouvert par l'arrière-plan puis rejoint par une demande interactive
+        return await asyncio.gather(demander(micro_lot, "a", ARRIERE_PLAN), demander(micro_lot, "b", INTERACTIF, 0.005))
+    
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert classes == [INTERACTIF]
+
+
+def test_suggestions_groupees(gemini):
+    gemini.repondre = lambda prompt: json.dumps(["suggestion riz", "suggestion pâtes"])
+    service = gemini.service
+    
+    async def scenario():
+        return await asyncio.gather(service.suggerer_recette_ia(["riz"]), service.suggerer_recette_ia(["pâtes"]))
+    
+    assert asyncio.run(scenario()) == ["suggestion riz", "suggestion pâtes"]
+    assert len(gemini.requetes) == 1
+
+
+def test_reponse_groupee_invalide(gemini):
+    def repondre(prompt):
+        if "JSON" in prompt:
+            return "pas du json"
+        return RuntimeError("refus") if "poison" in prompt else "suggestion"
+    
+    gemini.repondre = repondre
+    service = gemini.service
+    
+    async def scenario():
+        return await asyncio.gather(*(service.suggerer_recette_ia([ingredient]) for ingredient in ("riz", "poison", "pâtes")),
+                                    return_exceptions=True)
+    
+    riz, poison, pates = asyncio.run(scenario())
+    # Une requête par demande : l'échec de l'une ne concerne que son demandeur
+    assert riz == pates == "suggestion"
+    assert isinstance(poison, RuntimeError)
+    assert len(gemini.requetes) == 4
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import pytest
+from services.ordonnanceur import API, ARRIERE_PLAN, CLASSES, INTERACTIF, OrdonnanceurPriorites, SurchargeIA
+
+
+def ordonnanceur(capacite: int = 1, file_max: int = 8) -> OrdonnanceurPriorites:
+    return OrdonnanceurPriorites(capacite, dict.fromkeys(CLASSES, file_max))
+
+
+def test_place_liberee_au_plus_prioritaire():
+    ordre = []
+    
+    async def appel(o, classe, retard):
+        await asyncio.sleep(retard)
+        async with o.place(classe):
+            ordre.append(classe)
+            await asyncio.sleep(0.01)
+    
+    async def scenario():
+        o = ordonnanceur()
+        # La place est prise ; les demandes arrivent de la moins à la plus urgente
+        await asyncio.gather(appel(o, API, 0), appel(o, ARRIERE_PLAN, 0.001), appel(o, API, 0.002),
+                             appel(o, INTERACTIF, 0.003))
+        return o.statistiques()
+    
+    statistiques = asyncio.run(scenario())
+    assert ordre == [API, INTERACTIF, API, ARRIERE_PLAN]
+    assert statistiques["actifs"] == 0
+    assert statistiques["classes"][API]["admis"] == 2
+
+
+def test_delestage_file_pleine():
+    async def scenario():
+        o = ordonnanceur(capacite=1, file_max=1)
+        await o.acquerir(API)
+        attente = asyncio.ensure_future(o.acquerir(API))
+        await asyncio.sleep(0)
+        with pytest.raises(SurchargeIA) as refus:
+            await o.acquerir(API)
+        with pytest.raises(SurchargeIA):
+            o.verifier_admission(API)
+        # Les autres classes gardent leur propre file
+        o.verifier_admission(INTERACTIF)
+        o.liberer()
+        await attente
+        o.liberer()
+        return refus.value, o.statistiques()
+    
+    refus, statistiques = asyncio.run(scenario())
+    assert refus.classe == API and refus.reessayer_apres >= 1
+    assert statistiques["classes"][API]["rejets"] == 2
+    assert statistiques["actifs"] == 0
+
+
+def test_annulation_en_attente():
+    async def scenario():
+        o = ordonnanceur()
+        await o.acquerir(API)
+        attente = asyncio.ensure_future(o.acquerir(ARRIERE_PLAN))
+        await asyncio.sleep(0)
+        attente.cancel()
+        await asyncio.gather(attente, return_exceptions=True)
+        o.liberer()
+        return o.statistiques()
+    
+    statistiques = asyncio.run(scenario())
+    assert statistiques["actifs"] == 0
+    assert statistiques["classes"][ARRIERE_PLAN]["en_attente"] == 0
+
+
+def test_partage_entre_boucles():
+    """Une place rendue dans une boucle réveille un demandeur d'une autre boucle (autre thread)"""
+    o = ordonnanceur()
+    pris, admis = threading.Event(), []
+    
+    async def premier():
+        await o.acquerir(API)
+        pris.set()
+        await asyncio.sleep(0.05)
+        o.liberer()
+    
+    async def second():
+        await o.acquerir(INTERACTIF)
+        admis.append(True)
+        o.liberer()
+    
+    fil = threading.Thread(target=asyncio.run, args=(premier(),))
+    fil.start()
+    pris.wait(1)
+    asyncio.run(asyncio.wait_for(second(), 1))
+    fil.join()
+    assert admis == [True] and o.statistiques()["actifs"] == 0
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from google.api_core import exceptions as erreurs_google
+from services.resilience import DisjoncteurCircuit, ServiceIAIndisponible, avec_reessais
+
+
+def test_reessais_des_seules_erreurs_transitoires():
+    essais = []
+    
+    async def instable():
+        essais.append(1)
+        if len(essais) < 3:
+            raise erreurs_google.ServiceUnavailable("surcharge")
+        return "ok"
+    
+    assert asyncio.run(avec_reessais(instable, 3, 0.001, 0.001)) == "ok" and len(essais) == 3
+    
+    async def refus():
+        essais.append(1)
+        raise erreurs_google.InvalidArgument("prompt invalide")
+    
+    essais.clear()
+    with pytest.raises(erreurs_google.InvalidArgument):
+        asyncio.run(avec_reessais(refus, 3, 0.001, 0.001))
+    assert len(essais) == 1
+
+
+def test_disjoncteur_semi_ouvert(monkeypatch):
+    disjoncteur = DisjoncteurCircuit(seuil=2, delai_reouverture=0)
+    disjoncteur.echec()
+    assert disjoncteur.etat == DisjoncteurCircuit.FERME
+    disjoncteur.echec()
+    # Délai écoulé : un seul appel d'essai passe, son succès referme le circuit
+    assert disjoncteur.etat == DisjoncteurCircuit.SEMI_OUVERT
+    assert disjoncteur.autoriser() and not disjoncteur.autoriser()
+    disjoncteur.succes()
+    assert disjoncteur.etat == DisjoncteurCircuit.FERME
+
+
+@pytest.mark.parametrize("erreur", [
+    erreurs_google.InvalidArgument("argument invalide"),
+    erreurs_google.PermissionDenied("clé refusée"),
+    ValueError("contenu bloqué"),
+])
+def test_erreurs_permanentes_n_ouvrent_pas_le_circuit(gemini, erreur):
+    gemini.repondre = lambda prompt: erreur
+    service = gemini.service
+    for i in range(5):
+        with pytest.raises(type(erreur)):
+            asyncio.run(service.generer_reponse_culinaire(f"question {i}"))
+    assert service.disjoncteur.etat == DisjoncteurCircuit.FERME
+
+
+def test_pannes_ouvrent_le_circuit(gemini, monkeypatch):
+    monkeypatch.setattr("utils.config.Config.GEMINI_TENTATIVES", 1)
+    gemini.repondre = lambda prompt: erreurs_google.ServiceUnavailable("panne")
+    service = gemini.service
+    for i in range(3):
+        with pytest.raises(ServiceIAIndisponible):
+            asyncio.run(service.generer_reponse_culinaire(f"question {i}"))
+    assert service.disjoncteur.etat == DisjoncteurCircuit.OUVERT
+    nb_requetes = len(gemini.requetes)
+    with pytest.raises(ServiceIAIndisponible):
+        asyncio.run(service.generer_reponse_culinaire("question suivante"))
+    assert len(gemini.requetes) == nb_requetes
+
+
+def test_contenu_bloque_en_flux(gemini):
+    gemini.morceaux = lambda prompt: [erreurs_google.InvalidArgument("bloqué")]
+    service = gemini.service
+    
+    async def lire(question):
+        return [morceau async for morceau in service.generer_reponse_culinaire_flux(question)]
+    
+    for i in range(4):
+        assert "bloqué" in asyncio.run(lire(f"question {i}"))[0]
+    assert service.disjoncteur.etat == DisjoncteurCircuit.FERME
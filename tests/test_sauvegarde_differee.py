@@ -0,0 +1,101 @@
+import json
+import os
+import stat
+import time
+import pytest
+from models.base_connaissances import BaseConnaissances
+from models.ingredient import Ingredient
+from models.recette import Recette
+from services.data_manager import DataManager
+from services.sauvegarde_differee import PlanificateurSauvegarde
+from utils.config import Config
+
+
+def recette(nom: str) -> Recette:
+    return Recette(nom, [Ingredient("riz", 100, "g")], ["Cuire"], 10, "Facile", "Plat principal")
+
+
+def attendre(condition, delai: float = 2.0):
+    fin = time.monotonic() + delai
+    while not condition() and time.monotonic() < fin:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_mutations_regroupees():
+    ecritures = []
+    planificateur = PlanificateurSauvegarde(lambda: ecritures.append(time.monotonic()), delai=0.05, delai_max=5)
+    try:
+        for _ in range(5):
+            planificateur.marquer_modifie()
+        assert planificateur.mutations_en_attente == 5 and not ecritures
+        assert attendre(lambda: ecritures)
+        time.sleep(0.1)
+        assert len(ecritures) == 1 and not planificateur.modifie
+    finally:
+        planificateur.arreter()
+
+
+def test_delai_max_borne_l_attente():
+    ecritures = []
+    planificateur = PlanificateurSauvegarde(lambda: ecritures.append(time.monotonic()), delai=0.2, delai_max=0.3)
+    try:
+        debut = time.monotonic()
+        # Des mutations plus rapprochées que `delai` repousseraient l'écriture indéfiniment
+        while time.monotonic() - debut < 0.6 and not ecritures:
+            planificateur.marquer_modifie()
+            time.sleep(0.05)
+        assert ecritures and ecritures[0] - debut < 0.5
+    finally:
+        planificateur.arreter()
+
+
+def test_echec_remet_les_mutations_en_attente():
+    appels = []
+    
+    def sauvegarder():
+        appels.append(1)
+        if len(appels) == 1:
+            raise OSError("disque plein")
+    
+    planificateur = PlanificateurSauvegarde(sauvegarder, delai=60, delai_max=60)
+    try:
+        planificateur.marquer_modifie()
+        planificateur.marquer_modifie()
+        with pytest.raises(OSError):
+            planificateur.flush()
+        assert planificateur.modifie and planificateur.mutations_en_attente == 2
+        planificateur.flush()
+        assert not planificateur.modifie and planificateur.ecritures == 1
+    finally:
+        planificateur.arreter()
+
+
+def test_base_ecrit_a_la_demande(dossier_donnees, monkeypatch):
+    monkeypatch.setattr(Config, "SAUVEGARDE_DIFFEREE", True)
+    monkeypatch.setattr(Config, "SAUVEGARDE_DELAI", 60)
+    monkeypatch.setattr(Config, "SAUVEGARDE_DELAI_MAX", 60)
+    base = BaseConnaissances()
+    try:
+        base.ajouter_recette(recette("Pilaf"))
+        base.ajouter_recette(recette("Paella"))
+        noms = lambda: [d["nom"] for d in json.loads(Config.RECETTES_PATH.read_text(encoding="utf-8"))]
+        assert "Pilaf" not in noms()
+        base.flush()
+        assert noms()[-2:] == ["Pilaf", "Paella"]
+    finally:
+        base._sauvegarde_differee.arreter()
+
+
+def test_droits_conserves(dossier_donnees):
+    gestionnaire = DataManager()
+    gestionnaire.sauvegarder_recettes([recette("A")])
+    os.chmod(Config.RECETTES_PATH, 0o640)
+    gestionnaire.sauvegarder_recettes([recette("B")])
+    assert stat.S_IMODE(os.stat(Config.RECETTES_PATH).st_mode) == 0o640
+
+
+def test_utf8_invalide_traite_comme_corruption(dossier_donnees):
+    Config.RECETTES_PATH.write_bytes(b'[{"nom": "\xff"}]')
+    assert DataManager().charger_recettes() == []
+    assert list(dossier_donnees.glob(f"{Config.RECETTES_FILE}.corrompu-*"))
@@ -0,0 +1,33 @@
+from models.base_connaissances import BaseConnaissances
+from models.ingredient import Ingredient
+from models.recette import Recette
+
+
+def recette(nom: str, ingredients, type_plat: str = "Plat principal") -> Recette:
+    return Recette(nom, [Ingredient(i, 1, "g") for i in ingredients], ["Cuire"], 20, "Facile", type_plat)
+
+
+def test_recettes_proches(dossier_donnees):
+    base = BaseConnaissances()
+    base.ajouter_recettes([
+        recette("Risotto safran", ["riz arborio", "safran", "parmesan", "bouillon"]),
+        recette("Risotto cèpes", ["riz arborio", "cèpes", "parmesan", "bouillon"]),
+        recette("Salade de fruits", ["pomme", "kiwi", "orange"], "Dessert"),
+    ])
+    similaires = base.recettes_similaires("Risotto safran", k=3)
+    noms = [r.nom for r, _ in similaires]
+    assert noms[0] == "Risotto cèpes"
+    assert "Risotto safran" not in noms
+    scores = [score for _, score in similaires]
+    assert scores == sorted(scores, reverse=True)
+    assert base.recettes_similaires("Inconnue") is None
+
+
+def test_index_tenu_a_jour(dossier_donnees):
+    base = BaseConnaissances()
+    base.ajouter_recette(recette("Curry", ["lait de coco", "curry", "poulet"]))
+    base.similarite()
+    base.ajouter_recette(recette("Curry végétarien", ["lait de coco", "curry", "pois chiches"]))
+    assert base.recettes_similaires("Curry", k=1)[0][0].nom == "Curry végétarien"
+    base.supprimer_recette("Curry végétarien")
+    assert "Curry végétarien" not in [r.nom for r, _ in base.recettes_similaires("Curry", k=10)]
@@ -0,0 +1,74 @@
+import json
+import pytest
+from models.base_connaissances import BaseConnaissances
+from models.ingredient import Ingredient
+from models.recette import Recette
+from services.data_manager import DataManager
+from services.snapshot_binaire import ouvrir_snapshot
+from utils.config import Config
+
+RECETTES = [
+    Recette("Velouté", [Ingredient("Courge", 500, "g"), Ingredient("crème", 10, "cl")], ["Mixer"], 25, "Facile", "Entrée"),
+    Recette("Crêpes", [Ingredient("Farine", 250, "g"), Ingredient("Œufs", 3, "pièces")], ["Mélanger", "Cuire"], 30, "Facile", "Dessert"),
+    Recette("Velouté", [Ingredient("poireau", 2, "pièces")], ["Cuire"], 40.5, "Moyen", "Entrée"),
+]
+
+
+@pytest.fixture
+def snapshot(dossier_donnees):
+    DataManager().sauvegarder_recettes(RECETTES)
+    snapshot = ouvrir_snapshot()
+    yield snapshot
+    snapshot.fermer()
+
+
+def test_recettes_decodees(snapshot):
+    assert len(snapshot) == 3
+    assert [r.to_dict() for r in snapshot.recettes([2, 0, 1])] == [RECETTES[i].to_dict() for i in (2, 0, 1)]
+    assert snapshot.positions_nom("Velouté") == [0, 2]
+    assert snapshot.positions_nom("Veloute") == []
+
+
+def test_filtres(snapshot):
+    filtres = snapshot.filtres()
+    assert list(filtres["temps"]) == [25, 30, 40.5]
+    assert filtres["type_plat"] == {"Entrée": [0, 2], "Dessert": [1]}
+    assert filtres["difficulte"] == {"Facile": [0, 1], "Moyen": [2]}
+    assert filtres["ingredients"]["œufs"] == [1]
+    assert sorted(filtres["ingredients"]) == ["courge", "crème", "farine", "poireau", "œufs"]
+
+
+def test_recompile_si_la_source_change(snapshot):
+    signature = snapshot.signature
+    DataManager().sauvegarder_recettes(RECETTES[:1])
+    relu = ouvrir_snapshot()
+    try:
+        assert relu.signature != signature and len(relu) == 1
+    finally:
+        relu.fermer()
+
+
+def test_fichier_invalide_recompile(dossier_donnees):
+    DataManager().sauvegarder_recettes(RECETTES)
+    Config.SNAPSHOT_PATH.write_bytes(b"pas un snapshot" * 20)
+    snapshot = ouvrir_snapshot()
+    try:
+        assert len(snapshot) == 3
+    finally:
+        snapshot.fermer()
+
+
+def test_base_paresseuse_identique(dossier_donnees, monkeypatch):
+    BaseConnaissances().ajouter_recettes(RECETTES)
+    complete = BaseConnaissances()
+    monkeypatch.setattr(Config, "CHARGEMENT_PARESSEUX", True)
+    paresseuse = BaseConnaissances()
+    dicts = lambda recettes: [r.to_dict() for r in recettes]
+    assert dicts(paresseuse.recettes) == dicts(complete.recettes)
+    for filtres in ({"type_plat": "ENTRÉE"}, {"difficulte": "facile", "temps_max": 30}, {"ingredient": "œuf"}):
+        assert dicts(paresseuse.query(**filtres)) == dicts(complete.query(**filtres))
+    paresseuse.supprimer_recette("Velouté")
+    assert "Velouté" not in [r.nom for r in paresseuse.recettes]
+    # Les deux recettes de ce nom sont supprimées, jusque dans recettes.json
+    assert "Velouté" not in [d["nom"] for d in json.loads(Config.RECETTES_PATH.read_text(encoding="utf-8"))]
+    assert len(paresseuse.recettes) == len(complete.recettes) - 2
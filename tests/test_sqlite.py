@@ -0,0 +1,75 @@
+import threading
+import pytest
+from models.base_connaissances import BaseConnaissances
+from models.ingredient import Ingredient
+from models.recette import Recette
+from utils.config import Config
+
+
+def recette(nom: str, type_plat: str = "Plat principal", ingredient: str = "riz") -> Recette:
+    return Recette(nom, [Ingredient(ingredient, 100, "g")], ["Cuire"], 10, "Facile", type_plat)
+
+
+@pytest.fixture
+def sqlite(dossier_donnees, monkeypatch):
+    monkeypatch.setattr(Config, "STOCKAGE_BACKEND", "sqlite")
+    return dossier_donnees
+
+
+def noms(recettes):
+    return [r.nom for r in recettes]
+
+
+def sans_blocage(fonction, *args):
+    """Exécute l'appel dans un thread : un interblocage fait échouer le test au lieu de le figer"""
+    fil = threading.Thread(target=fonction, args=args, daemon=True)
+    fil.start()
+    fil.join(timeout=5)
+    assert not fil.is_alive(), f"{fonction.__qualname__} bloqué"
+
+
+def test_mutations_persistees(sqlite):
+    base = BaseConnaissances()
+    base.ajouter_recettes([recette("Pilaf"), recette("Velouté", "Entrée", "courge")])
+    base.supprimer_recette("Pilaf")
+    relue = BaseConnaissances()
+    # Catalogue relu à la demande depuis la base (plus de 8 recettes avec les recettes par défaut)
+    assert noms(relue.recettes) == noms(base.recettes)
+    assert "Pilaf" not in noms(relue.recettes)
+    assert noms(relue.rechercher_par_ingredient("COURGE")) == ["Velouté"]
+
+
+@pytest.mark.parametrize("paresseux", [False, True])
+def test_sauvegarder_sans_blocage(sqlite, monkeypatch, paresseux):
+    if paresseux:
+        BaseConnaissances().ajouter_recettes([recette(f"R{i}") for i in range(10)])
+    base = BaseConnaissances()
+    attendu = noms(base.recettes)
+    sans_blocage(base.sauvegarder)
+    assert noms(base.recettes) == attendu
+    assert noms(BaseConnaissances().recettes) == attendu
+
+
+def test_remplacement_du_catalogue(sqlite):
+    base = BaseConnaissances()
+    base.ajouter_recettes([recette(f"R{i}") for i in range(10)])
+    relue = BaseConnaissances()
+    # Recettes décodées depuis la base même qu'on réécrit
+    sans_blocage(relue.stockage.sauvegarder_recettes, relue.recettes)
+    assert noms(BaseConnaissances().recettes) == noms(base.recettes)
+
+
+def test_filtres_identiques_au_json(dossier_donnees, monkeypatch):
+    """Casse repliée par str.lower() dans les deux backends, accents compris"""
+    BaseConnaissances().ajouter_recettes([recette("Velouté", "ENTRÉE"), recette("Gaspacho", "entrée"),
+                                          recette("Tarte", "Dessert")])
+    filtres = [{"type_plat": "Entrée"}, {"type_plat": "entrée", "difficulte": "FACILE"}, {"type_plat": "ENTRÉE"}]
+    base = BaseConnaissances()
+    attendus = [base.page_recettes(0, 50, **f) for f in filtres]
+    assert attendus[0][0] == 4
+    monkeypatch.setattr(Config, "STOCKAGE_BACKEND", "sqlite")
+    base = BaseConnaissances()
+    assert len(base.recettes) == 11
+    for f, attendu in zip(filtres, attendus):
+        assert base.page_recettes(0, 50, **f) == attendu
+        assert [r.to_dict() for r in base.query(**f)] == attendu[1]
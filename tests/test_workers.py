@@ -0,0 +1,88 @@
+import asyncio
+import json
+import subprocess
+import sys
+import types
+from pathlib import Path
+import pytest
+from starlette.requests import Request
+import api
+from models.base_connaissances import BaseConnaissances
+from models.ingredient import Ingredient
+from models.recette import Recette
+from utils.config import Config
+
+
+def recette(nom: str, ingredient: str = "riz") -> Recette:
+    return Recette(nom, [Ingredient(ingredient, 100, "g")], ["Cuire"], 10, "Facile", "Plat principal")
+
+
+@pytest.fixture
+def deux_workers(dossier_donnees, monkeypatch):
+    """Deux catalogues sur la même base SQLite, comme deux workers de l'API"""
+    monkeypatch.setattr(Config, "STOCKAGE_BACKEND", "sqlite")
+    return BaseConnaissances(), BaseConnaissances()
+
+
+def test_ecriture_vue_par_l_autre_worker(deux_workers):
+    a, b = deux_workers
+    version = b.version
+    a.ajouter_recette(recette("Pilaf", "boulgour"))
+    # Sa propre écriture ne périme pas le catalogue de l'écrivain
+    assert not a.synchroniser()
+    assert b.rechercher_par_ingredient("boulgour") == []
+    assert b.synchroniser() and b.version > version
+    assert [r.nom for r in b.rechercher_par_ingredient("boulgour")] == ["Pilaf"]
+    assert [r.nom for r in b.query(ingredient="boulgour", type_plat="plat principal")] == ["Pilaf"]
+    assert not b.synchroniser()
+    b.supprimer_recette("Pilaf")
+    assert a.synchroniser() and a.rechercher_par_ingredient("boulgour") == []
+
+
+def test_index_derives_reconstruits(deux_workers):
+    a, b = deux_workers
+    b.recettes_similaires("Tiramisu")
+    avant = b.colonnes().statistiques()["total"]
+    a.ajouter_recette(recette("Pilaf"))
+    b.synchroniser()
+    assert b.colonnes().statistiques()["total"] == avant + 1
+    assert "Pilaf" in [r.nom for r, _ in b.recettes_similaires("Risotto aux Champignons", k=50)]
+
+
+def test_ecritures_croisees(deux_workers):
+    a, b = deux_workers
+    a.ajouter_recette(recette("Pilaf"))
+    b.ajouter_recette(recette("Paella"))
+    # b a écrit sans avoir vu l'écriture de a : il recharge au lieu de garder sa copie incomplète
+    assert b.synchroniser()
+    assert {"Pilaf", "Paella"} <= {r.nom for r in b.recettes}
+    assert a.synchroniser() and {"Pilaf", "Paella"} <= {r.nom for r in a.recettes}
+
+
+def test_pages_de_l_api_suivent_la_base(deux_workers, monkeypatch):
+    a, b = deux_workers
+    monkeypatch.setattr(api, "agent_global", types.SimpleNamespace(base_connaissances=b))
+    monkeypatch.setattr(api, "cache_pages", api.CachePages())
+    
+    async def page():
+        requete = Request({"type": "http", "method": "GET", "path": "/recettes", "headers": []})
+        
+        async def reponse(_):
+            return await api.reponse_recettes(requete, 0, None, "nom")
+        
+        resultat = await api.synchroniser_catalogue(requete, reponse)
+        return [r["nom"] for r in json.loads(resultat.body)], resultat.headers["etag"]
+    
+    noms, etag = asyncio.run(page())
+    a.ajouter_recette(recette("Pilaf"))
+    noms_apres, etag_apres = asyncio.run(page())
+    assert noms_apres == noms + ["Pilaf"] and etag_apres != etag
+
+
+def test_plusieurs_workers_exigent_sqlite(dossier_donnees):
+    racine = Path(__file__).resolve().parent.parent
+    commande = [sys.executable, "-c", "import sys, api; sys.argv = ['api.py', '--workers', '2']; api.main()"]
+    resultat = subprocess.run(commande, cwd=racine, capture_output=True, text=True, timeout=60,
+                              env={"STOCKAGE_BACKEND": "json", "DATA_FOLDER": str(dossier_donnees), "PATH": ""})
+    assert resultat.returncode == 2
+    assert "STOCKAGE_BACKEND=sqlite" in resultat.stderr
@@ -3,6 +3,8 @@ Package des utilitaires
 
 Contient :
 - config.py : Gestion de la configuration
+- boucle_async.py : Boucle d'événements durable pour le code synchrone (Streamlit)
+- budget_import.py : Vérification du temps d'import des modules utilisés sans l'IA
 """
 
 from .config import Config
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BoucleArrierePlan:
+    """Boucle d'événements durable, dans un thread démon, pour le code synchrone (Streamlit)
+    
+    Les clients gRPC de Gemini, les micro-lots et les sessions HTTP sont liés à la boucle
+    qui les a créés : sur une boucle unique, ils sont créés une fois puis réutilisés par
+    toutes les sessions, au lieu d'être reconstruits à chaque asyncio.run. Les coroutines
+    s'exécutent dans une copie du contexte de l'appelant (priorité de l'ordonnanceur comprise).
+    """
+    
+    _instance_partagee: Optional["BoucleArrierePlan"] = None
+    _verrou_instance = threading.Lock()
+    
+    def __init__(self):
+        self.boucle = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.boucle.run_forever, name="boucle-async", daemon=True)
+        self._thread.start()
+    
+    @classmethod
+    def partagee(cls) -> "BoucleArrierePlan":
+        """Boucle commune à tout le processus, démarrée au premier appel"""
+        if cls._instance_partagee is None:
+            with cls._verrou_instance:
+                if cls._instance_partagee is None:
+                    cls._instance_partagee = cls()
+        return cls._instance_partagee
+    
+    def executer(self, coroutine: Coroutine[object, object, T]) -> T:
+        """Exécute la coroutine sur la boucle et attend son résultat depuis le thread appelant"""
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("executer() appelé depuis la boucle elle-même : utilisez await")
+        futur = asyncio.run_coroutine_threadsafe(coroutine, self.boucle)
+        try:
+            return futur.result()
+        except BaseException:
+            # Appelant interrompu (arrêt du script Streamlit) : la coroutine est annulée
+            futur.cancel()
+            raise
+    
+    def iterer(self, generateur: AsyncIterator[T]) -> Iterator[T]:
+        """Parcourt un générateur asynchrone depuis le code synchrone, morceau par morceau"""
+        try:
+            while True:
+                try:
+                    yield self.executer(generateur.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.executer(generateur.aclose())
@@ -0,0 +1,91 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+RACINE = Path(__file__).resolve().parent.parent
+
+# Budget d'import (ms) des modules utilisés sans l'IA : outils, workers, tests
+BUDGETS = {
+    "utils.config": 100,
+    "models.base_connaissances": 150,
+    "agent": 300
+}
+
+# Dépendances lourdes qui ne doivent être chargées qu'à la première utilisation
+MODULES_INTERDITS = (
+    "google.generativeai",
+    "google.ai.generativelanguage",
+    "google.api_core",
+    "grpc",
+    "pandas",
+    "aiohttp",
+    "fastapi",
+    "uvicorn",
+    "streamlit"
+)
+
+
+def mesurer_import(module: str) -> Tuple[float, Set[str]]:
+    """Importe `module` dans un interpréteur neuf, sans GEMINI_API_KEY (-X importtime)
+    
+    Renvoie la durée cumulée de l'import (ms) et les modules chargés par cet import.
+    """
+    env = dict(os.environ)
+    env.pop("GEMINI_API_KEY", None)
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=RACINE, env=env, capture_output=True, text=True
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible :\n{resultat.stderr.strip()}")
+    duree, charges = 0.0, set()
+    # Lignes "import time: propre [us] | cumulé [us] | nom", le nom étant indenté selon la profondeur
+    for ligne in resultat.stderr.splitlines():
+        champs = ligne.split("|")
+        if len(champs) != 3 or not champs[1].strip().isdigit():
+            continue
+        nom = champs[2].strip()
+        charges.add(nom)
+        if nom == module:
+            duree = int(champs[1]) / 1000
+    return duree, charges
+
+
+def verifier_budgets(budgets: Dict[str, float], essais: int = 3) -> List[str]:
+    """Mesure chaque module (meilleur de `essais` imports) et renvoie les dépassements"""
+    erreurs = []
+    for module, budget in budgets.items():
+        mesures = [mesurer_import(module) for _ in range(essais)]
+        duree = min(d for d, _ in mesures)
+        interdits = [m for m in MODULES_INTERDITS if m in mesures[0][1]]
+        print(f"{'OK ' if duree <= budget and not interdits else 'KO '} {module} : {duree:.0f} ms (budget {budget:.0f} ms)")
+        if duree > budget:
+            erreurs.append(f"{module} : {duree:.0f} ms, budget {budget:.0f} ms")
+        if interdits:
+            erreurs.append(f"{module} charge {', '.join(interdits)}")
+    return erreurs
+
+
+def main():
+    """Vérifie le temps d'import des modules (python -m utils.budget_import [module=ms ...])"""
+    parser = argparse.ArgumentParser(description="Budget de temps d'import des modules sans IA")
+    parser.add_argument("modules", nargs="*", help="module ou module=budget_ms (défaut : BUDGETS)")
+    parser.add_argument("--essais", type=int, default=3, help="imports par module, le plus rapide est retenu")
+    args = parser.parse_args()
+    budgets = dict(BUDGETS)
+    if args.modules:
+        budgets = {}
+        for argument in args.modules:
+            module, _, budget = argument.partition("=")
+            budgets[module] = float(budget) if budget else BUDGETS.get(module, 300)
+    erreurs = verifier_budgets(budgets, args.essais)
+    for erreur in erreurs:
+        print(f"❌ {erreur}")
+    sys.exit(1 if erreurs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,14 +15,96 @@ class Config:
             raise ValueError(f"La variable {key} est requise dans .env")
         return value
     
-    # Configuration Gemini
-    GEMINI_API_KEY = _get_env("GEMINI_API_KEY")
+    # Configuration Gemini : la clé n'est exigée qu'à la première utilisation du modèle (voir cle_gemini)
+    GEMINI_API_KEY = _get_env("GEMINI_API_KEY", required=False)
+    # Appels simultanés maximum par processus et délai maximal d'un appel (secondes)
+    GEMINI_CONCURRENCE_MAX = int(_get_env("GEMINI_CONCURRENCE_MAX", "32"))
+    GEMINI_TIMEOUT = float(_get_env("GEMINI_TIMEOUT", "30"))
+    # Taille des files d'attente par priorité : au-delà, la requête est refusée (503)
+    FILE_INTERACTIF_MAX = int(_get_env("FILE_INTERACTIF_MAX", "64"))
+    FILE_API_MAX = int(_get_env("FILE_API_MAX", "128"))
+    FILE_ARRIERE_PLAN_MAX = int(_get_env("FILE_ARRIERE_PLAN_MAX", "32"))
+    # Nouveaux essais sur erreur transitoire (429/5xx) : backoff exponentiel avec gigue
+    GEMINI_TENTATIVES = int(_get_env("GEMINI_TENTATIVES", "3"))
+    GEMINI_BACKOFF_BASE = float(_get_env("GEMINI_BACKOFF_BASE", "0.5"))
+    GEMINI_BACKOFF_MAX = float(_get_env("GEMINI_BACKOFF_MAX", "8"))
+    # Disjoncteur : échecs consécutifs avant ouverture, secondes avant un nouvel essai
+    DISJONCTEUR_SEUIL = int(_get_env("DISJONCTEUR_SEUIL", "5"))
+    DISJONCTEUR_DELAI = float(_get_env("DISJONCTEUR_DELAI", "30"))
     
     # Gestion des données
     DATA_DIR = Path(_get_env("DATA_FOLDER", "data"))
     RECETTES_FILE = _get_env("RECETTES_FILE", "recettes.json")
     RECETTES_PATH = DATA_DIR / RECETTES_FILE
     
+    # Backend de persistance : "json" (fichier recettes.json) ou "sqlite"
+    STOCKAGE_BACKEND = _get_env("STOCKAGE_BACKEND", "json")
+    SQLITE_PATH = DATA_DIR / _get_env("SQLITE_FILE", "recettes.db")
+    
+    # Snapshot binaire compilé à partir de recettes.json (lecture par mmap)
+    SNAPSHOT_PATH = DATA_DIR / f"{RECETTES_FILE}.snap"
+    
+    # Chargement en flux, ingrédients construits à la demande
+    CHARGEMENT_PARESSEUX = _get_env("CHARGEMENT_PARESSEUX", "false").lower() in ("1", "true", "oui")
+    
+    # Journal des mutations (ajouts/suppressions ajoutés en fin de fichier)
+    JOURNAL_ACTIF = _get_env("JOURNAL_ACTIF", "false").lower() in ("1", "true", "oui")
+    JOURNAL_PATH = DATA_DIR / f"{RECETTES_FILE}.journal"
+    JOURNAL_SEUIL_COMPACTION = int(_get_env("JOURNAL_SEUIL_COMPACTION", "1000"))
+    
+    # Sauvegarde différée : les mutations sont regroupées en une écriture
+    SAUVEGARDE_DIFFEREE = _get_env("SAUVEGARDE_DIFFEREE", "false").lower() in ("1", "true", "oui")
+    SAUVEGARDE_DELAI = float(_get_env("SAUVEGARDE_DELAI", "2"))
+    SAUVEGARDE_DELAI_MAX = float(_get_env("SAUVEGARDE_DELAI_MAX", "10"))
+    
+    # Import en masse (NDJSON) : nombre de lignes validées par lot
+    BULK_TAILLE_LOT = int(_get_env("BULK_TAILLE_LOT", "1000"))
+    
+    # Micro-lots de suggestions : fenêtre de regroupement (ms) et taille maximale d'un lot
+    SUGGESTIONS_LOT_FENETRE_MS = float(_get_env("SUGGESTIONS_LOT_FENETRE_MS", "20"))
+    SUGGESTIONS_LOT_TAILLE = int(_get_env("SUGGESTIONS_LOT_TAILLE", "8"))
+    
+    # Délais propres à chaque branche de l'endpoint /chat (secondes)
+    CHAT_DELAI_REPONSE = float(_get_env("CHAT_DELAI_REPONSE", "30"))
+    CHAT_DELAI_SUGGESTION = float(_get_env("CHAT_DELAI_SUGGESTION", "15"))
+    
+    # Contexte envoyé à l'IA : k recettes les plus pertinentes, dans un budget de tokens
+    RAG_TOP_K = int(_get_env("RAG_TOP_K", "20"))
+    RAG_BUDGET_TOKENS = int(_get_env("RAG_BUDGET_TOKENS", "2000"))
+    
+    # Index de similarité : nombre de colonnes des vecteurs TF-IDF hachés (mémoire : 4 octets x recettes x dimension)
+    SIMILARITE_DIMENSION = int(_get_env("SIMILARITE_DIMENSION", "256"))
+    # Pages de GET /recettes : taille maximale, nombre et taille totale des réponses sérialisées gardées en cache
+    RECETTES_PAGE_MAX = int(_get_env("RECETTES_PAGE_MAX", "1000"))
+    CACHE_PAGES_TAILLE = int(_get_env("CACHE_PAGES_TAILLE", "64"))
+    CACHE_PAGES_MO = float(_get_env("CACHE_PAGES_MO", "32"))
+    # Nombre maximal de garde-mangers par appel à POST /recommandations/batch
+    RECOMMANDATIONS_LOT_MAX = int(_get_env("RECOMMANDATIONS_LOT_MAX", "10000"))
+    
+    # API REST (api.py) : adresse d'écoute et nombre de processus workers
+    API_HOST = _get_env("API_HOST", "127.0.0.1")
+    API_PORT = int(_get_env("API_PORT", "8000"))
+    API_WORKERS = int(_get_env("API_WORKERS", "1"))
+    # Interface Streamlit : URL de l'API à utiliser pour l'IA (vide : agent embarqué),
+    # ou lancement de l'API dans le processus de l'interface (développement)
+    API_URL = _get_env("API_URL", "", required=False)
+    API_DANS_UI = _get_env("API_DANS_UI", "false").lower() in ("1", "true", "oui")
+    # Secret partagé entre l'interface et l'API : seule l'interface peut demander la priorité interactive
+    API_JETON_INTERFACE = _get_env("API_JETON_INTERFACE", "", required=False)
+    
+    # Cache des réponses de l'IA (LRU, durée de vie en secondes, copie disque optionnelle)
+    CACHE_IA_TAILLE = int(_get_env("CACHE_IA_TAILLE", "256"))
+    CACHE_IA_TTL = float(_get_env("CACHE_IA_TTL", "3600"))
+    CACHE_IA_PERSISTANT = _get_env("CACHE_IA_PERSISTANT", "false").lower() in ("1", "true", "oui")
+    CACHE_IA_PATH = DATA_DIR / "cache_ia.json"
+    
+    @classmethod
+    def cle_gemini(cls) -> str:
+        """Clé de l'API Gemini, ValueError si elle n'est pas définie"""
+        if not cls.GEMINI_API_KEY:
+            raise ValueError("La variable GEMINI_API_KEY est requise dans .env")
+        return cls.GEMINI_API_KEY
+    
     # Initialisation
     @classmethod
     def init(cls):
@@ -0,0 +1,19 @@
+import os
+import stat
+
+# Droits donnés au fichier quand la cible n'existe pas encore
+MODE_DEFAUT = 0o644
+
+
+def remplacer_atomiquement(chemin_temp, chemin):
+    """Renomme un fichier temporaire sur sa cible en conservant les droits de celle-ci
+    
+    tempfile.mkstemp crée le fichier en 0600 : sans chmod, chaque réécriture retirerait
+    la lecture aux autres utilisateurs (serveur web, sauvegardes, autre compte de service).
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(chemin).st_mode)
+    except FileNotFoundError:
+        mode = MODE_DEFAUT
+    os.chmod(chemin_temp, mode)
+    os.replace(chemin_temp, chemin)